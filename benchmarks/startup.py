@@ -0,0 +1,113 @@
+"""
+Startup benchmark of the space_invaders package.
+
+Every measurement runs in a fresh interpreter, so that nothing is cached by
+previously imported modules. Reported are the medians over all repetitions of
+
+- the import of the package alone (which registers the gym environment),
+- the import of the package including its subpackages,
+- the import of gymnasium alone, which the package import depends on,
+- the construction of an environment with gymnasium.make and
+- the latency of the first reset() of that environment.
+
+Run from the root of the repository with
+
+    python benchmarks/startup.py --repeat 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_GYMNASIUM = """
+import time
+start = time.perf_counter()
+import gymnasium
+print(time.perf_counter() - start)
+"""
+
+IMPORT_PACKAGE = """
+import time
+start = time.perf_counter()
+import space_invaders
+print(time.perf_counter() - start)
+"""
+
+IMPORT_SUBPACKAGES = """
+import time
+start = time.perf_counter()
+import space_invaders
+import space_invaders.components
+import space_invaders.gym_env
+print(time.perf_counter() - start)
+"""
+
+MAKE_AND_RESET = """
+import time
+import gymnasium
+import space_invaders
+start = time.perf_counter()
+env = gymnasium.make("CustomSpaceInvaders-v0", render_mode={render_mode!r})
+made = time.perf_counter()
+env.reset(seed=0)
+print(made - start, time.perf_counter() - made)
+"""
+
+
+def run(code: str) -> list[float]:
+    """Run the code in a fresh interpreter and return the printed timings."""
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(REPO_ROOT), *filter(None, [os.environ.get("PYTHONPATH")])]
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [float(value) for value in result.stdout.splitlines()[-1].split()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--render-mode", default="rgb_array")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    samples: dict[str, list[float]] = {
+        "import_gymnasium": [],
+        "import_package": [],
+        "import_subpackages": [],
+        "make_env": [],
+        "first_reset": [],
+    }
+    for _ in range(args.repeat):
+        samples["import_gymnasium"] += run(IMPORT_GYMNASIUM)
+        samples["import_package"] += run(IMPORT_PACKAGE)
+        samples["import_subpackages"] += run(IMPORT_SUBPACKAGES)
+        make_env, first_reset = run(MAKE_AND_RESET.format(render_mode=args.render_mode))
+        samples["make_env"].append(make_env)
+        samples["first_reset"].append(first_reset)
+    results = {
+        name: 1000 * statistics.median(values) for name, values in samples.items()
+    }
+    if args.json:
+        print(json.dumps({"unit": "ms", "repeat": args.repeat, **results}, indent=2))
+    else:
+        for name, value in results.items():
+            print(f"{name:<20} {value:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
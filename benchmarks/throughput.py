@@ -0,0 +1,358 @@
+"""
+Step throughput benchmark suite of the space invaders environments.
+
+Measures steps/sec, p50/p99 step latency and reset() latency of
+SpaceInvadersEnv across render modes (including the symbolic ones),
+observation sizes, engines, observation renderers and frame skipping, single
+against vectorized execution, the scaling of the shared memory vector
+environment with the number of worker processes, and micro-benchmarks of the
+collision checks, the enemy formation queries, render_frame, clone, blits of
+loaded and prepared images and the observation resize. Results are printed as
+a table or written as JSON to track regressions between releases.
+
+Run from the root of the repository with
+
+    python benchmarks/throughput.py --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import gymnasium
+import numpy as np
+import pygame
+import space_invaders
+from space_invaders.components import Laser, config
+from space_invaders.components.resources import ASSET_FILES, load_image
+from space_invaders.gym_env import (
+    SharedMemoryVectorEnv,
+    SpaceInvadersEnv,
+    SpaceInvadersVectorEnv,
+    ThreadPoolVectorEnv,
+)
+from space_invaders.gym_env.space_invader_env import convert_frame
+
+RENDER_MODES = ["rgb_array", "gray_scale_array"]
+SYMBOLIC_RENDER_MODES = ["symbolic", "symbolic_array"]
+FRAMESKIPS = [{"frameskip": 4}, {"frameskip": 4, "max_pool": True}]
+OBSERVATION_SIZES = [(200, 150), (84, 84)]
+ENGINES = ["sprite", "array"]
+OBSERVATION_RENDERERS = ["pygame", "direct"]
+VECTOR_KINDS = ["native", "sync", "thread_pool", "shared_memory"]
+
+
+def summarize(latencies: np.ndarray, steps_per_call: int = 1) -> dict[str, float]:
+    """Summarize the latencies of calls in seconds."""
+
+    return {
+        "steps_per_sec": steps_per_call * len(latencies) / float(latencies.sum()),
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)),
+        "p99_ms": 1000 * float(np.percentile(latencies, 99)),
+        "mean_ms": 1000 * float(latencies.mean()),
+    }
+
+
+def time_calls(function: Callable[[], Any], number: int, warmup: int) -> np.ndarray:
+    """Call the function repeatedly and return the latency of every timed call."""
+
+    for _ in range(warmup):
+        function()
+    latencies = np.empty(number)
+    for i in range(number):
+        start = time.perf_counter()
+        function()
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def random_actions(seed: int, shape: tuple[int, ...]) -> np.ndarray:
+    """Actions of a random policy that shoots half of the time."""
+
+    rng = np.random.default_rng(seed)
+    return rng.choice(4, size=shape, p=[0.1, 0.2, 0.2, 0.5])
+
+
+def bench_env(steps: int, resets: int, seed: int, **env_kwargs) -> dict[str, Any]:
+    """Benchmark step() and reset() of one SpaceInvadersEnv."""
+
+    env = SpaceInvadersEnv(**env_kwargs)
+    reset_latencies = time_calls(lambda: env.reset(seed=seed), resets, warmup=1)
+    env.reset(seed=seed)
+    latencies = np.empty(steps)
+    for i, action in enumerate(random_actions(seed, (steps,))):
+        start = time.perf_counter()
+        _, _, terminated, truncated, _ = env.step(action)
+        latencies[i] = time.perf_counter() - start
+        if terminated or truncated:
+            env.reset()
+    env.close()
+    return {
+        **summarize(latencies),
+        "reset_p50_ms": 1000 * float(np.percentile(reset_latencies, 50)),
+        "reset_p99_ms": 1000 * float(np.percentile(reset_latencies, 99)),
+    }
+
+
+def make_vector_env(
+    kind: str, num_envs: int, **env_kwargs
+) -> gymnasium.vector.VectorEnv:
+    """Create a vector environment of the specified kind."""
+
+    if kind == "native":
+        return SpaceInvadersVectorEnv(num_envs=num_envs, **env_kwargs)
+    if kind == "shared_memory":
+        return SharedMemoryVectorEnv(num_envs=num_envs, engine="array", **env_kwargs)
+    env_fns = [lambda: SpaceInvadersEnv(engine="array", **env_kwargs)] * num_envs
+    if kind == "sync":
+        return gymnasium.vector.SyncVectorEnv(env_fns)
+    if kind == "thread_pool":
+        return ThreadPoolVectorEnv(env_fns)
+    raise ValueError(f"Vector environment kind should be one of {VECTOR_KINDS}.")
+
+
+def bench_vector_env(
+    kind: str, num_envs: int, steps: int, resets: int, seed: int, **env_kwargs
+) -> dict[str, Any]:
+    """
+    Benchmark step() and reset() of a vector environment. Latencies are per
+    batched call, steps/sec counts the steps of all sub-environments.
+    """
+    envs = make_vector_env(kind, num_envs, **env_kwargs)
+    reset_latencies = time_calls(lambda: envs.reset(seed=seed), resets, warmup=1)
+    envs.reset(seed=seed)
+    latencies = np.empty(steps)
+    for i, actions in enumerate(random_actions(seed, (steps, num_envs))):
+        start = time.perf_counter()
+        envs.step(actions)
+        latencies[i] = time.perf_counter() - start
+    envs.close()
+    return {
+        **summarize(latencies, steps_per_call=num_envs),
+        "reset_p50_ms": 1000 * float(np.percentile(reset_latencies, 50)),
+        "reset_p99_ms": 1000 * float(np.percentile(reset_latencies, 99)),
+    }
+
+
+def scaling_benchmarks(
+    steps: int, seed: int, envs_per_worker: int
+) -> list[dict[str, Any]]:
+    """
+    Benchmark the shared memory vector environment with 1, 2, 4, ... worker
+    processes up to the number of CPUs and the same number of environments
+    per worker. The efficiency is the speedup over one worker divided by the
+    number of workers, which is 1 for linear scaling.
+    """
+    cpu_count = os.cpu_count() or 1
+    num_workers = [2**i for i in range(cpu_count.bit_length()) if 2**i < cpu_count]
+    results = []
+    for workers in [*num_workers, cpu_count]:
+        envs = SharedMemoryVectorEnv(
+            num_envs=workers * envs_per_worker,
+            num_workers=workers,
+            copy=False,
+            render_mode="rgb_array",
+            engine="array",
+            observation_renderer="direct",
+        )
+        envs.reset(seed=seed)
+        actions = iter(random_actions(seed, (steps, envs.num_envs)))
+        latencies = time_calls(lambda: envs.step(next(actions)), steps - 10, 10)
+        envs.close()
+        result = summarize(latencies, steps_per_call=envs.num_envs)
+        single_worker = results[0]["steps_per_sec"] if results else None
+        result["efficiency"] = result["steps_per_sec"] / (
+            workers * (single_worker or result["steps_per_sec"])
+        )
+        results.append({"num_workers": workers, **result})
+    return results
+
+
+def micro_benchmarks(number: int, seed: int) -> dict[str, dict[str, float]]:
+    """
+    Benchmark single functions of the sprite engine in a state in which all
+    lasers are on screen but nothing is hit, so that every call does the same
+    amount of work.
+    """
+    env = SpaceInvadersEnv(render_mode="rgb_array")
+    env.reset(seed=seed)
+    controller = env.game_object_controller
+    laser_im = env.assets.laser_im
+    # The player laser flies below the enemies and the enemy laser ends inside
+    # the opening of the leftmost blockade structure
+    structure = min(
+        controller.blockade_controller.blockade_group, key=lambda s: s.rect.x
+    )
+    env.player.laser_controller.add(Laser(laser_im, (structure.rect.centerx, 500), 0))
+    env.enemy_controller.laser_controller.add(
+        Laser(laser_im, (structure.rect.centerx, structure.rect.bottom - 40), 0)
+    )
+    raw_frame = env.render_frame().copy()
+    # The images as they are loaded and as they are prepared for fast blits
+    assets = env.assets
+    prepared_images = [
+        assets.player_im,
+        assets.enemy_im,
+        assets.laser_im,
+        assets.blockade_im,
+    ]
+    loaded_images = [
+        pygame.transform.scale(load_image(name), image.get_size())
+        for name, image in zip(ASSET_FILES, prepared_images)
+    ]
+    canvas = env.canvas.copy()
+    width, height = env.width, env.height
+    out = np.empty((width, height), dtype=np.uint8)
+    scratch = np.empty((2, width, height), dtype=np.uint32)
+    functions = {
+        "check_enemy_hit": controller._check_enemy_hit,
+        "check_blockade_hit_by_enemy_laser": (
+            controller._check_blockade_hit_by_enemy_laser
+        ),
+        "check_blockade_hit_by_player_laser": (
+            controller._check_blockade_hit_by_player_laser
+        ),
+        "enemy_formation_queries": lambda: (
+            env.enemy_controller.enemy_is_out_of_screen(),
+            env.enemy_controller.enemy_height,
+        ),
+        "render_frame": env.render_frame,
+        "clone": env.clone,
+        "blit_loaded_images": lambda: canvas.blits(
+            [(image, (100, 100)) for image in loaded_images], doreturn=False
+        ),
+        "blit_prepared_images": lambda: canvas.blits(
+            [(image, (100, 100)) for image in prepared_images], doreturn=False
+        ),
+        "resize_rgb_array": lambda: convert_frame(
+            raw_frame, width, height, "rgb_array"
+        ),
+        "resize_gray_scale_array": lambda: convert_frame(
+            raw_frame, width, height, "gray_scale_array", out, scratch
+        ),
+    }
+    results = {}
+    for name, function in functions.items():
+        latencies = time_calls(function, number, warmup=number // 10)
+        results[name] = {
+            "calls_per_sec": len(latencies) / float(latencies.sum()),
+            "p50_us": 1e6 * float(np.percentile(latencies, 50)),
+            "p99_us": 1e6 * float(np.percentile(latencies, 99)),
+        }
+    assert env.player.laser_controller and env.enemy_controller.laser_controller
+    env.close()
+    return results
+
+
+def metadata() -> dict[str, Any]:
+    """Describe the machine and the versions the benchmarks ran with."""
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "gymnasium": gymnasium.__version__,
+        "config": {"WIDTH": config["WIDTH"], "HEIGHT": config["HEIGHT"]},
+    }
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, Any]:
+    """Run all benchmarks selected by the command line arguments."""
+
+    results: dict[str, Any] = {"metadata": metadata(), "env": [], "vector_env": []}
+    for render_mode in RENDER_MODES:
+        for width, height in OBSERVATION_SIZES:
+            for engine in ENGINES:
+                for renderer in OBSERVATION_RENDERERS:
+                    params = {
+                        "render_mode": render_mode,
+                        "width": width,
+                        "heigth": height,
+                        "engine": engine,
+                        "observation_renderer": renderer,
+                    }
+                    result = bench_env(args.steps, args.resets, args.seed, **params)
+                    results["env"].append({"params": params, **result})
+                    report("env", params, result)
+    for engine in ENGINES:
+        for frameskip in FRAMESKIPS:
+            params = {"render_mode": "rgb_array", "engine": engine, **frameskip}
+            result = bench_env(args.steps, args.resets, args.seed, **params)
+            results["env"].append({"params": params, **result})
+            report("env", params, result)
+    # Symbolic observations do not depend on the observation size or renderer
+    for render_mode in SYMBOLIC_RENDER_MODES:
+        for engine in ENGINES:
+            params = {"render_mode": render_mode, "engine": engine}
+            result = bench_env(args.steps, args.resets, args.seed, **params)
+            results["env"].append({"params": params, **result})
+            report("env", params, result)
+    for kind in VECTOR_KINDS:
+        for renderer in OBSERVATION_RENDERERS:
+            params = {
+                "kind": kind,
+                "num_envs": args.num_envs,
+                "render_mode": "rgb_array",
+                "observation_renderer": renderer,
+            }
+            result = bench_vector_env(
+                steps=args.steps // args.num_envs + 1,
+                resets=args.resets,
+                seed=args.seed,
+                **params,
+            )
+            results["vector_env"].append({"params": params, **result})
+            report("vector_env", params, result)
+    results["scaling"] = scaling_benchmarks(
+        args.steps // 4, args.seed, args.envs_per_worker
+    )
+    for result in results["scaling"]:
+        report("scaling", {"num_workers": result["num_workers"]}, result)
+    results["micro"] = micro_benchmarks(args.micro_calls, args.seed)
+    for name, result in results["micro"].items():
+        report("micro", {"function": name}, result)
+    return results
+
+
+def report(group: str, params: dict[str, Any], result: dict[str, float]) -> None:
+    """Print one result as a line of the table on stderr."""
+
+    description = " ".join(str(value) for value in params.values())
+    values = " ".join(f"{key}={value:.3g}" for key, value in result.items())
+    print(f"{group:<10} {description:<52} {values}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=500, help="steps per env")
+    parser.add_argument("--resets", type=int, default=10, help="timed resets")
+    parser.add_argument("--num-envs", type=int, default=8)
+    parser.add_argument("--envs-per-worker", type=int, default=4)
+    parser.add_argument("--micro-calls", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
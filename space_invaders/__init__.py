@@ -3,5 +3,6 @@ from gymnasium.envs.registration import register
 register(
     id="CustomSpaceInvaders-v0",
     entry_point="space_invaders.gym_env:SpaceInvadersEnv",
+    vector_entry_point="space_invaders.gym_env:SpaceInvadersVectorEnv",
     max_episode_steps=3000,
 )
@@ -1,43 +1,89 @@
-from space_invaders.components.blockade import (
-    Blockade,
-    BlockadeGroup,
-)
-from space_invaders.components.player import Player, PlayerObject
-from space_invaders.components.laser import Laser
-from space_invaders.components.base_objects import BaseObject, MovableObject
-from space_invaders.components.objects import Enemy, EnemyCreator
-from space_invaders.components.level import LevelGenerator
-from space_invaders.components.game_handler import GameHandler, GameHandlerBase
-from space_invaders.components.scoreboard import ScoreBoard, LiveIcon
-from space_invaders.components.controller import (
-    EnemyController,
-    LaserController,
-    BlockadeController,
-    GameObjectController,
-)
-import yaml
-
-with open("space_invaders/config.yaml", "r") as file:
-    config = yaml.safe_load(file)
-
-all = [
-    BaseObject,
-    MovableObject,
-    PlayerObject,
-    Player,
-    Enemy,
-    Laser,
-    Blockade,
-    BlockadeGroup,
-    BlockadeController,
-    EnemyCreator,
-    EnemyController,
-    LaserController,
-    LevelGenerator,
-    GameHandler,
-    GameHandlerBase,
-    GameObjectController,
-    LiveIcon,
-    ScoreBoard,
-    config,
-]
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from space_invaders.components.blockade import (
+        Blockade,
+        BlockadeGroup,
+        BlockadeStructure,
+    )
+    from space_invaders.components.player import Player, PlayerObject
+    from space_invaders.components.laser import Laser
+    from space_invaders.components.base_objects import BaseObject, MovableObject
+    from space_invaders.components.objects import Enemy, EnemyCreator
+    from space_invaders.components.formation import EnemyFormation
+    from space_invaders.components.level import LevelGenerator
+    from space_invaders.components.game_handler import GameHandler, GameHandlerBase
+    from space_invaders.components.scoreboard import ScoreBoard, LiveIcon
+    from space_invaders.components.array_engine import ArrayEngine
+    from space_invaders.components.controller import (
+        EnemyController,
+        LaserController,
+        BlockadeController,
+        GameObjectController,
+    )
+    from space_invaders.components.world import (
+        GameAssets,
+        create_world,
+        load_assets,
+    )
+    from space_invaders.components.resources import (
+        get_assets,
+        get_config,
+        prepare_surface,
+    )
+    from space_invaders.components.profiler import PhaseProfiler
+
+    config: Any
+
+# The modules that define the public objects. They are imported on first
+# access, so importing the package neither loads pygame nor reads any files.
+_modules = {
+    "BaseObject": "base_objects",
+    "MovableObject": "base_objects",
+    "PlayerObject": "player",
+    "Player": "player",
+    "Enemy": "objects",
+    "Laser": "laser",
+    "Blockade": "blockade",
+    "BlockadeGroup": "blockade",
+    "BlockadeStructure": "blockade",
+    "BlockadeController": "controller",
+    "EnemyCreator": "objects",
+    "EnemyFormation": "formation",
+    "EnemyController": "controller",
+    "LaserController": "controller",
+    "LevelGenerator": "level",
+    "GameHandler": "game_handler",
+    "GameHandlerBase": "game_handler",
+    "GameObjectController": "controller",
+    "LiveIcon": "scoreboard",
+    "ScoreBoard": "scoreboard",
+    "ArrayEngine": "array_engine",
+    "GameAssets": "world",
+    "create_world": "world",
+    "load_assets": "world",
+    "get_assets": "resources",
+    "get_config": "resources",
+    "prepare_surface": "resources",
+    "PhaseProfiler": "profiler",
+}
+
+__all__ = [*_modules, "config"]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "config":
+        return __getattr__("get_config")()
+    if name == "all":
+        return [__getattr__(public_name) for public_name in __all__]
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"{__name__}.{_modules[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *__all__]
@@ -0,0 +1,572 @@
+from space_invaders.components.blockade import BlockadeGrid, BlockadeGroup
+from space_invaders.components.controller import BlockadeController
+from space_invaders.components.formation import round_half_away
+from space_invaders.components.laser import Laser, sweep_contact
+from space_invaders.components.level import LevelGenerator
+from space_invaders.components.resources import get_config
+from typing import Any, Optional, Sequence
+import copy
+import numpy as np
+import pygame
+
+config = get_config()
+WIDTH = config["WIDTH"]
+HEIGHT = config["HEIGHT"]
+PLAYER_BASE_SPEED = config["PLAYER_BASE_SPEED"]
+ENEMY_BASE_SPEED = config["ENEMY_BASE_SPEED"]
+LASER_BASE_SPEED = config["LASER_BASE_SPEED"]
+ENEMY_BLOCK_TIME = config["ENEMY_BLOCK_TIME"]
+ENEMY_UNBLOCK_TIME = config["ENEMY_UNBLOCK_TIME"]
+PLAYER_SHOOT_DELAY = config["PLAYER_SHOOT_DELAY"]
+
+
+def collide(ax, ay, aw, ah, bx, by, bw, bh) -> np.ndarray:
+    """Vectorized version of pygame.Rect.colliderect for broadcastable arrays."""
+
+    return (ax < bx + bw) & (ay < by + bh) & (ax + aw > bx) & (ay + ah > by)
+
+
+# The attributes that define the state of a game
+STATE_KEYS = (
+    "player_x",
+    "lives",
+    "game_time",
+    "level_number",
+    "enemy_x",
+    "enemy_y",
+    "enemy_alive",
+    "enemy_direction",
+    "enemy_speed",
+    "enemy_blocked",
+    "last_enemy_block_time",
+    "last_enemy_unblock_time",
+    "player_laser_active",
+    "player_laser_x",
+    "player_laser_y",
+    "enemy_laser_active",
+    "enemy_laser_x",
+    "enemy_laser_y",
+    "blockade_alive",
+)
+
+
+class ArrayEngine:
+    """
+    Simulation core that keeps the state of one or more independent games in
+    NumPy arrays instead of pygame sprites and advances all of them with
+    vectorized updates. The game rules and the integer arithmetic of the
+    pygame.Rect positions are the same as in SpaceInvadersEnv.step.
+
+    All state arrays have the number of games as their first dimension.
+
+    Attributes
+    ----------
+    num_games : int
+        The number of independent games.
+    player_x : np.ndarray
+        The left edge of the player.
+    lives : np.ndarray
+        The number of lives the player has left.
+    game_time : np.ndarray
+        The number of computed steps since the last reset.
+    level_number : np.ndarray
+        The current level.
+    enemy_x, enemy_y : np.ndarray
+        The top left edge of every enemy, shaped (num_games, num_enemies).
+    enemy_alive : np.ndarray
+        Mask of the enemies that have not been killed yet.
+    enemy_direction : np.ndarray
+        The horizontal movement direction (-1 or 1) of all enemies of a game.
+    enemy_speed : np.ndarray
+        The current speed of all enemies of a game.
+    enemy_blocked : np.ndarray
+        Indicates wether enemies can move (False) or not (True).
+    player_laser_active, enemy_laser_active : np.ndarray
+        Indicates wether the player or an enemy has a laser on screen.
+    player_laser_x, player_laser_y, enemy_laser_x, enemy_laser_y : np.ndarray
+        The top left edge of the lasers.
+    blockade_grid : BlockadeGrid
+        The grids of the cells of all blockade structures.
+    blockade_alive : np.ndarray
+        Mask of the blocks that have not been destroyed yet, shaped
+        (num_games, num_structures, num_columns, num_rows).
+    swept : bool
+        Wether collisions of the lasers are tested against the whole path they
+        covered during a step, like with swept LaserControllers.
+    """
+
+    def __init__(
+        self,
+        player_im: pygame.Surface,
+        enemy_im: pygame.Surface,
+        laser_im: pygame.Surface,
+        blockade_im: pygame.Surface,
+        num_games: int = 1,
+        swept: bool = False,
+    ) -> None:
+        self.player_im = player_im
+        self.enemy_im = enemy_im
+        self.laser_im = laser_im
+        self.blockade_im = blockade_im
+        self.num_games = num_games
+        self.swept = swept
+        self.player_size = player_im.get_rect().size
+        self.enemy_size = enemy_im.get_rect().size
+        self.laser_size = laser_im.get_rect().size
+        # Positions are truncated like in pygame.Rect.move
+        self.player_start = (
+            int(WIDTH / 2 - self.player_size[0] / 2),
+            int(HEIGHT - self.player_size[1]),
+        )
+        self.player_y = self.player_start[1]
+        blockade_controller = BlockadeController(blockade_im, BlockadeGroup())
+        self.block_len = blockade_controller.block_len
+        # Top left edges of the structures, which all share the same template
+        structure_positions = np.array(
+            blockade_controller.structure_positions(), dtype=np.int64
+        )
+        structure_positions[:, 1] -= self.block_len * (
+            blockade_controller.template.shape[1] - 1
+        )
+        self.blockade_template = blockade_controller.template
+        self.blockade_grid = BlockadeGrid(
+            (structure_positions[:, 0], structure_positions[:, 1]),
+            self.block_len,
+            self.blockade_template.shape,
+        )
+        self._structure_grids = [
+            BlockadeGrid((int(x), int(y)), self.block_len, self.blockade_template.shape)
+            for x, y in structure_positions
+        ]
+        # Maximum number of cells a laser can overlap in x- and y-direction
+        self._laser_cell_span = (
+            -(-self.laser_size[0] // self.block_len) + 1,
+            -(-self.laser_size[1] // self.block_len) + 1,
+        )
+        num_enemies = len(LevelGenerator.enemy_positions(0, self.enemy_size[1]))
+        self.player_x = np.zeros(num_games, dtype=np.int64)
+        self.lives = np.zeros(num_games, dtype=np.int64)
+        self.game_time = np.zeros(num_games, dtype=np.int64)
+        self.level_number = np.zeros(num_games, dtype=np.int64)
+        self.enemy_x = np.zeros((num_games, num_enemies), dtype=np.int64)
+        self.enemy_y = np.zeros((num_games, num_enemies), dtype=np.int64)
+        self.enemy_alive = np.zeros((num_games, num_enemies), dtype=bool)
+        self.enemy_direction = np.zeros(num_games, dtype=np.int64)
+        self.enemy_speed = np.zeros(num_games, dtype=np.float64)
+        self.enemy_blocked = np.zeros(num_games, dtype=bool)
+        self.last_enemy_block_time = np.zeros(num_games, dtype=np.int64)
+        self.last_enemy_unblock_time = np.zeros(num_games, dtype=np.int64)
+        self.player_laser_active = np.zeros(num_games, dtype=bool)
+        self.player_laser_x = np.zeros(num_games, dtype=np.int64)
+        self.player_laser_y = np.zeros(num_games, dtype=np.int64)
+        self.enemy_laser_active = np.zeros(num_games, dtype=bool)
+        self.enemy_laser_x = np.zeros(num_games, dtype=np.int64)
+        self.enemy_laser_y = np.zeros(num_games, dtype=np.int64)
+        self.blockade_alive = np.zeros(
+            (num_games, len(structure_positions), *self.blockade_template.shape),
+            dtype=bool,
+        )
+        # Clones share the blockade masks until one of them destroys a block
+        self._blockades_shared = False
+        self.reset()
+
+    def reset(self, games: Any = None) -> None:
+        """Reset the specified games (all games by default) to their initial state."""
+
+        games = self._game_mask(games)
+        self.player_x[games] = self.player_start[0]
+        self.lives[games] = 3
+        self.game_time[games] = 0
+        self.level_number[games] = 0
+        self.enemy_blocked[games] = True
+        self.last_enemy_block_time[games] = 0
+        self.last_enemy_unblock_time[games] = 0
+        self.player_laser_active[games] = False
+        self.enemy_laser_active[games] = False
+        self._own_blockades()[games] = self.blockade_template
+        self.load_new_level(games)
+        self.enemy_speed[games] = ENEMY_BASE_SPEED
+
+    def get_state(self, game: int = 0) -> dict[str, Any]:
+        """
+        Return a copy of the state of one game as a dictionary that maps the
+        names of the state attributes (STATE_KEYS) to NumPy scalars and arrays.
+        """
+        return {key: getattr(self, key)[game].copy() for key in STATE_KEYS}
+
+    def set_state(self, state: dict[str, Any], game: int = 0) -> None:
+        """Overwrite the state of one game with a state returned by get_state."""
+
+        self._own_blockades()
+        for key in STATE_KEYS:
+            getattr(self, key)[game] = state[key]
+
+    def clone(self) -> "ArrayEngine":
+        """
+        Return an independent copy of the engine. The state arrays are copied,
+        the images and the blockade grid are shared. The blockade masks are
+        copied on write: the engine and the clone share them until either of
+        them destroys a block.
+        """
+        clone = copy.copy(self)
+        for key in STATE_KEYS:
+            if key != "blockade_alive":
+                setattr(clone, key, getattr(self, key).copy())
+        self._blockades_shared = clone._blockades_shared = True
+        return clone
+
+    def _own_blockades(self) -> np.ndarray:
+        """Copy the blockade masks if they are shared with a clone and return them."""
+
+        if self._blockades_shared:
+            self.blockade_alive = self.blockade_alive.copy()
+            self._blockades_shared = False
+        return self.blockade_alive
+
+    def load_new_level(self, games: Any) -> None:
+        """Start the next level in the specified games."""
+
+        games = self._game_mask(games)
+        for game in np.flatnonzero(games):
+            self.level_number[game] += 1
+            positions = LevelGenerator.enemy_positions(
+                LevelGenerator.y_offset(self.level_number[game]), self.enemy_size[1]
+            )
+            # Positions are truncated like in pygame.Rect.move
+            positions = np.trunc(np.array(positions)).astype(np.int64)
+            self.enemy_x[game] = positions[:, 0]
+            self.enemy_y[game] = positions[:, 1]
+        self.enemy_alive[games] = True
+        self.enemy_direction[games] = -1
+
+    def _game_mask(self, games: Any) -> np.ndarray:
+        """Convert None, game indices or a boolean mask to a boolean mask."""
+
+        mask = np.zeros(self.num_games, dtype=bool)
+        if games is None:
+            mask[:] = True
+        else:
+            mask[games] = True
+        return mask
+
+    @property
+    def num_remaining_enemies(self) -> np.ndarray:
+        return self.enemy_alive.sum(axis=1)
+
+    @property
+    def enemy_height(self) -> np.ndarray:
+        """Get the y-position of the lowest enemy in every game."""
+
+        bottom = self.enemy_y + self.enemy_size[1]
+        return np.where(self.enemy_alive, bottom, np.iinfo(np.int64).min).max(axis=1)
+
+    def step(
+        self,
+        actions: Any,
+        np_randoms: Sequence[np.random.Generator],
+        dt: int = 40,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute one step in every game. Returns boolean arrays specifying
+        wether an enemy was killed, wether the player was hit and wether the
+        game has finished.
+
+        Parameters
+        ----------
+        actions : array-like
+            One action per game: (0) Do nothing, (1) move left, (2) move right
+            and (3) shoot laser.
+        np_randoms : Sequence[np.random.Generator]
+            One random number generator per game used for choosing the enemy
+            that shoots the next laser.
+        dt : int, default=40
+            The simulated time between two steps.
+        """
+        actions = np.asarray(actions).reshape(self.num_games)
+        t = self.game_time
+        pw, ph = self.player_size
+        ew, eh = self.enemy_size
+        lw, lh = self.laser_size
+        # Block and unblock enemy movement
+        unblock = self.enemy_blocked & (
+            (t - self.last_enemy_block_time) * dt > ENEMY_BLOCK_TIME
+        )
+        block = ~self.enemy_blocked & (
+            (t - self.last_enemy_unblock_time) * dt > ENEMY_UNBLOCK_TIME
+        )
+        self.enemy_blocked[unblock] = False
+        self.last_enemy_unblock_time[unblock] = t[unblock]
+        self.enemy_blocked[block] = True
+        self.last_enemy_block_time[block] = t[block]
+        # Apply player actions
+        right = self.player_x + pw
+        right = np.where(
+            actions == 1, round_half_away(right - PLAYER_BASE_SPEED * dt), right
+        )
+        right = np.where(
+            actions == 2, round_half_away(right + PLAYER_BASE_SPEED * dt), right
+        )
+        self.player_x[:] = np.maximum(np.minimum(right, WIDTH) - pw, 0)
+        shoot = (
+            (actions == 3)
+            & ~self.player_laser_active
+            & (t * dt > PLAYER_SHOOT_DELAY)
+        )
+        self.player_laser_active |= shoot
+        self.player_laser_x[shoot] = self.player_x[shoot] + pw // 2
+        self.player_laser_y[shoot] = self.player_y
+        # Update laser positions
+        for active, laser_x, laser_y, direction in (
+            (
+                self.player_laser_active,
+                self.player_laser_x,
+                self.player_laser_y,
+                "up",
+            ),
+            (
+                self.enemy_laser_active,
+                self.enemy_laser_x,
+                self.enemy_laser_y,
+                "down",
+            ),
+        ):
+            start_y = laser_y.copy()
+            laser_y[:] = self._move_laser(laser_y, direction, dt)
+            if self.swept:
+                self._sweep_lasers(active, laser_x, laser_y, start_y, direction)
+            active &= self._laser_on_screen(laser_y)
+        # Check if something was hit by laser
+        for active, laser_x, laser_y in (
+            (self.enemy_laser_active, self.enemy_laser_x, self.enemy_laser_y),
+            (self.player_laser_active, self.player_laser_x, self.player_laser_y),
+        ):
+            self._check_blockade_hit(active, laser_x, laser_y)
+        player_hit = self.enemy_laser_active & collide(
+            self.enemy_laser_x,
+            self.enemy_laser_y,
+            lw,
+            lh,
+            self.player_x,
+            self.player_y,
+            pw,
+            ph,
+        )
+        self.enemy_laser_active &= ~player_hit
+        self.lives -= player_hit.astype(np.int64)
+        hits = (
+            self.player_laser_active[:, None]
+            & self.enemy_alive
+            & collide(
+                self.player_laser_x[:, None],
+                self.player_laser_y[:, None],
+                lw,
+                lh,
+                self.enemy_x,
+                self.enemy_y,
+                ew,
+                eh,
+            )
+        )
+        enemy_hit = hits.any(axis=1)
+        self.enemy_alive &= ~hits
+        self.player_laser_active &= ~enemy_hit
+        # Increase enemy speed based on number of remaining enemies
+        speed_up = enemy_hit & (self.num_remaining_enemies % 9 == 0)
+        self.enemy_speed[speed_up] = 1.1 * self.enemy_speed[speed_up]
+        # Check if level is finished
+        finished = ~self.enemy_alive.any(axis=1)
+        if finished.any():
+            self.load_new_level(finished)
+            self.enemy_speed[finished] = (
+                ENEMY_BASE_SPEED * 1.05 * self.level_number[finished]
+            )
+        # Update enemy positions. The formation moves rigidly, so all enemies
+        # of a game move by the rounded movement of the first enemy
+        moving = ~self.enemy_blocked
+        delta = self.enemy_direction * self.enemy_speed * dt
+        origin_x = self.enemy_x[:, 0]
+        shift = np.where(moving, round_half_away(origin_x + delta) - origin_x, 0)
+        self.enemy_x += shift[:, None]
+        out_of_screen = moving & (
+            self.enemy_alive & ((self.enemy_x < 0) | (self.enemy_x + ew > WIDTH))
+        ).any(axis=1)
+        origin_y = self.enemy_y[out_of_screen, 0]
+        shift = round_half_away(origin_y + eh // 2 + HEIGHT * 0.02) - eh // 2 - origin_y
+        self.enemy_y[out_of_screen] += shift[:, None]
+        self.enemy_direction[out_of_screen] *= -1
+        # Exit game if enemy makes it to the bottom
+        terminated = self.enemy_height >= HEIGHT
+        # Shoot new laser once old one is removed from screen
+        for game in np.flatnonzero(~self.enemy_laser_active):
+            chosen_enemy = np_randoms[game].choice(
+                np.flatnonzero(self.enemy_alive[game])
+            )
+            self.enemy_laser_active[game] = True
+            self.enemy_laser_x[game] = self.enemy_x[game, chosen_enemy] + ew // 2
+            self.enemy_laser_y[game] = self.enemy_y[game, chosen_enemy] + eh
+        # Check if player has no lives left
+        terminated |= self.lives <= 0
+        self.game_time += 1
+        return enemy_hit, player_hit, terminated
+
+    def _move_laser(self, laser_y: np.ndarray, direction: str, dt) -> np.ndarray:
+        """Move lasers vertically like Laser.update does with their centery."""
+
+        half_height = self.laser_size[1] // 2
+        delta = Laser.directions[direction] * LASER_BASE_SPEED * dt
+        return round_half_away(laser_y + half_height + delta) - half_height
+
+    def _laser_on_screen(self, laser_y: np.ndarray) -> np.ndarray:
+        return (laser_y + self.laser_size[1] >= 0) & (laser_y <= HEIGHT)
+
+    def _sweep_lasers(
+        self,
+        active: np.ndarray,
+        laser_x: np.ndarray,
+        laser_y: np.ndarray,
+        start_y: np.ndarray,
+        direction: str,
+    ) -> None:
+        """
+        Move the active lasers back to the first position of their path from
+        start_y at which they overlap a blockade, an enemy (lasers moving up)
+        or the player (lasers moving down), like
+        GameObjectController._sweep_lasers.
+        """
+        lw, lh = self.laser_size
+        top = np.minimum(start_y, laser_y)
+        height = np.abs(laser_y - start_y) + lh
+        for game in np.flatnonzero(active):
+            x, y, h = int(laser_x[game]), int(top[game]), int(height[game])
+            spans = [
+                grid.block_span(self.blockade_alive[game, structure], x, y, lw, h)
+                for structure, grid in enumerate(self._structure_grids)
+            ]
+            if direction == "up":
+                spans.append(self._enemy_span(game, x, y, lw, h))
+            else:
+                spans.append(self._player_span(game, x, y, lw, h))
+            spans = [span for span in spans if span is not None]
+            if spans:
+                laser_y[game] = sweep_contact(
+                    start_y[game],
+                    lh,
+                    Laser.directions[direction],
+                    min(top for top, _ in spans),
+                    max(bottom for _, bottom in spans),
+                )
+
+    def _enemy_span(
+        self, game: int, x: int, y: int, w: int, h: int
+    ) -> Optional[tuple[int, int]]:
+        """The vertical extent of the living enemies that overlap a rectangle."""
+
+        ew, eh = self.enemy_size
+        enemy_y = self.enemy_y[game]
+        hits = self.enemy_alive[game] & collide(
+            x, y, w, h, self.enemy_x[game], enemy_y, ew, eh
+        )
+        if not hits.any():
+            return None
+        return int(enemy_y[hits].min()), int(enemy_y[hits].max()) + eh
+
+    def _player_span(
+        self, game: int, x: int, y: int, w: int, h: int
+    ) -> Optional[tuple[int, int]]:
+        """The vertical extent of the player if it overlaps a rectangle."""
+
+        pw, ph = self.player_size
+        if collide(x, y, w, h, self.player_x[game], self.player_y, pw, ph):
+            return self.player_y, self.player_y + ph
+        return None
+
+    def _check_blockade_hit(
+        self, active: np.ndarray, laser_x: np.ndarray, laser_y: np.ndarray
+    ) -> None:
+        """
+        Remove all blocks hit by the active lasers at the specified positions and
+        deactivate these lasers. Only the cells of the blockade structures that a
+        laser overlaps are tested.
+        """
+
+        if not active.any():
+            return
+        lw, lh = self.laser_size
+        # Cell ranges of every laser in every structure, shaped (games, structures)
+        first_col, last_col, first_row, last_row = self.blockade_grid.overlapping_cells(
+            laser_x[:, None], laser_y[:, None], lw, lh
+        )
+        cols = first_col[..., None] + np.arange(self._laser_cell_span[0])
+        rows = first_row[..., None] + np.arange(self._laser_cell_span[1])
+        valid_cols = cols < last_col[..., None]
+        valid_rows = rows < last_row[..., None]
+        games, structures, cols, rows = np.broadcast_arrays(
+            np.arange(self.num_games)[:, None, None, None],
+            np.arange(self.blockade_alive.shape[1])[None, :, None, None],
+            np.minimum(cols, self.blockade_template.shape[0] - 1)[..., None],
+            np.minimum(rows, self.blockade_template.shape[1] - 1)[..., None, :],
+        )
+        hits = (
+            active[:, None, None, None]
+            & valid_cols[..., None]
+            & valid_rows[..., None, :]
+            & self.blockade_alive[games, structures, cols, rows]
+        )
+        if not hits.any():
+            return
+        self._own_blockades()[
+            games[hits], structures[hits], cols[hits], rows[hits]
+        ] = False
+        active &= ~hits.any(axis=(1, 2, 3))
+
+    def object_positions(
+        self, game: int = 0
+    ) -> list[tuple[str, np.ndarray, np.ndarray]]:
+        """
+        Return the kind and the top left positions of all visible objects of the
+        specified game in the order in which they are drawn.
+        """
+
+        positions = [
+            ("player", self.player_x[game : game + 1], np.array([self.player_y])),
+            (
+                "enemy",
+                self.enemy_x[game, self.enemy_alive[game]],
+                self.enemy_y[game, self.enemy_alive[game]],
+            ),
+        ]
+        for active, laser_x, laser_y in (
+            (self.player_laser_active, self.player_laser_x, self.player_laser_y),
+            (self.enemy_laser_active, self.enemy_laser_x, self.enemy_laser_y),
+        ):
+            if active[game]:
+                positions.append(
+                    ("laser", laser_x[game : game + 1], laser_y[game : game + 1])
+                )
+        structures, cols, rows = np.nonzero(self.blockade_alive[game])
+        positions.append(
+            (
+                "blockade",
+                self.blockade_grid.origin[0][structures] + cols * self.block_len,
+                self.blockade_grid.origin[1][structures] + rows * self.block_len,
+            )
+        )
+        return positions
+
+    def draw(self, surf: pygame.Surface, game: int = 0) -> None:
+        """Draw all visible objects of the specified game on the surface."""
+
+        images = {
+            "player": self.player_im,
+            "enemy": self.enemy_im,
+            "laser": self.laser_im,
+            "blockade": self.blockade_im,
+        }
+        surf.blits(
+            [
+                (images[key], position)
+                for key, xs, ys in self.object_positions(game)
+                for position in zip(xs.tolist(), ys.tolist())
+            ],
+            doreturn=False,
+        )
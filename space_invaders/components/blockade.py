@@ -1,15 +1,42 @@
-from typing import Iterable
+from typing import Any, Optional
 from space_invaders.components.base_objects import BaseObject
+from space_invaders.components.resources import get_config
+import functools
+import numpy as np
 import pygame
-import yaml
 
-with open("space_invaders/config.yaml", "r") as file:
-    config = yaml.safe_load(file)
+config = get_config()
 
 WIDTH = config["WIDTH"]
 HEIGHT = config["HEIGHT"]
 
 
+@functools.cache
+def u_shape_template(
+    num_of_blocks_x: int = 20, num_of_blocks_y: int = 15
+) -> np.ndarray:
+    """
+    Return the read-only mask of the blocks of one blockade structure shaped
+    like an upside down U, indexed by (column, row) from the top left.
+    """
+
+    # Rows are counted from the bottom while the shape is carved out
+    template = np.ones((num_of_blocks_x, num_of_blocks_y), dtype=bool)
+    template[2, num_of_blocks_y - 1] = False
+    template[num_of_blocks_x - 3, num_of_blocks_y - 1] = False
+    template[0, num_of_blocks_y - 3] = False
+    template[num_of_blocks_x - 1, num_of_blocks_y - 3] = False
+    template[num_of_blocks_x - 2 :, num_of_blocks_y - 2 :] = False
+    template[:2, num_of_blocks_y - 2 :] = False
+    template[4 : num_of_blocks_x - 4, :6] = False
+    template[5 : num_of_blocks_x - 5, 6] = False
+    template[6 : num_of_blocks_x - 6, 7] = False
+    template[7 : num_of_blocks_x - 7, 8] = False
+    template = np.ascontiguousarray(template[:, ::-1])
+    template.flags.writeable = False
+    return template
+
+
 class Blockade(BaseObject):
     """Simple class for bloackade pieces that provide the player with cover from enemy shots ."""
 
@@ -17,11 +44,182 @@ class Blockade(BaseObject):
         super().__init__(image, initial_pos)
 
 
+class BlockadeGrid:
+    """
+    Uniform grid of square cells with the size of one Blockade object. The
+    blocks of a blockade structure are aligned with the cells of its grid, so a
+    rectangle only has to be tested against the cells that it overlaps.
+
+    Attributes
+    ----------
+    origin : tuple[Any, Any]
+        The pixel position of the top left edge of the cell (0, 0). May also be
+        a pair of NumPy arrays to describe the grids of several structures.
+    block_len : int
+        The side length of one cell.
+    shape : tuple[int, int], optional
+        The number of cells in x- and y-direction. If specified, cell indices
+        are clipped to the grid, otherwise the grid is unbounded.
+    """
+
+    def __init__(
+        self,
+        origin: tuple[Any, Any],
+        block_len: int,
+        shape: Optional[tuple[int, int]] = None,
+    ) -> None:
+        self.origin = origin
+        self.block_len = block_len
+        self.shape = shape
+
+    def overlapping_cells(self, x: Any, y: Any, w: Any, h: Any) -> tuple[Any, ...]:
+        """
+        Return the cell ranges [first column, last column) and [first row, last
+        row) that a rectangle overlaps. Works for integers and NumPy arrays.
+        """
+
+        first_col = (x - self.origin[0]) // self.block_len
+        first_row = (y - self.origin[1]) // self.block_len
+        # Ceiling division, cells that only touch the rectangle are excluded
+        last_col = -((self.origin[0] - x - w) // self.block_len)
+        last_row = -((self.origin[1] - y - h) // self.block_len)
+        if self.shape is not None:
+            first_col, last_col = np.clip([first_col, last_col], 0, self.shape[0])
+            first_row, last_row = np.clip([first_row, last_row], 0, self.shape[1])
+        return first_col, last_col, first_row, last_row
+
+    def block_span(
+        self, mask: np.ndarray, x: int, y: int, w: int, h: int
+    ) -> Optional[tuple[int, int]]:
+        """
+        Return the top edge of the highest and the bottom edge of the lowest
+        block of the mask that a rectangle overlaps, or None if it overlaps no
+        block. Only for the grid of a single structure.
+        """
+        first_col, last_col, first_row, last_row = self.overlapping_cells(x, y, w, h)
+        rows = np.flatnonzero(mask[first_col:last_col, first_row:last_row].any(axis=0))
+        if not len(rows):
+            return None
+        top = self.origin[1] + (first_row + int(rows[0])) * self.block_len
+        bottom = self.origin[1] + (first_row + int(rows[-1]) + 1) * self.block_len
+        return top, bottom
+
+
+class BlockadeStructure(BaseObject):
+    """
+    One large blockade structure made out of square blocks. The blocks are
+    stored as a boolean mask and drawn as one pre-rendered image. Hit blocks are
+    removed by clearing their cells in the mask and in the image.
+
+    Attributes
+    ----------
+    mask : np.ndarray
+        Mask of the blocks that have not been destroyed yet, indexed by
+        (column, row) from the top left edge of the structure.
+    grid : BlockadeGrid
+        The grid of the cells of the structure.
+    """
+
+    def __init__(
+        self, image: pygame.Surface, initial_pos: tuple, mask: np.ndarray
+    ) -> None:
+        super().__init__(image, initial_pos)
+        self.mask = mask
+        self.grid = BlockadeGrid(
+            self.rect.topleft, self.rect.width // mask.shape[0], mask.shape
+        )
+
+    @staticmethod
+    def render(block_im: pygame.Surface, mask: np.ndarray) -> pygame.Surface:
+        """Render the image of a structure with a block at every cell of the mask."""
+
+        block_len = block_im.get_rect().width
+        image = pygame.Surface(
+            (mask.shape[0] * block_len, mask.shape[1] * block_len), pygame.SRCALPHA
+        )
+        image.blits(
+            [
+                (block_im, (col * block_len, row * block_len))
+                for col, row in zip(*np.nonzero(mask))
+            ],
+            doreturn=False,
+        )
+        return image
+
+    def hit(self, rect: pygame.Rect) -> bool:
+        """
+        Remove all blocks that collide with the rectangle and return wether any
+        block was hit.
+        """
+
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        first_col, last_col, first_row, last_row = self.grid.overlapping_cells(
+            rect.x, rect.y, rect.width, rect.height
+        )
+        cells = self.mask[first_col:last_col, first_row:last_row]
+        if not cells.any():
+            return False
+        block_len = self.grid.block_len
+        for col, row in zip(*np.nonzero(cells)):
+            self.image.fill(
+                (0, 0, 0, 0),
+                (
+                    (first_col + col) * block_len,
+                    (first_row + row) * block_len,
+                    block_len,
+                    block_len,
+                ),
+            )
+        cells[...] = False
+        return True
+
+    def block_positions(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the top left positions of all remaining blocks."""
+
+        cols, rows = np.nonzero(self.mask)
+        return (
+            self.rect.x + cols * self.grid.block_len,
+            self.rect.y + rows * self.grid.block_len,
+        )
+
+
 class BlockadeGroup(pygame.sprite.Group):
-    """Group for all Blockade objects."""
+    """Group for all BlockadeStructure objects."""
+
+    def hit(self, rect: pygame.Rect) -> bool:
+        """
+        Remove the blocks of all structures that collide with the rectangle and
+        return wether any block was hit.
+        """
+
+        is_hit = False
+        for structure in self.sprites():
+            if structure.rect.colliderect(rect):
+                is_hit |= structure.hit(rect)
+        return is_hit
+
+    def block_span(self, rect: pygame.Rect) -> Optional[tuple[int, int]]:
+        """
+        Return the top edge of the highest and the bottom edge of the lowest
+        block of all structures that the rectangle overlaps, or None if it
+        overlaps no block.
+        """
+        spans = [
+            structure.grid.block_span(structure.mask, *rect)
+            for structure in self.sprites()
+            if structure.rect.colliderect(rect)
+        ]
+        spans = [span for span in spans if span is not None]
+        if not spans:
+            return None
+        return min(top for top, _ in spans), max(bottom for _, bottom in spans)
 
-    def __init__(self) -> None:
-        super().__init__()
+    def block_positions(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the top left positions of the remaining blocks of all structures."""
 
-    def add(self, *sprites: Blockade | Iterable[Blockade]) -> None:
-        return super().add(*sprites)
+        positions = [structure.block_positions() for structure in self.sprites()]
+        if not positions:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        xs, ys = zip(*positions)
+        return np.concatenate(xs), np.concatenate(ys)
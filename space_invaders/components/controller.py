@@ -1,22 +1,20 @@
 from dataclasses import dataclass
+from space_invaders.components.formation import EnemyFormation
+from space_invaders.components.level import LevelGenerator
 from space_invaders.components.objects import Enemy
-from space_invaders.components.laser import Laser
-from space_invaders.components.blockade import Blockade, BlockadeGroup
+from space_invaders.components.laser import Laser, sweep_contact
+from space_invaders.components.blockade import (
+    BlockadeGroup,
+    BlockadeStructure,
+    u_shape_template,
+)
 from space_invaders.components.player import Player
-from typing import Any, Optional
+from space_invaders.components.resources import get_assets, get_config
+from typing import Optional
+import numpy as np
 import pygame
-import random
-import yaml
 from typing import Iterable
 import pygame
-import yaml
-
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
 
 config = get_config()
 WIDTH = config["WIDTH"]
@@ -24,25 +22,57 @@ HEIGHT = config["HEIGHT"]
 ENEMY_BASE_SPEED = config["ENEMY_BASE_SPEED"]
 LASER_BASE_SPEED = config["LASER_BASE_SPEED"]
 BACKGROUND = config["BACKGROUND"]
-laser_im = pygame.image.load("space_invaders/assets/laser.png")
-laser_im = pygame.transform.scale(laser_im, (0.005 * WIDTH, 0.01 * HEIGHT))
+
+
+def drawn_rects(group: pygame.sprite.AbstractGroup) -> list[pygame.Rect]:
+    """
+    Return the areas that the sprites of a group covered when they were last
+    drawn, including the areas of removed sprites that were not cleared yet.
+    """
+
+    return [*group.lostsprites, *filter(None, group.spritedict.values())]
 
 
 class LaserController(pygame.sprite.GroupSingle):
-    """Class for handling Laser objects."""
+    """
+    Class for handling Laser objects.
+
+    Attributes
+    ----------
+    laser_direction : str
+        The direction the lasers move in, "up" or "down".
+    swept : bool, default=False
+        If True, collisions of the lasers are tested against the whole path
+        they covered during a tick (see GameObjectController._sweep_lasers)
+        instead of only at their new position, so fast lasers cannot tunnel
+        through thin targets. Lasers that left the screen are only removed
+        once their path was tested.
+    """
 
-    def __init__(self, laser_direction: str) -> None:
+    def __init__(self, laser_direction: str, swept: bool = False) -> None:
         super().__init__()
         self.laser_direction = laser_direction
+        self.swept = swept
 
     def move_laser(self, dt) -> None:
-        self.update(direction=self.laser_direction, dt=dt)
+        if not self.swept:
+            self.update(direction=self.laser_direction, dt=dt)
+            return
+        for laser in self.sprites():
+            laser.move(self.laser_direction, dt)
 
 
 class EnemyController(pygame.sprite.Group):
     """
     A controller class that manages all enemies in the game.
 
+    Enemies with a formation index, i.e. all enemies created by the
+    LevelGenerator, join the rigid formation of the controller when they are
+    added and leave it when they are killed. The formation moves them with
+    single position updates and answers the edge and bottom queries from its
+    living columns and rows. Enemies without a formation index are moved one
+    by one.
+
     Attributes
     ----------
     laser_controller : LaserController, default=lasercontroller
@@ -51,44 +81,87 @@ class EnemyController(pygame.sprite.Group):
         The current speed of all enemy instances.
     is_blocked : bool, default=True
         Indicates wether enemies can move (False) or not (True).
+    np_random : np.random.Generator
+        The random number generator that chooses the enemy that shoots next.
+        Games are reproducible if it is seeded, e.g. by the game handler.
+    formation : EnemyFormation or None
+        The formation of the enemies, created when the first enemy with a
+        formation index is added.
     """
 
     def __init__(self, lasercontroller: LaserController) -> None:
+        # Enemies that are not part of the formation
+        self.loose_enemies: dict[Enemy, None] = {}
+        self.formation: Optional[EnemyFormation] = None
         super().__init__()
         self.laser_controller = lasercontroller
         self.current_enemy_speed = ENEMY_BASE_SPEED
         self.is_blocked = True
+        self.np_random = np.random.default_rng()
+
+    def add_internal(self, sprite, layer=None) -> None:
+        super().add_internal(sprite, layer)
+        if getattr(sprite, "formation_index", None) is None:
+            self.loose_enemies[sprite] = None
+            return
+        if self.formation is None:
+            self.formation = EnemyFormation(
+                LevelGenerator.formation_offsets(sprite.rect.height),
+                LevelGenerator.formation_shape,
+                sprite.rect.size,
+            )
+        self.formation.add(sprite)
+
+    def remove_internal(self, sprite) -> None:
+        super().remove_internal(sprite)
+        if sprite in self.loose_enemies:
+            del self.loose_enemies[sprite]
+        elif self.formation is not None:
+            self.formation.remove(sprite)
 
     @property
     def enemy_height(self):
         """Get the y-position of the lowest enemy in the game."""
 
-        return max(map(lambda enemy: enemy.rect.bottom, self.sprites()))
+        bottoms = [enemy.rect.bottom for enemy in self.loose_enemies]
+        if self.formation:
+            bottoms.append(self.formation.bottom)
+        return max(bottoms)
 
     def set_enemy_speed(self, new_speed) -> None:
         """Set the speed for all controlled enemy objects."""
 
         self.current_enemy_speed = new_speed
-        for enemy in self.sprites():
+        for enemy in self.loose_enemies:
             enemy.speed = self.current_enemy_speed
 
     def move_enemies(self, dt) -> None:
-        self.update(dt=dt)
+        if self.formation:
+            dx = self.formation.direction * self.current_enemy_speed * dt
+            self.formation.move(dx)
+        for enemy in self.loose_enemies:
+            enemy.update(dt=dt)
 
     def move_enemies_row_down(self) -> None:
-        for enemy in self.sprites():
+        if self.formation:
+            self.formation.move_down(HEIGHT * 0.02)
+        for enemy in self.loose_enemies:
             enemy.move_row_down()
 
     def switch_movement_direction(self) -> None:
-        for enemy in self.sprites():
+        if self.formation:
+            self.formation.direction *= -1
+        for enemy in self.loose_enemies:
             enemy.switch_movement_direction()
 
     def choose_random_enemy(self) -> Enemy:
-        chosen_enemy = random.choice(self.sprites())
+        chosen_enemy = self.np_random.choice(self.sprites())
         return chosen_enemy
 
     def enemy_is_out_of_screen(self) -> bool:
-        for enemy in self.sprites():
+        if self.formation and (self.formation.left < 0 or self.formation.right > WIDTH):
+            return True
+        for enemy in self.loose_enemies:
             if enemy.rect.left < 0:
                 return True
             if enemy.rect.right > WIDTH:
@@ -97,12 +170,15 @@ class EnemyController(pygame.sprite.Group):
 
     def shoot_laser(self, enemy: Enemy) -> None:
         self.laser_controller.add(
-            Laser(laser_im, enemy.rect.midbottom, LASER_BASE_SPEED)
+            Laser(get_assets().laser_im, enemy.rect.midbottom, LASER_BASE_SPEED)
         )
 
 
 class BlockadeController:
-    """Controller for all Blockade objects."""
+    """
+    Controller for all blockade structures. The shape of a structure and its
+    image are created once and copied whenever the structures are rebuilt.
+    """
 
     def __init__(
         self,
@@ -112,92 +188,117 @@ class BlockadeController:
         self.blockade_group = blockade_group
         self.blockade_im = blockade_im
         self.block_len = self.blockade_im.get_rect().width
+        self.template = u_shape_template()
+        self.structure_im = BlockadeStructure.render(blockade_im, self.template)
 
-    def create_all_blockade_structures(self) -> None:
-        """Creates 4 evenly spaced blockade structures."""
+    def structure_positions(self) -> list[tuple[int, int]]:
+        """Return the bottom left edge positions of the 4 blockade structures."""
 
-        bottom_left_edge_positions = [
+        return [
             (
                 int(i * 0.7 * WIDTH / 3 + 0.15 * WIDTH - 10 * self.block_len),
                 int(0.8 * HEIGHT),
             )
             for i in range(4)
         ]
-        for pos in bottom_left_edge_positions:
+
+    def blockade_positions(self) -> list[tuple[int, int]]:
+        """
+        Return the positions of all blocks of the 4 blockade structures in the
+        order in which they are created.
+        """
+
+        positions = []
+        for pos in self.structure_positions():
+            positions.extend(self.blockade_structure_positions(pos))
+        return positions
+
+    def create_all_blockade_structures(self) -> None:
+        """Creates 4 evenly spaced blockade structures."""
+
+        for pos in self.structure_positions():
             self.blockade_group.add(
-                *self.create_blockade_structure(
+                self.create_blockade_structure(
                     bottom_left_edge_pos=pos,
                     blockade_im=self.blockade_im,
                 )
             )
 
+    def blockade_structure_positions(
+        self, bottom_left_edge_pos: tuple[int, int]
+    ) -> list[tuple[int, int]]:
+        """
+        Collect the positions of the blocks of one large blockade structure
+        shaped like an upside down U.
+
+        Parameters
+        ----------
+        bottom_left_edge_pos: tuple[int, int]
+            The pixel position of the bottom left edge of the structure.
+        """
+
+        num_of_blocks_y = self.template.shape[1]
+        return [
+            (
+                bottom_left_edge_pos[0] + self.block_len * i,
+                bottom_left_edge_pos[1] - self.block_len * j,
+            )
+            for i in range(self.template.shape[0])
+            for j in range(num_of_blocks_y)
+            if self.template[i, num_of_blocks_y - 1 - j]
+        ]
+
     def create_blockade_structure(
         self,
         bottom_left_edge_pos: tuple[int, int],
         blockade_im: pygame.surface.Surface,
-    ) -> Iterable[Blockade]:
+    ) -> BlockadeStructure:
         """
         Create one large blockade structure shaped like an upside down U made
-        out of connected Blockade objects.
+        out of connected square blocks.
 
         Parameters
         ----------
         bottom_left_edge_pos: tuple[int, int]
             The pixel position of the bottom left edge of the structure.
         blockade_im: pygame.surface.Surface
-            The image of each Blockade square.
+            The image of each square block.
         """
 
-        positions = []
-        num_of_blocks_x = 20
-        num_of_blocks_y = 15
-        # Collect blockade positions for one blockade structure
-        for i in range(0, num_of_blocks_x):
-            for j in range(0, num_of_blocks_y):
-                if i == 2 and j == num_of_blocks_y - 1:
-                    continue
-                if i == num_of_blocks_x - 3 and j == num_of_blocks_y - 1:
-                    continue
-                if i == 0 and j == num_of_blocks_y - 3:
-                    continue
-                if i == num_of_blocks_x - 1 and j == num_of_blocks_y - 3:
-                    continue
-                if i in range(num_of_blocks_x - 2, num_of_blocks_x) and j in range(
-                    num_of_blocks_y - 2, num_of_blocks_y
-                ):
-                    continue
-                if i in range(0, 2) and j in range(
-                    num_of_blocks_y - 2, num_of_blocks_y
-                ):
-                    continue
-                if i in range(4, num_of_blocks_x - 4) and j in range(0, 5):
-                    continue
-                if i in range(4, num_of_blocks_x - 4) and j == 5:
-                    continue
-                if i in range(5, num_of_blocks_x - 5) and j == 6:
-                    continue
-                if i in range(6, num_of_blocks_x - 6) and j == 7:
-                    continue
-                if i in range(7, num_of_blocks_x - 7) and j == 8:
-                    continue
-                x, y = (
-                    bottom_left_edge_pos[0] + self.block_len * i,
-                    bottom_left_edge_pos[1] - self.block_len * j,
-                )
-                positions.append((x, y))
-        # Carve out pieces of square
-        blockades = [Blockade(blockade_im, position) for position in positions]
-        return blockades
+        if blockade_im is self.blockade_im:
+            structure_im = self.structure_im.copy()
+        else:
+            structure_im = BlockadeStructure.render(blockade_im, self.template)
+        top_left_edge_pos = (
+            bottom_left_edge_pos[0],
+            bottom_left_edge_pos[1] - self.block_len * (self.template.shape[1] - 1),
+        )
+        return BlockadeStructure(structure_im, top_left_edge_pos, self.template.copy())
 
     def draw(self, *args, **kwargs) -> list[pygame.Rect]:
-        """Draw all blockade objects."""
+        """Draw all blockade structures."""
 
         return self.blockade_group.draw(*args, **kwargs)
 
-    def remove(self, *bloackades: Blockade | Iterable[Blockade]) -> None:
-        """Remove blockade objects."""
+    def set_masks(self, masks: np.ndarray) -> None:
+        """
+        Replace the remaining blocks of all structures in the order in which they
+        were created and render the images of the structures that changed.
+        """
+
+        for structure, mask in zip(self.blockade_group.sprites(), masks):
+            if not np.array_equal(structure.mask, mask):
+                structure.mask[...] = mask
+                structure.image = BlockadeStructure.render(
+                    self.blockade_im, structure.mask
+                )
+
+    def remove(
+        self, *structures: BlockadeStructure | Iterable[BlockadeStructure]
+    ) -> None:
+        """Remove blockade structures."""
 
-        return self.blockade_group.remove(*bloackades)
+        return self.blockade_group.remove(*structures)
 
 
 @dataclass
@@ -223,27 +324,74 @@ class GameObjectController:
     def screen(self) -> pygame.Surface:
         return pygame.display.get_surface()
 
-    def _clear_all_objects(self, surf: pygame.Surface | None = None) -> None:
-        """Helper method that clears all visible objects from specified surface."""
+    @property
+    def _sprite_groups(self) -> tuple[pygame.sprite.AbstractGroup, ...]:
+        """The groups of all visible objects except the player in drawing order."""
+
+        return (
+            self.enemy_controller,
+            self.player.laser_controller,
+            self.enemy_controller.laser_controller,
+            self.blockade_controller.blockade_group,
+        )
 
+    def _clear_all_objects(
+        self, surf: pygame.Surface | None = None
+    ) -> list[pygame.Rect]:
+        """
+        Helper method that clears all visible objects from specified surface.
+        Returns the cleared areas.
+        """
         if surf is None:
             surf = self.screen
-        self.enemy_controller.clear(surf, self._clear_callback)
-        self.enemy_controller.laser_controller.clear(surf, self._clear_callback)
-        self.player.laser_controller.clear(surf, self._clear_callback)
-        self.blockade_controller.blockade_group.clear(surf, self._clear_callback)
+        dirty_rects = []
+        for group in self._sprite_groups:
+            dirty_rects.extend(drawn_rects(group))
+            group.clear(surf, self._clear_callback)
+        dirty_rects.append(self.player.rect.copy())
         self._clear_callback(surf, self.player.rect)
+        return dirty_rects
 
-    def _draw_all_objects(self, surf: pygame.Surface | None = None) -> None:
-        """Helper method that draws all visible objects on specified surface."""
-
+    def _draw_all_objects(
+        self, surf: pygame.Surface | None = None
+    ) -> list[pygame.Rect]:
+        """
+        Helper method that draws all visible objects on specified surface.
+        Returns the areas that were drawn.
+        """
         if surf is None:
             surf = self.screen
-        surf.blit(self.player.image, self.player.rect)
-        self.enemy_controller.draw(surf)
-        self.player.laser_controller.draw(surf)
-        self.enemy_controller.laser_controller.draw(surf)
-        self.blockade_controller.draw(surf)
+        dirty_rects = [surf.blit(self.player.image, self.player.rect)]
+        for group in self._sprite_groups:
+            group.draw(surf)
+            dirty_rects.extend(drawn_rects(group))
+        return dirty_rects
+
+    def object_positions(self) -> list[tuple[str, np.ndarray, np.ndarray]]:
+        """
+        Return the kind and the top left positions of all visible objects in
+        the order in which they are drawn.
+        """
+
+        positions = []
+        for key, sprites in (
+            ("player", [self.player]),
+            ("enemy", self.enemy_controller),
+            ("laser", self.player.laser_controller),
+            ("laser", self.enemy_controller.laser_controller),
+        ):
+            rects = [sprite.rect for sprite in sprites]
+            positions.append(
+                (
+                    key,
+                    np.array([rect.x for rect in rects], dtype=np.int64),
+                    np.array([rect.y for rect in rects], dtype=np.int64),
+                )
+            )
+        positions.append(
+            ("blockade", *self.blockade_controller.blockade_group.block_positions())
+        )
+        return positions
 
     def _clear_callback(self, surf, rect):
         """Helper function to blit background onto specified position."""
@@ -260,17 +408,122 @@ class GameObjectController:
             return True
         return False
 
-    def _check_enemy_hit(self) -> bool:
-        """Helper method that checks if an enemy is hit by laser and removes enemy if it was."""
+    def _check_enemy_hit(self) -> list[Optional[tuple[int, int]]]:
+        """
+        Helper method that checks if an enemy is hit by laser and removes both
+        laser and enemy if it was. A laser is only tested against the cells of
+        the formation it overlaps instead of against every enemy, with the
+        same results as pygame.sprite.groupcollide.
+
+        Returns
+        -------
+        list[tuple[int, int] or None]
+            The (column, row) in the formation of every killed enemy, or None
+            for a killed enemy that is not part of the formation. The list is
+            empty if no enemy was hit.
+        """
+        hits: list[Optional[tuple[int, int]]] = []
+        formation = self.enemy_controller.formation
+        for laser in self.player.laser_controller.sprites():
+            hit_enemies = []
+            if formation:
+                hit_enemies = [
+                    formation.enemies[k] for k in formation.overlapping(laser.rect)
+                ]
+            if self.enemy_controller.loose_enemies:
+                hit_enemies += pygame.sprite.spritecollide(
+                    laser, self.enemy_controller.loose_enemies, dokill=False
+                )
+            if not hit_enemies:
+                continue
+            for enemy in hit_enemies:
+                if enemy.formation is None:
+                    hits.append(None)
+                else:
+                    hits.append(divmod(enemy.formation_index, enemy.formation.shape[1]))
+                enemy.kill()
+            laser.kill()
+        return hits
 
-        if pygame.sprite.groupcollide(
-            self.player.laser_controller,
-            self.enemy_controller,
-            dokilla=True,
-            dokillb=True,
+    def _sweep_lasers(self) -> None:
+        """
+        Helper method for swept collisions. Every laser of a swept laser
+        controller is moved back to the first position of its path during the
+        tick at which it overlaps a blockade, an enemy (lasers of the player)
+        or the player (lasers of the enemies), so that the collision checks at
+        the position of the laser find the targets it passed through. Lasers
+        that touch nothing and left the screen are removed.
+        """
+        for laser_controller, target_span in (
+            (self.enemy_controller.laser_controller, self._player_span),
+            (self.player.laser_controller, self._enemy_span),
         ):
-            return True
-        return False
+            if not laser_controller.swept:
+                continue
+            direction = Laser.directions[laser_controller.laser_direction]
+            for laser in laser_controller.sprites():
+                start = laser.rect.move(0, laser.sweep_start - laser.rect.y)
+                sweep = laser.rect.union(start)
+                spans = [
+                    span
+                    for span in (
+                        self.blockade_controller.blockade_group.block_span(sweep),
+                        target_span(sweep),
+                    )
+                    if span is not None
+                ]
+                if spans:
+                    laser.rect.y = int(
+                        sweep_contact(
+                            laser.sweep_start,
+                            laser.rect.height,
+                            direction,
+                            min(top for top, _ in spans),
+                            max(bottom for _, bottom in spans),
+                        )
+                    )
+                elif laser._is_out_of_screen():
+                    laser.kill()
+
+    def _player_span(self, rect: pygame.Rect) -> Optional[tuple[int, int]]:
+        """The vertical extent of the player if it overlaps the rectangle."""
+
+        if self.player.rect.colliderect(rect):
+            return self.player.rect.top, self.player.rect.bottom
+        return None
+
+    def _enemy_span(self, rect: pygame.Rect) -> Optional[tuple[int, int]]:
+        """The vertical extent of the living enemies that overlap the rectangle."""
+
+        spans = [
+            (enemy.rect.top, enemy.rect.bottom)
+            for enemy in self.enemy_controller.loose_enemies
+            if enemy.rect.colliderect(rect)
+        ]
+        formation = self.enemy_controller.formation
+        if formation:
+            rows = [k % formation.shape[1] for k in formation.overlapping(rect)]
+            if rows:
+                spans.append(
+                    (
+                        formation.y + formation.row_offsets[min(rows)],
+                        formation.y + formation.row_ends[max(rows)],
+                    )
+                )
+        if not spans:
+            return None
+        return min(top for top, _ in spans), max(bottom for _, bottom in spans)
+
+    def _check_blockade_hit(self, laser_controller: LaserController) -> None:
+        """
+        Helper function that checks if a blockade is hit by a laser of the
+        specified controller and removes both laser and blockade if it was. Only
+        the cells of the blockade structures that the laser overlaps are tested.
+        """
+
+        for laser in laser_controller.sprites():
+            if self.blockade_controller.blockade_group.hit(laser.rect):
+                laser.kill()
 
     def _check_blockade_hit_by_enemy_laser(self) -> None:
         """
@@ -278,12 +531,7 @@ class GameObjectController:
         and removes both laser and blockade if it was.
         """
 
-        pygame.sprite.groupcollide(
-            self.enemy_controller.laser_controller,
-            self.blockade_controller.blockade_group,
-            dokilla=True,
-            dokillb=True,
-        )
+        self._check_blockade_hit(self.enemy_controller.laser_controller)
 
     def _check_blockade_hit_by_player_laser(self) -> None:
         """
@@ -291,9 +539,4 @@ class GameObjectController:
         and removes both laser and blockade if it was.
         """
 
-        pygame.sprite.groupcollide(
-            self.player.laser_controller,
-            self.blockade_controller.blockade_group,
-            dokilla=True,
-            dokillb=True,
-        )
+        self._check_blockade_hit(self.player.laser_controller)
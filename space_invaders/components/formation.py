@@ -0,0 +1,207 @@
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Any, Optional
+import numpy as np
+
+if TYPE_CHECKING:
+    from space_invaders.components.objects import Enemy
+
+
+def round_half_away(values: Any) -> np.ndarray:
+    """
+    Round values the same way pygame does when a float is assigned to a
+    coordinate of a pygame.Rect (round half away from zero).
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    truncated = np.trunc(values)
+    return np.where(
+        np.abs(values - truncated) == 0.5,
+        truncated + np.sign(values),
+        np.rint(values),
+    ).astype(np.int64)
+
+
+class EnemyFormation:
+    """
+    Rigid formation of the enemies of a level. All enemies of a level move
+    together, so their positions are stored as the position of the formation
+    plus a fixed offset per enemy, and a move is a single update of the
+    formation position. The formation keeps the number of living enemies per
+    column and row, from which the outermost living columns and the lowest
+    living row, and with them the edges of the formation, are known without
+    looking at any enemy.
+
+    Enemy k of the formation sits in column k // num_rows and row
+    k % num_rows, like the enemies created by LevelGenerator.
+
+    Parameters
+    ----------
+    offsets : np.ndarray
+        The offsets of the top left edges of all enemies to the formation
+        position, shaped (num_enemies, 2).
+    shape : tuple[int, int]
+        The number of columns and rows of the formation.
+    enemy_size : tuple[int, int]
+        The width and height of one enemy.
+
+    Attributes
+    ----------
+    x, y : int
+        The top left edge of the formation, which is the position of enemy 0,
+        even if it was killed.
+    direction : int
+        The horizontal movement direction (-1 or 1) of all enemies.
+    moves : int
+        The number of position changes, which enemies use to notice that their
+        rect is outdated.
+    alive : np.ndarray
+        Mask of the living enemies, shaped (num_columns, num_rows).
+    enemies : list[Enemy or None]
+        The living enemies by formation index.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        shape: tuple[int, int],
+        enemy_size: tuple[int, int],
+    ) -> None:
+        self.shape = shape
+        self.enemy_size = enemy_size
+        # Plain integers are faster to add than NumPy scalars
+        self.offsets = [tuple(offset) for offset in np.asarray(offsets).tolist()]
+        self.column_offsets = [self.offsets[i * shape[1]][0] for i in range(shape[0])]
+        self.row_offsets = [self.offsets[j][1] for j in range(shape[1])]
+        # Right and bottom edges of the columns and rows relative to the formation
+        self.column_ends = [offset + enemy_size[0] for offset in self.column_offsets]
+        self.row_ends = [offset + enemy_size[1] for offset in self.row_offsets]
+        self.x = 0
+        self.y = 0
+        self.direction = -1
+        self.moves = 0
+        self.alive = np.zeros(shape, dtype=bool)
+        self.enemies: list[Optional["Enemy"]] = [None] * len(self.offsets)
+        self.num_alive = 0
+        self.column_counts = [0] * shape[0]
+        self.row_counts = [0] * shape[1]
+        # The outermost columns and the lowest row that have living enemies
+        self._first_column = 0
+        self._last_column = -1
+        self._last_row = -1
+
+    def __len__(self) -> int:
+        return self.num_alive
+
+    def position(self, formation_index: int) -> tuple[int, int]:
+        """Return the top left edge of an enemy of the formation."""
+
+        offset_x, offset_y = self.offsets[formation_index]
+        return self.x + offset_x, self.y + offset_y
+
+    def add(self, enemy: "Enemy") -> None:
+        """
+        Add a living enemy. The first enemy of an empty formation places the
+        formation and sets its direction, all further enemies are moved to
+        their place in it.
+        """
+        column, row = divmod(enemy.formation_index, self.shape[1])
+        if self.alive[column, row]:
+            return
+        if self.num_alive == 0:
+            offset_x, offset_y = self.offsets[enemy.formation_index]
+            self.x = enemy.rect.x - offset_x
+            self.y = enemy.rect.y - offset_y
+            self.direction = enemy.movement_direction
+            self.moves += 1
+        enemy.formation = self
+        self.enemies[enemy.formation_index] = enemy
+        self.alive[column, row] = True
+        self.num_alive += 1
+        self.column_counts[column] += 1
+        self.row_counts[row] += 1
+        if self.column_counts[column] == 1 or self.row_counts[row] == 1:
+            self._update_extents()
+
+    def remove(self, enemy: "Enemy") -> None:
+        """Remove a killed enemy, which keeps its last position and direction."""
+
+        column, row = divmod(enemy.formation_index, self.shape[1])
+        if not self.alive[column, row]:
+            return
+        enemy.rect.topleft = self.position(enemy.formation_index)
+        enemy.formation = None
+        enemy.movement_direction = self.direction
+        self.enemies[enemy.formation_index] = None
+        self.alive[column, row] = False
+        self.num_alive -= 1
+        self.column_counts[column] -= 1
+        self.row_counts[row] -= 1
+        if self.column_counts[column] == 0 or self.row_counts[row] == 0:
+            self._update_extents()
+
+    def overlapping(self, rect: Any) -> list[int]:
+        """
+        Return the formation indices of the living enemies that overlap a rect,
+        with the semantics of pygame.Rect.colliderect. The rect is mapped into
+        the grid of the formation, so only the columns and rows it overlaps are
+        looked at, which are one or two of each for a laser.
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        left, top = rect.x - self.x, rect.y - self.y
+        right, bottom = left + rect.width, top + rect.height
+        columns = range(
+            bisect_right(self.column_ends, left),
+            bisect_left(self.column_offsets, right),
+        )
+        rows = range(
+            bisect_right(self.row_ends, top), bisect_left(self.row_offsets, bottom)
+        )
+        num_rows = self.shape[1]
+        return [
+            column * num_rows + row
+            for column in columns
+            if self.column_counts[column]
+            for row in rows
+            if self.alive[column, row]
+        ]
+
+    def _update_extents(self) -> None:
+        columns = [i for i, count in enumerate(self.column_counts) if count]
+        rows = [j for j, count in enumerate(self.row_counts) if count]
+        self._first_column = columns[0] if columns else 0
+        self._last_column = columns[-1] if columns else -1
+        self._last_row = rows[-1] if rows else -1
+
+    @property
+    def left(self) -> int:
+        """The left edge of the leftmost living enemy."""
+
+        return self.x + self.column_offsets[self._first_column]
+
+    @property
+    def right(self) -> int:
+        """The right edge of the rightmost living enemy."""
+
+        return self.x + self.column_offsets[self._last_column] + self.enemy_size[0]
+
+    @property
+    def bottom(self) -> int:
+        """The bottom edge of the lowest living enemy."""
+
+        if self.num_alive == 0:
+            raise ValueError("The formation has no living enemies.")
+        return self.y + self.row_offsets[self._last_row] + self.enemy_size[1]
+
+    def move(self, dx: float) -> None:
+        """Move all enemies horizontally, rounding like pygame.Rect.move."""
+
+        self.x = int(round_half_away(self.x + dx))
+        self.moves += 1
+
+    def move_down(self, dy: float) -> None:
+        """Move all enemies down, rounding their centers like Enemy.move_row_down."""
+
+        half_height = self.enemy_size[1] // 2
+        self.y = int(round_half_away(self.y + half_height + dy)) - half_height
+        self.moves += 1
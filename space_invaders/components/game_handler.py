@@ -1,19 +1,13 @@
 from abc import ABC, abstractmethod
 from space_invaders.components.laser import Laser
 from space_invaders.components.level import LevelGenerator
-from space_invaders.components.controller import GameObjectController
+from space_invaders.components.controller import GameObjectController, drawn_rects
+from space_invaders.components.profiler import PhaseProfiler
 from space_invaders.components.scoreboard import ScoreBoard
-from typing import Any
+from space_invaders.components.resources import get_assets, get_config
+from typing import Optional
+import numpy as np
 import pygame
-import sys
-import yaml
-
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
 
 config = get_config()
 WIDTH = config["WIDTH"]
@@ -22,18 +16,50 @@ PLAYER_BASE_SPEED = config["PLAYER_BASE_SPEED"]
 ENEMY_BASE_SPEED = config["ENEMY_BASE_SPEED"]
 ENEMY_BLOCK_TIME = config["ENEMY_BLOCK_TIME"]
 ENEMY_UNBLOCK_TIME = config["ENEMY_UNBLOCK_TIME"]
-ENEMY_SHOOT_DELAY = config["ENEMY_SHOOT_DELAY"]
+PLAYER_SHOOT_DELAY = config["PLAYER_SHOOT_DELAY"]
 LASER_BASE_SPEED = config["LASER_BASE_SPEED"]
 BACKGROUND = config["BACKGROUND"]
-laser_im = pygame.image.load("space_invaders/assets/laser.png")
-laser_im = pygame.transform.scale(laser_im, (0.0025 * WIDTH, 0.03 * HEIGHT))
+# Upper limit of the simulated time of one frame in milliseconds
+MAX_FRAME_TIME = 250
+
+
+def merge_rects(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+    """
+    Merge overlapping rectangles into their union until no two rectangles
+    overlap, e.g. the old and new area of a moving sprite.
+    """
+
+    merged: list[pygame.Rect] = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        while (i := rect.collidelist(merged)) != -1:
+            rect.union_ip(merged.pop(i))
+        merged.append(rect)
+    return merged
 
 
 class GameHandlerBase(ABC):
     """
-    Base class for all GameHandler objects.
+    Base class for all GameHandler objects. It implements one tick of the game
+    with the sprites, which the interactive game loop and SpaceInvadersEnv
+    share.
+
+    Attributes
+    ----------
+    game_time : int
+        The number of computed ticks.
+    killed_enemies : int
+        The number of ticks in which an enemy was killed.
+    last_enemy_block_time, last_enemy_unblock_time : int
+        The ticks at which the enemy movement was last blocked and unblocked.
+    laser_im : pygame.Surface
+        The image of new lasers, set by the subclasses.
+    profiler : PhaseProfiler
+        Records the time of the phases of a tick if it is enabled.
     """
 
+    laser_im: pygame.Surface
+
     def __init__(
         self,
         game_object_controller: GameObjectController,
@@ -45,6 +71,10 @@ class GameHandlerBase(ABC):
         self.enemy_controller = game_object_controller.enemy_controller
         self.blockade_controller = game_object_controller.blockade_controller
         self.game_time = 0
+        self.killed_enemies = 0
+        self.last_enemy_block_time = 0
+        self.last_enemy_unblock_time = 0
+        self.profiler = PhaseProfiler()
 
     def unblock_enemy_movement(self) -> None:
         """Unblock all enemies."""
@@ -60,21 +90,182 @@ class GameHandlerBase(ABC):
     def load_new_level(self) -> None:
         pass
 
+    def tick(
+        self, dt: int, left: bool = False, right: bool = False, shoot: bool = False
+    ) -> tuple[bool, bool, bool]:
+        """
+        Compute one tick of the game with the sprites. All timers of the game
+        measure simulated time, i.e. ticks times dt, so a game played with the
+        same inputs per tick is the same on every machine and at every frame
+        rate. ArrayEngine.step implements the same rules for arrays.
+
+        Parameters
+        ----------
+        dt : int
+            The simulated time of the tick in milliseconds.
+        left, right : bool, default=False
+            Move the player to the left or to the right.
+        shoot : bool, default=False
+            Shoot a laser if the player has none on screen.
+
+        Returns
+        -------
+        tuple[bool, bool, bool]
+            Wether an enemy was killed, wether the player was hit and wether the
+            game has finished.
+        """
+        # Block and unblock enemy movement to create interrupted movement
+        if (
+            self.enemy_controller.is_blocked
+            and (self.game_time - self.last_enemy_block_time) * dt > ENEMY_BLOCK_TIME
+        ):
+            self.unblock_enemy_movement()
+            self.last_enemy_unblock_time = self.game_time
+        elif (
+            not self.enemy_controller.is_blocked
+            and (self.game_time - self.last_enemy_unblock_time) * dt
+            > ENEMY_UNBLOCK_TIME
+        ):
+            self.block_enemy_movement()
+            self.last_enemy_block_time = self.game_time
+        self.profiler.lap("enemy_block")
+        if left:
+            self.player.update(left=True, dt=dt)
+        if right:
+            self.player.update(right=True, dt=dt)
+        if (
+            shoot
+            and not self.player.laser_controller
+            and self.game_time * dt > PLAYER_SHOOT_DELAY
+        ):
+            self.player.laser_controller.add(
+                Laser(self.laser_im, self.player.rect.midtop, LASER_BASE_SPEED)
+            )
+        self.profiler.lap("player_action")
+        # Update laser positions
+        if self.player.laser_controller:
+            self.player.laser_controller.move_laser(dt)
+        self.enemy_controller.laser_controller.move_laser(dt)
+        self.game_object_controller._sweep_lasers()
+        self.profiler.lap("laser_motion")
+        # Check if something was hit by laser
+        if self.enemy_controller.laser_controller:
+            self.game_object_controller._check_blockade_hit_by_enemy_laser()
+        if self.player.laser_controller:
+            self.game_object_controller._check_blockade_hit_by_player_laser()
+        self.profiler.lap("blockade_hit")
+        player_hit = self.game_object_controller._check_player_hit()
+        if player_hit:
+            self.player.lives -= 1
+        self.profiler.lap("player_hit")
+        enemy_hit = bool(self.game_object_controller._check_enemy_hit())
+        if enemy_hit:
+            self.killed_enemies += 1
+            # Increase enemy speed based on number of remaining enemies
+            if len(self.enemy_controller) % 9 == 0:
+                new_enemy_speed = 1.1 * self.enemy_controller.current_enemy_speed
+                self.enemy_controller.set_enemy_speed(new_enemy_speed)
+        self.profiler.lap("enemy_hit")
+        # Check if level is finished
+        if not self.enemy_controller:
+            self.load_new_level()
+            self.enemy_controller.set_enemy_speed(
+                ENEMY_BASE_SPEED * 1.05 * self.level_generator.level_number
+            )
+        self.profiler.lap("level_reload")
+        # Update enemy positions
+        if not self.enemy_controller.is_blocked:
+            self.enemy_controller.move_enemies(dt)
+            if self.enemy_controller.enemy_is_out_of_screen():
+                self.enemy_controller.move_enemies_row_down()
+                self.enemy_controller.switch_movement_direction()
+        # Exit game if enemy makes it to the bottom
+        terminated = self.enemy_controller.enemy_height >= HEIGHT
+        self.profiler.lap("enemy_motion")
+        # Shoot new laser once old one is removed from screen
+        if not self.enemy_controller.laser_controller:
+            chosen_enemy = self.enemy_controller.choose_random_enemy()
+            self.enemy_controller.laser_controller.add(
+                Laser(self.laser_im, chosen_enemy.rect.midbottom, LASER_BASE_SPEED)
+            )
+        # Check if player has no lives left
+        if self.player.lives <= 0:
+            terminated = True
+        self.profiler.lap("enemy_fire")
+        self.game_time += 1
+        return enemy_hit, player_hit, terminated
+
 
 class GameHandler(GameHandlerBase):
+    """
+    Game handler of the interactive game.
+
+    The game is simulated with a fixed timestep: the time of every frame is
+    added to an accumulator, from which as many ticks of dt milliseconds are
+    computed as fit, so the simulation is independent of the frame rate and
+    the same on every machine.
+
+    Parameters
+    ----------
+    player_lives : int, default=3
+        The number of lives the player starts with.
+    profile : bool, default=False
+        If True, the time of every phase of a frame is recorded and a frame
+        time breakdown is shown in the top right corner of the screen.
+    seed : int, optional
+        The seed of the random number generator of the game. All random
+        choices are drawn from it, so a seeded game is reproducible for the
+        same inputs and frame times.
+    dirty_rects : bool, default=True
+        If True, only the areas of the screen that changed in a frame are
+        passed to pygame.display.update and the scoreboard is only redrawn if
+        it changed or was drawn over. Otherwise the whole screen is updated
+        every frame.
+    swept_collisions : bool, default=False
+        If True, lasers collide with everything on the path they covered
+        during a tick instead of only at their new position, so a large dt
+        does not let them pass through blockades, enemies or the player.
+    dt : int, default=20
+        The simulated time of one tick in milliseconds. The default computes
+        one tick per frame at 50 frames per second.
+    fps : int, optional, default=50
+        The maximal number of frames per second. The frame limiter sleeps
+        instead of spinning. If None, the frame rate is not limited and every
+        frame computes exactly one tick without waiting, so the game runs as
+        fast as possible, e.g. for headless soak tests.
+    """
+
     def __init__(
         self,
         game_object_controller: GameObjectController,
         level_generator: LevelGenerator,
         scoreboard: ScoreBoard,
         player_lives: int = 3,
+        profile: bool = False,
+        seed: Optional[int] = None,
+        dirty_rects: bool = True,
+        swept_collisions: bool = False,
+        dt: int = 20,
+        fps: Optional[int] = 50,
     ) -> None:
         super().__init__(game_object_controller, level_generator)
         self.clock = pygame.time.Clock()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         self.is_paused = False
-        self.killed_enemies = 0
+        self.dt = dt
+        self.fps = fps
+        self.player.lives = player_lives
         self.scoreboard = scoreboard
+        self.laser_im = get_assets(WIDTH, HEIGHT).laser_im
+        self.profiler = PhaseProfiler(enabled=profile)
+        self.np_random = np.random.default_rng(seed)
+        self.enemy_controller.np_random = self.np_random
+        self.profile_rect = pygame.Rect(0, 0, 0, 0)
+        self.dirty_rects = dirty_rects
+        self.player.laser_controller.swept = swept_collisions
+        self.enemy_controller.laser_controller.swept = swept_collisions
+        # Score and lives that the displayed scoreboard shows
+        self._scoreboard_state: tuple[int, int] | None = None
         """Add initial lives."""
         for _ in range(player_lives):
             self.scoreboard.add_live()
@@ -96,110 +287,123 @@ class GameHandler(GameHandlerBase):
         self.game_object_controller._draw_all_objects()
         pygame.display.update()
 
-    def _update_scoreboard(self) -> None:
-        """Update the displayed scoreboard."""
+    def _scoreboard_rects(self) -> list[pygame.Rect]:
+        """Return the areas of the screen covered by the displayed scoreboard."""
+
+        return [
+            pygame.Rect(0, 0, *self.scoreboard.text_size),
+            *drawn_rects(self.scoreboard),
+        ]
+
+    def _update_scoreboard(
+        self, dirty_rects: list[pygame.Rect] | None = None
+    ) -> list[pygame.Rect]:
+        """
+        Update the displayed scoreboard and return the changed areas of the
+        screen. If the areas of the screen that changed in this frame are
+        passed, the scoreboard is only redrawn if the score or the lives changed
+        or one of the areas overlaps the scoreboard.
+        """
+        state = (self.scoreboard.score, self.scoreboard.lives)
+        old_rects = self._scoreboard_rects()
+        if (
+            dirty_rects is not None
+            and state == self._scoreboard_state
+            and all(rect.collidelist(dirty_rects) == -1 for rect in old_rects)
+        ):
+            return []
+        self._scoreboard_state = state
         self.scoreboard.clear_score(self.screen)
         self.scoreboard.clear(
             self.screen, lambda surf, rect: surf.fill(BACKGROUND, rect)
         )
         self.scoreboard.draw_score(self.screen)
         self.scoreboard.draw(self.screen)
+        return old_rects + self._scoreboard_rects()
+
+    def _draw_profile(self) -> pygame.Rect:
+        """
+        Draw the mean time of every phase of a frame in the top right corner.
+        Returns the changed area of the screen.
+        """
+        old_rect = self.profile_rect
+        self.screen.fill(BACKGROUND, self.profile_rect)
+        lines = [
+            self.scoreboard.font.render(line, True, (0, 255, 0))
+            for line in self.profiler.format()
+        ]
+        if not lines:
+            return old_rect
+        line_height = lines[0].get_height()
+        width = max(line.get_width() for line in lines)
+        self.profile_rect = pygame.Rect(
+            WIDTH - width, 0, width, line_height * len(lines)
+        )
+        self.screen.blits(
+            [(line, (WIDTH - width, i * line_height)) for i, line in enumerate(lines)],
+            doreturn=False,
+        )
+        return old_rect.union(self.profile_rect)
 
-    def game_loop(self) -> None:
+    def game_loop(self, max_ticks: Optional[int] = None) -> None:
+        """
+        Run the game until it is over, the window is closed or, if specified,
+        max_ticks ticks were computed.
+        """
         self.load_new_level()
-        UNBLOCK_ENEMIES = pygame.USEREVENT + 1
-        BLOCK_ENEMIES = pygame.USEREVENT + 2
-        pygame.time.set_timer(BLOCK_ENEMIES, ENEMY_BLOCK_TIME + ENEMY_UNBLOCK_TIME)
         self.blockade_controller.create_all_blockade_structures()
-        unblock_timer_set = False
-        last_player_shot_time = 0
-        while True:
-            dt = self.clock.tick_busy_loop(50)
-            if unblock_timer_set == False:
-                if self.game_time * dt > ENEMY_BLOCK_TIME:
-                    pygame.time.set_timer(
-                        UNBLOCK_ENEMIES, ENEMY_BLOCK_TIME + ENEMY_UNBLOCK_TIME
-                    )
-                    unblock_timer_set = True
+        # Simulated time that has passed but was not computed yet
+        accumulator = 0
+        while max_ticks is None or self.game_time < max_ticks:
+            self.profiler.start()
+            if self.fps is None:
+                accumulator += self.dt
+            else:
+                # Long frames, e.g. while the window is dragged, are cut short
+                accumulator += min(self.clock.tick(self.fps), MAX_FRAME_TIME)
+            self.profiler.lap("frame_limit")
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    sys.exit()
-                # Block enemy movement to create interrupted movement
-                if event.type == BLOCK_ENEMIES:
-                    self.block_enemy_movement()
-                if event.type == UNBLOCK_ENEMIES:
-                    self.unblock_enemy_movement()
-            if not self.is_paused:
-                # Clear old images
-                self.game_object_controller._clear_all_objects()
-                # Check for user input
-                keys = pygame.key.get_pressed()
-                if keys[pygame.K_LEFT]:
-                    self.player.update(left=True, dt=dt)
-                if keys[pygame.K_RIGHT]:
-                    self.player.update(right=True, dt=dt)
-                if keys[pygame.K_SPACE]:
-                    if (
-                        not self.player.laser_controller
-                        and self.game_time - last_player_shot_time > 10
-                    ):
-                        self.player.laser_controller.add(
-                            Laser(laser_im, self.player.rect.midtop, LASER_BASE_SPEED)
-                        )
-                        last_player_shot_time = self.game_time
-                # Update laser positions
-                if self.player.laser_controller:
-                    self.player.laser_controller.move_laser(dt)
-                self.enemy_controller.laser_controller.move_laser(dt)
-                # Check if something was hit by laser
-                if self.enemy_controller.laser_controller:
-                    self.game_object_controller._check_blockade_hit_by_enemy_laser()
-                if self.player.laser_controller:
-                    self.game_object_controller._check_blockade_hit_by_player_laser()
-                if self.game_object_controller._check_player_hit():
+                    return
+            self.profiler.lap("events")
+            if self.is_paused:
+                accumulator = 0
+                continue
+            if accumulator < self.dt:
+                continue
+            # Clear old images
+            dirty_rects = self.game_object_controller._clear_all_objects()
+            self.profiler.lap("clear")
+            # Check for user input, which applies to all ticks of the frame
+            keys = pygame.key.get_pressed()
+            while accumulator >= self.dt:
+                accumulator -= self.dt
+                enemy_hit, player_hit, terminated = self.tick(
+                    self.dt,
+                    left=keys[pygame.K_LEFT],
+                    right=keys[pygame.K_RIGHT],
+                    shoot=keys[pygame.K_SPACE],
+                )
+                if player_hit:
                     self.scoreboard.remove_live()
-                if self.game_object_controller._check_enemy_hit():
-                    self.killed_enemies += 1
+                if enemy_hit:
                     self.scoreboard.score += 5
-                    if self.killed_enemies % 9 == 0:
-                        # Increase enemy speed based on number of remaining enemies
-                        new_enemy_speed = (
-                            1.1 * self.enemy_controller.current_enemy_speed
-                        )
-                        self.enemy_controller.set_enemy_speed(new_enemy_speed)
-                # Check if level is finished
-                if not self.enemy_controller:
-                    self.load_new_level()
-                    self.enemy_controller.set_enemy_speed(
-                        ENEMY_BASE_SPEED * 1.05 * self.level_generator.level_number
-                    )
-                # Update enemy positions
-                if not self.enemy_controller.is_blocked:
-                    self.enemy_controller.move_enemies(dt)
-                    if self.enemy_controller.enemy_is_out_of_screen():
-                        self.enemy_controller.move_enemies_row_down()
-                        # Exit game if enemy makes it to the bottom
-                        if self.enemy_controller.enemy_height >= HEIGHT:
-                            sys.exit()
-                        self.enemy_controller.switch_movement_direction()
-                # Shoot new laser once old one is removed from screen and enemies aren't blocked
-                if not (
-                    self.enemy_controller.laser_controller
-                    or self.enemy_controller.is_blocked
-                ):
-                    chosen_enemy = self.enemy_controller.choose_random_enemy()
-                    self.enemy_controller.laser_controller.add(
-                        Laser(
-                            laser_im,
-                            chosen_enemy.rect.midbottom,
-                            LASER_BASE_SPEED,
-                        )
-                    )
-                # Check if player has 0 lives left
-                if self.scoreboard.lives == 0:
-                    sys.exit()
-                # Draw all objects on screen
-                self.game_object_controller._draw_all_objects()
+                if terminated:
+                    return
+                if max_ticks is not None and self.game_time >= max_ticks:
+                    break
+            # Draw all objects on screen
+            dirty_rects += self.game_object_controller._draw_all_objects()
+            if self.dirty_rects:
+                dirty_rects += self._update_scoreboard(dirty_rects)
+            else:
                 self._update_scoreboard()
+            if self.profiler.enabled:
+                dirty_rects.append(self._draw_profile())
+            self.profiler.lap("draw")
+            # Only the changed areas of the screen are updated
+            if self.dirty_rects:
+                pygame.display.update(merge_rects(dirty_rects))
+            else:
                 pygame.display.update()
-                self.game_time += 1
+            self.profiler.lap("display")
@@ -1,35 +1,56 @@
-from typing import Any
 from space_invaders.components.base_objects import MovableObject
+from space_invaders.components.resources import get_config
+from typing import Any
+import numpy as np
 import pygame
-import yaml
-
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
 
 config = get_config()
 HEIGHT = config["HEIGHT"]
 
 
+def sweep_contact(
+    start_y: Any, laser_height: int, direction: int, top: Any, bottom: Any
+) -> Any:
+    """
+    Return the top edge of a laser at the first position of its sweep from
+    start_y in the direction (-1 or 1) at which it overlaps targets that span
+    [top, bottom) vertically and overlap the sweep. Works for integers and
+    NumPy arrays.
+    """
+    if direction < 0:
+        return np.minimum(start_y, bottom - 1)
+    return np.maximum(start_y, top - laser_height + 1)
+
+
 class Laser(MovableObject):
     """
     Class for sprites representing lasers that can be shot by enemies and the
     player.
+
+    Attributes
+    ----------
+    sweep_start : int
+        The top edge of the laser before its last move, where the path it
+        covered during the tick starts.
     """
 
     directions = {"up": -1, "down": 1}
 
     def __init__(self, image: pygame.Surface, initial_pos: tuple, speed: int) -> None:
         super().__init__(image, initial_pos, speed)
+        self.sweep_start = self.rect.y
 
     def update(self, direction: str, dt) -> None:
-        self.rect.centery += Laser.directions[direction] * self.speed * dt
+        self.move(direction, dt)
         if self._is_out_of_screen():
             self.kill()
 
+    def move(self, direction: str, dt) -> None:
+        """Move the laser without removing it once it left the screen."""
+
+        self.sweep_start = self.rect.y
+        self.rect.centery += Laser.directions[direction] * self.speed * dt
+
     def _is_out_of_screen(self) -> bool:
         if self.rect.bottom < 0:
             return True
@@ -1,38 +1,76 @@
 from space_invaders.components.objects import EnemyCreator, Enemy
+from space_invaders.components.resources import get_assets, get_config
+from typing import Optional
+import numpy as np
 import pygame
-import yaml
 
-with open("space_invaders/config.yaml", "r") as file:
-    config = yaml.safe_load(file)
+config = get_config()
 
 WIDTH = config["WIDTH"]
 HEIGHT = config["HEIGHT"]
 ENEMY_BASE_SPEED = config["ENEMY_BASE_SPEED"]
-enemy_im = pygame.image.load("space_invaders/assets/alien.gif")
-enemy_im = pygame.transform.scale(enemy_im, (0.05 * WIDTH, 0.08 * HEIGHT))
 
 
 class LevelGenerator:
-    def __init__(self, enemy_creator: EnemyCreator) -> None:
+    # The number of columns and rows of the enemy formation
+    formation_shape = (11, 5)
+
+    def __init__(
+        self,
+        enemy_creator: EnemyCreator,
+        enemy_im: Optional[pygame.Surface] = None,
+    ) -> None:
         self.enemy_creator = enemy_creator
+        if enemy_im is None:
+            enemy_im = get_assets().enemy_im
+        self.enemy_im = enemy_im
         self.level_number = 0
 
+    @staticmethod
+    def enemy_positions(y_offset, enemy_height: int) -> list[tuple[float, float]]:
+        """
+        Return the initial positions of all enemies of a level in the order in
+        which they are created.
+        """
+
+        return [
+            (
+                x * 0.6 * WIDTH / 10 + 0.2 * WIDTH,
+                y * enemy_height + y_offset,
+            )
+            for x in range(LevelGenerator.formation_shape[0])
+            for y in range(LevelGenerator.formation_shape[1])
+        ]
+
+    @staticmethod
+    def formation_offsets(enemy_height: int) -> np.ndarray:
+        """
+        Return the offsets of the initial positions of all enemies to the first
+        enemy, truncated like in pygame.Rect.move. All enemies move together,
+        so the offsets stay the same during a level.
+        """
+
+        positions = np.trunc(np.array(LevelGenerator.enemy_positions(0, enemy_height)))
+        return (positions - positions[0]).astype(np.int64)
+
+    @staticmethod
+    def y_offset(level_number: int) -> float:
+        """Return the vertical offset of the enemies in the specified level."""
+
+        return 0.05 * HEIGHT * (level_number - 1)
+
     def initial_enemies(self, y_offset) -> list[Enemy]:
         enemies = []
-        for x in range(0, 11):
-            for y in range(0, 5):
-                new_enemy = self.enemy_creator.create_enemy(
-                    enemy_im,
-                    (
-                        x * 0.6 * WIDTH / 10 + 0.2 * WIDTH,
-                        y * enemy_im.get_rect().height + y_offset,
-                    ),
-                    ENEMY_BASE_SPEED,
-                )
-                enemies.append(new_enemy)
+        enemy_height = self.enemy_im.get_rect().height
+        positions = self.enemy_positions(y_offset, enemy_height)
+        for formation_index, position in enumerate(positions):
+            new_enemy = self.enemy_creator.create_enemy(
+                self.enemy_im, position, ENEMY_BASE_SPEED
+            )
+            new_enemy.formation_index = formation_index
+            enemies.append(new_enemy)
         return enemies
 
     def __next__(self) -> list[Enemy]:
         self.level_number += 1
-        y_offset = 0.05 * HEIGHT * (self.level_number - 1)
-        return self.initial_enemies(y_offset)
+        return self.initial_enemies(self.y_offset(self.level_number))
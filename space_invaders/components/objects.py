@@ -1,14 +1,10 @@
-import yaml
+from typing import TYPE_CHECKING, Optional
 import pygame
-from typing import Any
 from space_invaders.components.base_objects import MovableObject
+from space_invaders.components.resources import get_config
 
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
+if TYPE_CHECKING:
+    from space_invaders.components.formation import EnemyFormation
 
 config = get_config()
 WIDTH = config["WIDTH"]
@@ -16,11 +12,47 @@ HEIGHT = config["HEIGHT"]
 
 
 class Enemy(MovableObject):
+    """
+    An enemy of the player. Enemies that belong to an EnemyFormation are moved
+    by the formation: their rect and movement direction follow it, and the
+    rect is only updated once it is read after the formation has moved.
+    """
+
     def __init__(
         self, image: pygame.surface.Surface, initial_pos: tuple, speed: int
     ) -> None:
+        # The formation the enemy belongs to while it is alive
+        self.formation: Optional["EnemyFormation"] = None
+        # Index of the enemy in the formation of its level, if it belongs to one
+        self.formation_index: Optional[int] = None
+        self._formation_moves = -1
         super().__init__(image, initial_pos, speed)
-        self.movement_direction = -1
+        self._movement_direction = -1
+
+    @property
+    def rect(self) -> pygame.Rect:
+        formation = self.formation
+        if formation is not None and self._formation_moves != formation.moves:
+            self._rect.topleft = formation.position(self.formation_index)
+            self._formation_moves = formation.moves
+        return self._rect
+
+    @rect.setter
+    def rect(self, rect: pygame.Rect) -> None:
+        self._rect = rect
+
+    @property
+    def movement_direction(self) -> int:
+        if self.formation is not None:
+            return self.formation.direction
+        return self._movement_direction
+
+    @movement_direction.setter
+    def movement_direction(self, direction: int) -> None:
+        if self.formation is not None:
+            self.formation.direction = direction
+        else:
+            self._movement_direction = direction
 
     def switch_movement_direction(self):
         self.movement_direction *= -1
@@ -1,16 +1,11 @@
 from __future__ import annotations
-from typing import Any, TYPE_CHECKING
+from typing import TYPE_CHECKING
+
 if TYPE_CHECKING:
     from space_invaders.components.controller import LaserController
 from space_invaders.components.base_objects import MovableObject
 from space_invaders.components.laser import Laser
-import yaml
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
+from space_invaders.components.resources import get_config
 
 config = get_config()
 WIDTH = config["WIDTH"]
@@ -0,0 +1,76 @@
+import time
+
+
+class PhaseProfiler:
+    """
+    Opt-in profiler that records how long the phases of a step or frame take.
+    Phases are measured as laps: every call of lap(name) attributes the time
+    since the previous call of start() or lap() to the named phase.
+
+    Attributes
+    ----------
+    enabled : bool, default=False
+        Wether timings are recorded. A disabled profiler only costs one method
+        call per phase.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lap_start = 0.0
+        # Number of calls, total, last and maximal time in seconds per phase
+        self._phases: dict[str, list] = {}
+
+    def reset(self) -> None:
+        """Delete all recorded timings."""
+
+        self._phases.clear()
+
+    def start(self) -> None:
+        """Start timing the first phase."""
+
+        if self.enabled:
+            self._lap_start = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """Record the time since the last lap as one call of the named phase."""
+
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        duration = now - self._lap_start
+        self._lap_start = now
+        stats = self._phases.get(name)
+        if stats is None:
+            self._phases[name] = [1, duration, duration, duration]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = duration
+            if duration > stats[3]:
+                stats[3] = duration
+
+    def get_profile(self) -> dict[str, dict[str, float]]:
+        """
+        Return the number of calls and the total, mean, last and maximal time in
+        milliseconds of every phase in the order in which they were first seen.
+        """
+        return {
+            name: {
+                "calls": calls,
+                "total_ms": 1000 * total,
+                "mean_ms": 1000 * total / calls,
+                "last_ms": 1000 * last,
+                "max_ms": 1000 * longest,
+            }
+            for name, (calls, total, last, longest) in self._phases.items()
+        }
+
+    def format(self) -> list[str]:
+        """Return one line per phase with its mean time and share of the total."""
+
+        total = sum(stats[1] for stats in self._phases.values())
+        return [
+            f"{name:<14} {1000 * phase_total / calls:6.2f} ms"
+            f" {100 * phase_total / total:5.1f} %"
+            for name, (calls, phase_total, _, _) in self._phases.items()
+        ]
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+import functools
+import pygame
+import yaml
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_PATH = PACKAGE_DIR / "config.yaml"
+ASSETS_DIR = PACKAGE_DIR / "assets"
+# File names of the images of all visible objects
+ASSET_FILES = {
+    "player": "player.png",
+    "enemy": "alien.gif",
+    "laser": "Laser.png",
+    "blockade": "blockade.png",
+}
+
+
+@functools.cache
+def get_config() -> Any:
+    """
+    Return the parsed config of the game. The file is read once per process on
+    first use, independent of the working directory.
+    """
+    with open(CONFIG_PATH, "r") as file:
+        config = yaml.safe_load(file)
+    return config
+
+
+@functools.cache
+def load_image(name: str) -> pygame.Surface:
+    """
+    Load the unscaled image of a visible object ("player", "enemy", "laser" or
+    "blockade"). Every image is read once per process.
+    """
+
+    return pygame.image.load(ASSETS_DIR / ASSET_FILES[name])
+
+
+def prepare_surface(image: pygame.Surface) -> pygame.Surface:
+    """
+    Convert an image to the pixel format of the display or, without a display
+    (e.g. in the gym environment), to the default format of new surfaces like
+    the canvas. Blits of converted images take the fast path without a per
+    pixel format conversion. Per pixel alpha and colorkeys are kept.
+    """
+    has_alpha = bool(image.get_flags() & pygame.SRCALPHA)
+    colorkey = image.get_colorkey()
+    if pygame.display.get_surface() is not None:
+        converted = image.convert_alpha() if has_alpha else image.convert()
+    elif has_alpha:
+        converted = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        # Adding to a transparent surface copies the pixels without blending
+        converted.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+    else:
+        converted = pygame.Surface(image.get_size())
+        if colorkey is not None:
+            converted.fill(colorkey)
+        converted.blit(image, (0, 0))
+    if colorkey is not None:
+        converted.set_colorkey(colorkey)
+    return converted
+
+
+@dataclass
+class GameAssets:
+    """
+    Images of all visible objects in the game, scaled to the size of the
+    screen.
+    """
+
+    player_im: pygame.Surface
+    enemy_im: pygame.Surface
+    laser_im: pygame.Surface
+    blockade_im: pygame.Surface
+
+
+def get_assets(width: Optional[int] = None, height: Optional[int] = None) -> GameAssets:
+    """
+    Return the images of all visible objects scaled to a screen of the
+    specified size (the size in the config by default). The images are only
+    read, so they are loaded, scaled and converted with prepare_surface once
+    per process and resolution and shared by all callers. The pixel format is
+    chosen by the first call, so a display should be set before if there is
+    one.
+    """
+    config = get_config()
+    if width is None:
+        width = config["WIDTH"]
+    if height is None:
+        height = config["HEIGHT"]
+    return _scaled_assets(width, height)
+
+
+@functools.cache
+def _scaled_assets(width: int, height: int) -> GameAssets:
+    sizes = {
+        "player": (0.05 * width, 0.08 * height),
+        "enemy": (0.05 * width, 0.08 * height),
+        "laser": (0.0025 * width, 0.03 * height),
+        "blockade": (0.007 * width, 0.007 * width),
+    }
+    images = {
+        name: prepare_surface(pygame.transform.scale(load_image(name), size))
+        for name, size in sizes.items()
+    }
+    return GameAssets(
+        player_im=images["player"],
+        enemy_im=images["enemy"],
+        laser_im=images["laser"],
+        blockade_im=images["blockade"],
+    )
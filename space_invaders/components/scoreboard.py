@@ -1,13 +1,5 @@
-from typing import Any
 import pygame
-import yaml
-
-
-def get_config() -> Any:
-    with open("space_invaders/config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
-
+from space_invaders.components.resources import get_config, prepare_surface
 
 config = get_config()
 
@@ -30,18 +22,22 @@ class LiveIcon(pygame.sprite.Sprite):
 class ScoreBoard(pygame.sprite.Group):
     """
     Represents displayed scoreboard that keeps track of current score and player
-    lives.
+    lives. The score text is only rendered again when the score changed and
+    the live icon is converted to the pixel format of the screen, so that the
+    scoreboard can be drawn every frame for little cost.
     """
 
     def __init__(self, live_icon_image: pygame.Surface) -> None:
         super().__init__()
         pygame.font.init()
         self.font = pygame.font.Font(None, 36)
-        self.live_icon_image = live_icon_image
+        self.live_icon_image = prepare_surface(live_icon_image)
         self._score = 0
         self.lives = 0
         self.live_icon_order: dict[int, LiveIcon] = dict()
         self.text_size = (0, 0)
+        # The score of which the text was last rendered and the rendered text
+        self._score_text: tuple[int, pygame.Surface] | None = None
 
     @property
     def score(self) -> int:
@@ -62,6 +58,13 @@ class ScoreBoard(pygame.sprite.Group):
         self.lives += 1
         self.live_icon_order.update({self.lives: newest_live_icon})
 
+    def set_lives(self, lives: int) -> None:
+        """Add or remove lives until the specified number of lives is left."""
+        while self.lives < lives:
+            self.add_live()
+        while self.lives > lives:
+            self.remove_live()
+
     def remove_live(self) -> None:
         """Remove one live."""
         if self.lives <= 0:
@@ -70,11 +73,18 @@ class ScoreBoard(pygame.sprite.Group):
         del self.live_icon_order[self.lives]
         self.lives -= 1
 
+    def render_score(self) -> pygame.Surface:
+        """Return the text displaying the current score, rendered once per score."""
+        if self._score_text is None or self._score_text[0] != self.score:
+            text = self.font.render(f"Score: {self.score}", True, (0, 255, 0))
+            self._score_text = (self.score, text)
+        return self._score_text[1]
+
     def draw_score(self, surf: pygame.Surface) -> None:
         """
         Helper method to draw text on screen displaying the current score.
         """
-        score_text = self.font.render(f"Score: {self.score}", True, (0, 255, 0))
+        score_text = self.render_score()
         self.text_size = score_text.get_size()
         surf.blit(score_text, (0, 0))
 
@@ -0,0 +1,63 @@
+from space_invaders.components.blockade import BlockadeGroup
+from space_invaders.components.controller import (
+    BlockadeController,
+    EnemyController,
+    GameObjectController,
+    LaserController,
+)
+from space_invaders.components.level import LevelGenerator
+from space_invaders.components.objects import EnemyCreator
+from space_invaders.components.player import Player
+from space_invaders.components.resources import GameAssets, get_assets, get_config
+from typing import Optional
+import pygame
+
+config = get_config()
+WIDTH = config["WIDTH"]
+HEIGHT = config["HEIGHT"]
+PLAYER_BASE_SPEED = config["PLAYER_BASE_SPEED"]
+
+
+def load_assets() -> GameAssets:
+    """
+    Return the images of all visible objects scaled to the screen size. They
+    are loaded once per process and shared by all worlds.
+    """
+
+    return get_assets(WIDTH, HEIGHT)
+
+
+def create_world(
+    assets: Optional[GameAssets] = None,
+) -> tuple[GameObjectController, LevelGenerator]:
+    """
+    Factory function that creates a new, independent set of game objects: the
+    player, all controllers and the level generator. Every game that runs in
+    the same process needs its own world.
+
+    Parameters
+    ----------
+    assets : GameAssets, optional
+        The images of all visible objects. They are only read and can therefore
+        be shared between worlds. The cached assets are used if not specified.
+    """
+    if assets is None:
+        assets = load_assets()
+    player = Player(
+        assets.player_im,
+        (
+            WIDTH / 2 - assets.player_im.get_rect().width / 2,
+            HEIGHT - assets.player_im.get_rect().height,
+        ),
+        PLAYER_BASE_SPEED,
+        LaserController(laser_direction="up"),
+    )
+    enemy_controller = EnemyController(LaserController(laser_direction="down"))
+    blockade_controller = BlockadeController(assets.blockade_im, BlockadeGroup())
+    level_generator = LevelGenerator(
+        EnemyCreator(type="weak"), enemy_im=assets.enemy_im
+    )
+    game_object_controller = GameObjectController(
+        player, enemy_controller, blockade_controller
+    )
+    return game_object_controller, level_generator
@@ -1 +1,35 @@
-from space_invaders.gym_env.space_invader_env import SpaceInvadersEnv
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from space_invaders.gym_env.space_invader_env import SpaceInvadersEnv
+    from space_invaders.gym_env.space_invader_vector_env import SpaceInvadersVectorEnv
+    from space_invaders.gym_env.shared_memory_vector_env import SharedMemoryVectorEnv
+    from space_invaders.gym_env.thread_pool_vector_env import ThreadPoolVectorEnv
+    from space_invaders.gym_env.trajectory import TrajectoryReader, TrajectoryRecorder
+
+# The environments are imported on first access, so that pygame and the assets
+# are only loaded once an environment is actually built.
+_modules = {
+    "SpaceInvadersEnv": "space_invader_env",
+    "SpaceInvadersVectorEnv": "space_invader_vector_env",
+    "SharedMemoryVectorEnv": "shared_memory_vector_env",
+    "ThreadPoolVectorEnv": "thread_pool_vector_env",
+    "TrajectoryRecorder": "trajectory",
+    "TrajectoryReader": "trajectory",
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"{__name__}.{_modules[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *__all__]
@@ -0,0 +1,152 @@
+import numpy as np
+from PIL import Image
+import pygame
+from typing import Iterable, Optional
+from space_invaders.components import config
+from space_invaders.components.world import GameAssets
+
+WIDTH = config["WIDTH"]
+HEIGHT = config["HEIGHT"]
+BACKGROUND = config["BACKGROUND"]
+
+
+def prepare_sprite(
+    image: pygame.Surface, size: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Resample an image to the specified size with area averaging. Returns the
+    colors of the image as they appear on the background and a mask of the
+    pixels that are covered by the image, both indexed by (x, y).
+    """
+
+    surf = pygame.Surface(image.get_size())
+    surf.fill(BACKGROUND)
+    surf.blit(image, (0, 0))
+    colors = pygame.surfarray.array3d(surf)
+    alpha = np.full(image.get_size(), 255, dtype=np.uint8)
+    if image.get_flags() & pygame.SRCALPHA:
+        alpha = pygame.surfarray.array_alpha(image)
+    colorkey = image.get_colorkey()
+    if colorkey is not None:
+        alpha[pygame.surfarray.array2d(image) == image.map_rgb(colorkey)] = 0
+    # PIL treats the first array axis as rows, so sizes are passed as (y, x)
+    colors = Image.fromarray(colors).resize(size[::-1], Image.Resampling.BOX)
+    alpha = Image.fromarray(alpha).resize(size[::-1], Image.Resampling.BOX)
+    return np.array(colors), np.array(alpha) > 0
+
+
+class ObservationRenderer:
+    """
+    Renderer that rasterizes all visible objects straight into a preallocated
+    (width, height, 3) uint8 array at observation resolution, skipping the
+    full resolution pygame canvas and the resize of the rendered frame.
+
+    Every sprite image is resampled to observation resolution once. Objects
+    of the same kind are pasted together with one vectorized NumPy operation.
+
+    Parameters
+    ----------
+    assets : GameAssets
+        The images of all visible objects.
+    width : int
+        The width of the rendered observation.
+    height : int
+        The height of the rendered observation.
+    supersample : int, default=1
+        If larger than 1, objects are rasterized at supersample times the
+        observation resolution and the result is area averaged, which smooths
+        the edges of objects like a resize of the full resolution frame.
+    """
+
+    def __init__(
+        self, assets: GameAssets, width: int, height: int, supersample: int = 1
+    ) -> None:
+        if supersample < 1:
+            raise ValueError("Supersample factor should be at least 1.")
+        self.width = width
+        self.height = height
+        self.supersample = supersample
+        self.frame = np.zeros((width, height, 3), dtype=np.uint8)
+        self.raster = self.frame
+        if supersample > 1:
+            self.raster = np.zeros(
+                (width * supersample, height * supersample, 3), dtype=np.uint8
+            )
+            self._area_sum = np.zeros((width, height, 3), dtype=np.uint16)
+        self.scale_x = self.raster.shape[0] / WIDTH
+        self.scale_y = self.raster.shape[1] / HEIGHT
+        self.sprites: dict[str, tuple[np.ndarray, np.ndarray, tuple[int, int]]] = {}
+        for key, image in (
+            ("player", assets.player_im),
+            ("enemy", assets.enemy_im),
+            ("laser", assets.laser_im),
+            ("blockade", assets.blockade_im),
+        ):
+            w, h = image.get_size()
+            size = (max(1, round(w * self.scale_x)), max(1, round(h * self.scale_y)))
+            colors, mask = prepare_sprite(image, size)
+            self.sprites[key] = (colors, mask, (w, h))
+
+    def render(
+        self,
+        object_positions: Iterable[tuple[str, np.ndarray, np.ndarray]],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Render one observation and return the preallocated frame.
+
+        Parameters
+        ----------
+        object_positions : Iterable[tuple[str, np.ndarray, np.ndarray]]
+            The kind ("player", "enemy", "laser" or "blockade") and the top left
+            x- and y-positions in screen coordinates of all visible objects in
+            the order in which they are drawn.
+        out : np.ndarray, optional
+            A (width, height, 3) uint8 array the observation is written into
+            instead of the preallocated frame.
+        """
+        frame = self.frame if out is None else out
+        raster = frame if self.supersample == 1 else self.raster
+        raster[...] = BACKGROUND
+        for key, xs, ys in object_positions:
+            if len(xs):
+                self._paste(raster, key, np.asarray(xs), np.asarray(ys))
+        if self.supersample > 1:
+            self._area_average(frame)
+        return frame
+
+    def _area_average(self, frame: np.ndarray) -> None:
+        """Average every supersample x supersample block of the raster into the frame."""
+
+        k = self.supersample
+        self._area_sum[...] = k * k // 2
+        for i in range(k):
+            for j in range(k):
+                self._area_sum += self.raster[i::k, j::k]
+        self._area_sum //= k * k
+        np.copyto(frame, self._area_sum, casting="unsafe")
+
+    def _paste(
+        self, raster: np.ndarray, key: str, xs: np.ndarray, ys: np.ndarray
+    ) -> None:
+        """Paste all objects of one kind into the raster."""
+
+        colors, mask, (w, h) = self.sprites[key]
+        # Pixel extent of every object, so that adjacent objects leave no gaps
+        x0 = np.rint(xs * self.scale_x).astype(np.intp)
+        y0 = np.rint(ys * self.scale_y).astype(np.intp)
+        extent_x = np.maximum(np.rint((xs + w) * self.scale_x).astype(np.intp) - x0, 1)
+        extent_y = np.maximum(np.rint((ys + h) * self.scale_y).astype(np.intp) - y0, 1)
+        dx = np.arange(extent_x.max())
+        dy = np.arange(extent_y.max())
+        # Nearest neighbour lookup into the resampled sprite
+        src_x = np.minimum(dx * mask.shape[0] // extent_x[:, None], mask.shape[0] - 1)
+        src_y = np.minimum(dy * mask.shape[1] // extent_y[:, None], mask.shape[1] - 1)
+        x = x0[:, None] + dx
+        y = y0[:, None] + dy
+        valid_x = (dx < extent_x[:, None]) & (x >= 0) & (x < raster.shape[0])
+        valid_y = (dy < extent_y[:, None]) & (y >= 0) & (y < raster.shape[1])
+        src_x, src_y = src_x[:, :, None], src_y[:, None, :]
+        valid = valid_x[:, :, None] & valid_y[:, None, :] & mask[src_x, src_y]
+        x, y = np.broadcast_arrays(x[:, :, None], y[:, None, :])
+        raster[x[valid], y[valid]] = colors[src_x, src_y][valid]
@@ -0,0 +1,321 @@
+import multiprocessing
+import os
+import traceback
+import numpy as np
+from threading import BrokenBarrierError
+from typing import Any, Optional
+from gymnasium.vector import VectorEnv
+from space_invaders.components.world import GameAssets, load_assets
+from space_invaders.gym_env.space_invader_env import SpaceInvadersEnv
+
+# Commands of the main process to the workers
+STEP, RESET, CLOSE = 0, 1, 2
+
+INFO_KEYS = ["enemy_advance", "num_remaining_enemies", "player_lives", "game_time"]
+
+
+def shared_array(
+    context: Any, shape: tuple[int, ...], dtype: np.dtype | type
+) -> np.ndarray:
+    """Allocate an array in shared memory that is inherited by forked processes."""
+
+    dtype = np.dtype(dtype)
+    size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    return np.frombuffer(
+        context.RawArray("b", size), dtype=dtype, count=int(np.prod(shape))
+    ).reshape(shape)
+
+
+class SharedMemoryVectorEnv(VectorEnv):
+    """
+    Vectorized environment that steps N SpaceInvadersEnv instances in a pool
+    of worker processes. The assets are loaded once before the workers are
+    forked, and all workers step their environments in lockstep. Actions,
+    observations, rewards and infos are exchanged through arrays in shared
+    memory instead of pickled messages: every environment renders its
+    observations straight into its slot of one shared (N, *observation shape)
+    array. Only two barriers synchronize the processes per step.
+
+    Sub-environments are reset automatically once they terminate or are
+    truncated, like in SpaceInvadersVectorEnv. Workers are started with fork,
+    which is not available on Windows.
+
+    Parameters
+    ----------
+    num_envs : int, default=1
+        The number of environments.
+    num_workers : int, optional
+        The number of worker processes, which share the environments evenly.
+        Defaults to the number of CPUs, but at most num_envs.
+    max_episode_steps : int, optional
+        Truncate an episode after this many steps.
+    copy : bool, default=True
+        Wether step and reset return a copy of the shared observations or a
+        read-only view that is overwritten by the next step.
+    timeout : float, optional, default=60
+        The number of seconds to wait for the workers to finish a command.
+        Workers that are killed by a signal are detected after this time.
+    **env_kwargs
+        The parameters of every SpaceInvadersEnv. The observation space has to
+        be a Box, and the render mode defaults to "rgb_array".
+    """
+
+    metadata = {"autoreset": True}
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        num_workers: Optional[int] = None,
+        max_episode_steps: Optional[int] = None,
+        copy: bool = True,
+        timeout: Optional[float] = 60,
+        **env_kwargs,
+    ) -> None:
+        env_kwargs.setdefault("render_mode", "rgb_array")
+        if env_kwargs["render_mode"] in ["human", "symbolic"]:
+            raise ValueError('Render mode should not be "human" or "symbolic".')
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, num_envs))
+        # The workers inherit the loaded assets instead of reading the files
+        assets = env_kwargs.pop("assets", None) or load_assets()
+        env = SpaceInvadersEnv(assets=assets, **env_kwargs)
+        super().__init__(num_envs, env.observation_space, env.action_space)
+        env.close()
+        self.max_episode_steps = max_episode_steps
+        self.copy = copy
+        self.timeout = timeout
+        context = multiprocessing.get_context("fork")
+        shape = self.observation_space.shape
+        dtype = self.observation_space.dtype
+        self.observations = shared_array(context, shape, dtype)  # type: ignore
+        self.final_observations = shared_array(context, shape, dtype)  # type: ignore
+        self._observations_view = self.observations.view()
+        self._observations_view.flags.writeable = False
+        self._actions = shared_array(
+            context,
+            (num_envs, *self.single_action_space.shape),  # type: ignore
+            self.single_action_space.dtype,  # type: ignore
+        )
+        self._rewards = shared_array(context, (num_envs,), np.float64)
+        self._terminateds = shared_array(context, (num_envs,), np.bool_)
+        self._truncateds = shared_array(context, (num_envs,), np.bool_)
+        self._infos = shared_array(context, (num_envs, len(INFO_KEYS)), np.float64)
+        self._final_infos = shared_array(
+            context, (num_envs, len(INFO_KEYS)), np.float64
+        )
+        self._seeds = shared_array(context, (num_envs,), np.int64)
+        self._has_seed = shared_array(context, (num_envs,), np.bool_)
+        self._command = shared_array(context, (1,), np.int64)
+        # One barrier starts a command in all workers, one waits for its end
+        self._start = context.Barrier(num_workers + 1)
+        self._done = context.Barrier(num_workers + 1)
+        self._error_receiver, error_sender = context.Pipe(duplex=False)
+        self.processes = []
+        for env_indices in np.array_split(np.arange(num_envs), num_workers):
+            process = context.Process(
+                target=self._worker,
+                args=(env_indices, assets, env_kwargs, error_sender),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        error_sender.close()
+
+    def _worker(
+        self,
+        env_indices: np.ndarray,
+        assets: GameAssets,
+        env_kwargs: dict,
+        error_sender: Any,
+    ) -> None:
+        """Run the commands of the main process on some of the environments."""
+
+        try:
+            envs = []
+            for i in env_indices:
+                env = SpaceInvadersEnv(assets=assets, copy_obs=False, **env_kwargs)
+                # Single frames are rendered straight into the shared array
+                if env.symbolic_observation is None and env.frame_stack == 1:
+                    env.set_obs_buffer(self.observations[i])
+                envs.append(env)
+            elapsed_steps = np.zeros(len(envs), dtype=np.int64)
+            while True:
+                self._start.wait()
+                command = self._command[0]
+                if command == CLOSE:
+                    break
+                for j, (i, env) in enumerate(zip(env_indices, envs)):
+                    if command == RESET:
+                        seed = int(self._seeds[i]) if self._has_seed[i] else None
+                        obs, info = env.reset(seed=seed)
+                        elapsed_steps[j] = 0
+                        self._write_step(i, obs, info, 0, False, False)
+                        continue
+                    obs, reward, terminated, truncated, info = env.step(
+                        self._actions[i]
+                    )
+                    elapsed_steps[j] += 1
+                    if self.max_episode_steps is not None:
+                        truncated |= elapsed_steps[j] >= self.max_episode_steps
+                    if terminated or truncated:
+                        self.final_observations[i] = obs
+                        self._final_infos[i] = [info[key] for key in INFO_KEYS]
+                        obs, info = env.reset()
+                        elapsed_steps[j] = 0
+                    self._write_step(i, obs, info, reward, terminated, truncated)
+                self._done.wait()
+            for env in envs:
+                env.close()
+        except BrokenBarrierError:
+            pass
+        except BaseException:
+            error_sender.send(traceback.format_exc())
+            self._start.abort()
+            self._done.abort()
+
+    def _write_step(
+        self,
+        i: int,
+        obs: np.ndarray,
+        info: dict,
+        reward: float,
+        terminated: bool,
+        truncated: bool,
+    ) -> None:
+        """Write the results of one environment into the shared arrays."""
+
+        if not np.shares_memory(obs, self.observations[i]):
+            self.observations[i] = obs
+        self._rewards[i] = reward
+        self._terminateds[i] = terminated
+        self._truncateds[i] = truncated
+        self._infos[i] = [info[key] for key in INFO_KEYS]
+
+    def _run(self, command: int) -> None:
+        """Start a command in all workers."""
+
+        self._command[0] = command
+        self._call(self._start.wait)
+
+    def _call(self, wait: Any) -> None:
+        """Wait at a barrier and raise the errors of the workers."""
+
+        try:
+            wait(self.timeout)
+        except BrokenBarrierError:
+            # Workers killed by a signal cannot abort the barriers themselves
+            exit_codes = [
+                process.exitcode
+                for process in self.processes
+                if not process.is_alive()
+            ]
+            message = "A worker process failed."
+            if exit_codes:
+                message += f" Exit codes: {exit_codes}."
+            elif not self._error_receiver.poll(1):
+                raise RuntimeError(
+                    f"The workers did not respond within {self.timeout} seconds."
+                ) from None
+            if self._error_receiver.poll(1):
+                try:
+                    message += "\n" + self._error_receiver.recv()
+                except EOFError:
+                    pass
+            raise RuntimeError(message) from None
+
+    def reset_wait(
+        self,
+        seed: Optional[int | list[int]] = None,
+        options: Optional[dict] = None,
+    ) -> tuple[np.ndarray, dict]:
+        """
+        Reset all games. An integer seed seeds the game i with seed + i, a list
+        of seeds specifies the seed of every game.
+        """
+        # The games have no reset options, so options are rejected instead of
+        # silently ignored
+        if options is not None:
+            raise ValueError("SharedMemoryVectorEnv does not support reset options.")
+        if seed is None:
+            seed = [None for _ in range(self.num_envs)]  # type: ignore
+        if isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        self._has_seed[:] = [s is not None for s in seed]
+        self._seeds[:] = [0 if s is None else s for s in seed]
+        self._run(RESET)
+        self._call(self._done.wait)
+        return self._get_observations(), self._get_infos(self._infos)
+
+    def step_async(self, actions: Any) -> None:
+        self._actions[:] = actions
+        self._run(STEP)
+
+    def step_wait(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Wait until all games are stepped and the finished games are reset."""
+
+        self._call(self._done.wait)
+        terminated = self._terminateds.copy()
+        truncated = self._truncateds.copy()
+        infos = self._get_infos(self._infos)
+        done = terminated | truncated
+        if done.any():
+            final_observations = np.full(self.num_envs, None, dtype=object)
+            final_infos = np.full(self.num_envs, None, dtype=object)
+            final_info_arrays = self._get_infos(self._final_infos)
+            for game in np.flatnonzero(done):
+                final_observations[game] = self.final_observations[game].copy()
+                final_infos[game] = {
+                    key: final_info_arrays[key][game] for key in INFO_KEYS
+                }
+            infos["final_observation"] = final_observations
+            infos["_final_observation"] = done
+            infos["final_info"] = final_infos
+            infos["_final_info"] = done
+        return (
+            self._get_observations(),
+            self._rewards.copy(),
+            terminated,
+            truncated,
+            infos,
+        )
+
+    def _get_observations(self) -> np.ndarray:
+        """
+        Return a copy of the observations or, if copy is False, a read-only view
+        that is overwritten by the next step.
+        """
+        if self.copy:
+            return self.observations.copy()
+        return self._observations_view
+
+    def _get_infos(self, values: np.ndarray) -> dict:
+        """Convert the shared info values to the format of vector environments."""
+
+        infos: dict[str, Any] = {
+            "enemy_advance": values[:, 0].copy(),
+            "num_remaining_enemies": values[:, 1].astype(np.int64),
+            "player_lives": values[:, 2].astype(np.int64),
+            "game_time": values[:, 3].astype(np.int64),
+        }
+        for key in INFO_KEYS:
+            infos[f"_{key}"] = np.ones(self.num_envs, dtype=bool)
+        return infos
+
+    def close_extras(self, **kwargs) -> None:
+        # A dead worker cannot take part in the close command, so the other
+        # workers are stopped by breaking the barriers instead
+        if all(process.is_alive() for process in self.processes):
+            try:
+                self._run(CLOSE)
+            except RuntimeError:
+                pass
+        self._start.abort()
+        self._done.abort()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
@@ -1,86 +1,194 @@
+import copy
 import numpy as np
 from PIL import Image
 import pygame
 from typing import Any, Literal, Optional
 from gymnasium import spaces, Env
 from space_invaders.components import (
-    Player,
-    BlockadeGroup,
-    BlockadeController,
-    EnemyCreator,
-    EnemyController,
-    LaserController,
     GameObjectController,
     GameHandlerBase,
     LevelGenerator,
     Laser,
+    ArrayEngine,
+    ScoreBoard,
     config,
 )
-
-
-def load_assets() -> list[Any]:
-    player_im = pygame.image.load("space_invaders/assets/player.png")
-    blockade_im = pygame.image.load("space_invaders/assets/blockade.png")
-    laser_im = pygame.image.load("space_invaders/assets/laser.png")
-    return [player_im, blockade_im, laser_im]
+from space_invaders.components.profiler import PhaseProfiler
+from space_invaders.components.world import GameAssets, create_world, load_assets
+from space_invaders.gym_env.observation_renderer import ObservationRenderer
+from space_invaders.gym_env.symbolic_observation import SymbolicObservation
 
 WIDTH = config["WIDTH"]
 HEIGHT = config["HEIGHT"]
 PLAYER_BASE_SPEED = config["PLAYER_BASE_SPEED"]
 ENEMY_BASE_SPEED = config["ENEMY_BASE_SPEED"]
-ENEMY_BLOCK_TIME = config["ENEMY_BLOCK_TIME"]
-ENEMY_UNBLOCK_TIME = config["ENEMY_UNBLOCK_TIME"]
-ENEMY_SHOOT_DELAY = config["ENEMY_SHOOT_DELAY"]
 LASER_BASE_SPEED = config["LASER_BASE_SPEED"]
 BACKGROUND = config["BACKGROUND"]
-player_im, blockade_im, laser_im = load_assets()
-player_im = pygame.transform.scale(player_im, (0.05 * WIDTH, 0.08 * HEIGHT))
-blockade_im = pygame.transform.scale(blockade_im, (0.007 * WIDTH, 0.007 * WIDTH))
-laser_im = pygame.transform.scale(laser_im, (0.0025 * WIDTH, 0.03 * HEIGHT))
-enemy_laser_controller = LaserController(laser_direction="down")
-player_laser_controller = LaserController(laser_direction="up")
-player = Player(
-    player_im,
-    (
-        WIDTH / 2 - player_im.get_rect().width / 2,
-        HEIGHT - player_im.get_rect().height,
-    ),
-    PLAYER_BASE_SPEED,
-    player_laser_controller,
-)
-weak_enemy_creator = EnemyCreator(type="weak")
-level_generator = LevelGenerator(weak_enemy_creator)
-enemy_controller = EnemyController(enemy_laser_controller)
-blockade_group = BlockadeGroup()
-blockade_controller = BlockadeController(blockade_im, blockade_group)
-game_obj_controller = GameObjectController(
-    player, enemy_controller, blockade_controller
-)
+
+
+# Luma weights 0.299, 0.587 and 0.114 in 16 bit fixed point
+GRAY_SCALE_WEIGHTS = (19595, 38470, 7471)
+
+
+def to_gray_scale(
+    obs: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    scratch: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Convert an RGB observation to gray scale with integer fixed point
+    arithmetic.
+
+    Parameters
+    ----------
+    obs : np.ndarray
+        The RGB observation.
+    out : np.ndarray, optional
+        A uint8 array the gray scale observation is written into.
+    scratch : np.ndarray, optional
+        A uint32 array of shape (2, *obs.shape[:-1]) used for intermediate
+        results. Passing out and scratch avoids all temporary arrays.
+    """
+    if out is None:
+        out = np.empty(obs.shape[:-1], dtype=np.uint8)
+    if scratch is None:
+        scratch = np.empty((2, *obs.shape[:-1]), dtype=np.uint32)
+    gray, channel = scratch
+    np.multiply(obs[..., 0], GRAY_SCALE_WEIGHTS[0], out=gray, dtype=np.uint32)
+    for i in (1, 2):
+        np.multiply(obs[..., i], GRAY_SCALE_WEIGHTS[i], out=channel, dtype=np.uint32)
+        gray += channel
+    gray += 1 << 15
+    gray >>= 16
+    np.copyto(out, gray, casting="unsafe")
+    return out
+
+
+def convert_frame(
+    raw_obs: np.ndarray,
+    width: int,
+    height: int,
+    render_mode: str,
+    out: Optional[np.ndarray] = None,
+    scratch: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Resize a rendered frame to the observation shape of the render mode,
+    optionally writing it into a preallocated array.
+    """
+
+    obs = np.asarray(Image.fromarray(raw_obs).resize((height, width)))
+    if render_mode == "gray_scale_array":
+        return to_gray_scale(obs, out, scratch)
+    if out is None:
+        return obs.copy()
+    np.copyto(out, obs)
+    return out
 
 
 class SpaceInvadersEnv(Env, GameHandlerBase):
-    metadata = {"render_modes": ["human", "rgb_array", "gray_scale_array"], "render_fps": 20}
+    metadata = {
+        "render_modes": [
+            "human",
+            "rgb_array",
+            "gray_scale_array",
+            "symbolic",
+            "symbolic_array",
+        ],
+        "render_fps": 20,
+    }
 
     def __init__(
         self,
-        game_object_controller: GameObjectController = game_obj_controller,
-        level_generator: LevelGenerator = level_generator,
+        game_object_controller: Optional[GameObjectController] = None,
+        level_generator: Optional[LevelGenerator] = None,
         width: int = 200,
         heigth: int = 150,
-        render_mode: Literal["human", "rgb_array", "gray_scale_array"] = "human",
-        reward: Optional[dict[Literal["enemy_kill", "player_damage"], int]] = None
+        render_mode: Literal[
+            "human", "rgb_array", "gray_scale_array", "symbolic", "symbolic_array"
+        ] = "human",
+        reward: Optional[dict[Literal["enemy_kill", "player_damage"], int]] = None,
+        engine: Literal["sprite", "array"] = "sprite",
+        assets: Optional[GameAssets] = None,
+        observation_renderer: Literal["pygame", "direct"] = "pygame",
+        supersample: int = 1,
+        copy_obs: bool = True,
+        profile: bool = False,
+        frameskip: int = 1,
+        max_pool: bool = False,
+        frame_stack: int = 1,
+        scoreboard: bool = False,
+        dt: int = 40,
+        swept_collisions: bool = False,
     ) -> None:
         self.width = width
         self.height = heigth
         self.render_mode = render_mode
+        if engine not in ["sprite", "array"]:
+            raise ValueError('Engine should be one of ["sprite", "array"].')
+        self.engine = engine
+        # The simulated time of one tick of the game
+        self.dt = dt
+        self.swept_collisions = swept_collisions
+        self.assets = assets if assets is not None else load_assets()
+        self.laser_im = self.assets.laser_im
+        # The array engine keeps the game state in NumPy arrays instead of sprites
+        self.array_engine = None
+        if self.engine == "array":
+            self.array_engine = ArrayEngine(
+                self.assets.player_im,
+                self.assets.enemy_im,
+                self.assets.laser_im,
+                self.assets.blockade_im,
+                swept=swept_collisions,
+            )
         self.enemy_kill_reward : int = 1
         self.player_damage_reward : int = -1
         if reward is not None:
             self.enemy_kill_reward = reward.get("enemy_kill") # type: ignore
             self.player_damage_reward = reward.get("player_damage") # type: ignore
+        if observation_renderer not in ["pygame", "direct"]:
+            raise ValueError('Observation renderer should be one of ["pygame", "direct"].')
+        # The direct renderer rasterizes observations without the pygame canvas
+        self.observation_renderer = None
+        if observation_renderer == "direct":
+            self.observation_renderer = ObservationRenderer(
+                self.assets, width, heigth, supersample
+            )
+        # Every environment owns its game objects unless they are passed explicitly
+        if game_object_controller is None or level_generator is None:
+            game_object_controller, level_generator = create_world(self.assets)
         super().__init__(game_object_controller, level_generator)
+        self.player.laser_controller.swept = swept_collisions
+        self.enemy_controller.laser_controller.swept = swept_collisions
+        # Symbolic observations are built from the game state without rendering
+        self.symbolic_observation = None
+        if self.render_mode in ["symbolic", "symbolic_array"]:
+            self.symbolic_observation = SymbolicObservation(
+                self.assets.enemy_im.get_height(),
+                (
+                    len(self.blockade_controller.structure_positions()),
+                    *self.blockade_controller.template.shape,
+                ),
+            )
+        # Every action is repeated for frameskip ticks of the game
+        if frameskip < 1:
+            raise ValueError("Frameskip should be at least 1.")
+        if max_pool and self.symbolic_observation is not None:
+            raise ValueError("Max-pooling is only supported for pixel observations.")
+        self.frameskip = frameskip
+        self.max_pool = max_pool and frameskip > 1
+        if frame_stack < 1:
+            raise ValueError("Frame stack should be at least 1.")
+        if frame_stack > 1 and self.symbolic_observation is not None:
+            raise ValueError("Frame stacking is only supported for pixel observations.")
+        self.frame_stack = frame_stack
         # Observations will be entire visible screen, resized to specified shape
-        if self.render_mode == "gray_scale_array":
+        if self.render_mode == "symbolic":
+            self.observation_space = self.symbolic_observation.space
+        elif self.render_mode == "symbolic_array":
+            self.observation_space = self.symbolic_observation.flat_space
+        elif self.render_mode == "gray_scale_array":
             self.observation_space = spaces.Box(
                 low=0, high=255, shape=(width, heigth), dtype=np.uint8
             )
@@ -90,15 +198,46 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
             )
         else:
             raise ValueError(f"Render mode should be one of {self.metadata["render_modes"]}.")
+        # Stacked observations hold the last frame_stack frames, oldest first
+        self.frame_shape = self.observation_space.shape
+        if self.frame_stack > 1:
+            self.observation_space = spaces.Box(
+                low=0,
+                high=255,
+                shape=(frame_stack, *self.frame_shape),  # type: ignore
+                dtype=np.uint8,
+            )
+        # Pixel observations are written into preallocated buffers
+        self.copy_obs = copy_obs
+        if self.symbolic_observation is None:
+            self.set_obs_buffer(np.zeros(self.frame_shape, dtype=np.uint8))  # type: ignore
+        # The second to last frame of a step, only used for max-pooling
+        self._pool_buffer = None
+        if self.max_pool:
+            self._pool_buffer = np.zeros(self.frame_shape, dtype=np.uint8)  # type: ignore
+        # Every frame is written twice into a ring buffer of 2 * frame_stack
+        # frames, so that the last frame_stack frames are always contiguous
+        self._frame_ring = None
+        self._ring_position = 0
+        if self.frame_stack > 1:
+            self._frame_ring = np.zeros(
+                (2 * frame_stack, *self.frame_shape), dtype=np.uint8  # type: ignore
+            )
+        self._gray_scale_scratch = np.zeros((2, width, heigth), dtype=np.uint32)
         # Actions are: (0) Do nothing, (1) move left, (2) move right and (3) shoot laser
         self.action_space = spaces.Discrete(4)
         self.clock = None
         self.screen = None
-        # Helper variable for blocking/unblocking logic
-        self.last_enemy_block_time = 0
-        self.last_enemy_unblock_time = 0
+        # The score and lives can be drawn into the rendered frames
+        self.scoreboard = None
+        if scoreboard:
+            self.scoreboard = ScoreBoard(self.assets.player_im)
+        # Timings of the phases of a step are only recorded if profiling is enabled
+        self.profiler = PhaseProfiler(enabled=profile)
+        # Clones of sprite environments are backed by a copy of this engine
+        self._clone_engine = None
 
-    def load_new_level(self, surf: pygame.Surface) -> pygame.Surface:
+    def load_new_level(self) -> None:
         """Start the next level."""
 
         initial_enemies = next(self.level_generator)
@@ -110,9 +249,8 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
             )
         )
         if self.render_mode == "human":
-            self.game_object_controller._clear_all_objects(surf)
-            self.game_object_controller._draw_all_objects(surf)
-        return surf
+            self.game_object_controller._clear_all_objects(self.canvas)
+            self.game_object_controller._draw_all_objects(self.canvas)
 
     def step(self, action) -> tuple[np.ndarray, int, bool, bool, dict]:
         """
@@ -121,92 +259,368 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
         boolean specifying wether the game has finished, a boolean specifying
         wether the game was truncated and a dictionary containing information
         about the state of the game.
+
+        The action is repeated for frameskip ticks of the game and the rewards
+        of all ticks are summed up. Only the frame of the last tick is rendered,
+        or with max_pool the maximum of the last two frames. The step ends
+        early if the game terminates, in which case no frames are pooled.
         """
-        terminated = False
+        self.profiler.start()
         reward = 0
-        dt = 40
-        if (
-            self.enemy_controller.is_blocked
-            and self.game_time - self.last_enemy_block_time > 40
+        terminated = False
+        pooled = False
+        for tick in range(self.frameskip):
+            if self.array_engine is not None:
+                tick_reward, terminated = self._step_array_engine(action)
+            else:
+                tick_reward, terminated = self._step_sprites(action)
+            reward += tick_reward
+            if terminated:
+                break
+            if self.max_pool and tick == self.frameskip - 2:
+                self._render_obs()
+                np.copyto(self._pool_buffer, self.obs_buffer)
+                pooled = True
+        self._render_obs()
+        if pooled:
+            np.maximum(self.obs_buffer, self._pool_buffer, out=self.obs_buffer)
+        self._push_frame()
+        obs = self._get_obs()
+        info = self.info
+        if self.profiler.enabled:
+            info["profile"] = self.get_profile()
+        return obs, reward, terminated, False, info
+
+    def get_state(self) -> dict[str, Any]:
+        """
+        Return a snapshot of the whole game: the player, the enemies, the
+        lasers, the blockades, the timers, the level, the number of killed
+        enemies and the state of the random number generator.
+
+        The snapshot is a dictionary of NumPy scalars and arrays keyed like the
+        attributes of ArrayEngine (plus "killed_enemies", "max_num_enemies"
+        and "np_random") that can be pickled. It is the same for both engines,
+        so it can be restored by set_state of any environment.
+        """
+        if self.array_engine is not None:
+            state = self.array_engine.get_state()
+        else:
+            state = self._get_sprite_state()
+        state["killed_enemies"] = self.killed_enemies
+        state["max_num_enemies"] = self.max_num_enemies
+        state["np_random"] = self.np_random.bit_generator.state
+        return state
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """
+        Restore a snapshot returned by get_state. The game continues exactly
+        like the game the snapshot was taken from. The restored state is
+        rendered by the next step, stacked frames are not restored.
+        """
+        if self.array_engine is not None:
+            self.array_engine.set_state(state)
+            self.game_time = int(state["game_time"])
+        else:
+            self._set_sprite_state(state)
+        self.killed_enemies = int(state["killed_enemies"])
+        self.max_num_enemies = int(state["max_num_enemies"])
+        self.np_random.bit_generator.state = state["np_random"]
+
+    def clone(self) -> "SpaceInvadersEnv":
+        """
+        Return an independent copy of the environment, e.g. for branching from
+        the current state in a tree search. Only the compact game state is
+        copied: the arrays of the array engine, the counters, the state of the
+        random number generator and the observation buffers. The blockade
+        masks are copied on write, and the assets, renderers and pygame objects
+        are shared with the environment.
+
+        Clones are always backed by the array engine. Clones of environments
+        with the sprite engine continue the game exactly like the sprites would,
+        without copying any sprites.
+        """
+        clone = copy.copy(self)
+        if self.array_engine is not None:
+            clone.array_engine = self.array_engine.clone()
+        else:
+            if self._clone_engine is None:
+                self._clone_engine = ArrayEngine(
+                    self.assets.player_im,
+                    self.assets.enemy_im,
+                    self.assets.laser_im,
+                    self.assets.blockade_im,
+                    swept=self.swept_collisions,
+                )
+            self._clone_engine.set_state(self._get_sprite_state())
+            clone.array_engine = self._clone_engine.clone()
+            clone.engine = "array"
+        clone._np_random = copy.deepcopy(self.np_random)
+        clone.profiler = PhaseProfiler(enabled=self.profiler.enabled)
+        # Observations of the clone are rendered into its own buffers
+        if self.symbolic_observation is None:
+            clone.set_obs_buffer(self.obs_buffer.copy())
+        if self._pool_buffer is not None:
+            clone._pool_buffer = self._pool_buffer.copy()
+        if self._frame_ring is not None:
+            clone._frame_ring = self._frame_ring.copy()
+            clone._update_stack_view()
+        return clone
+
+    def _get_sprite_state(self) -> dict[str, Any]:
+        """Return the state of the sprites in the format of ArrayEngine.get_state."""
+
+        # Killed enemies keep their place in the formation
+        formation = self.enemy_controller.formation
+        offsets = np.array(formation.offsets, dtype=np.int64)
+        enemy_x = formation.x + offsets[:, 0]
+        enemy_y = formation.y + offsets[:, 1]
+        enemy_alive = formation.alive.ravel().copy()
+        state = {
+            "player_x": np.int64(self.player.rect.x),
+            "lives": np.int64(self.player.lives),
+            "game_time": np.int64(self.game_time),
+            "level_number": np.int64(self.level_generator.level_number),
+            "enemy_x": enemy_x,
+            "enemy_y": enemy_y,
+            "enemy_alive": enemy_alive,
+            "enemy_direction": np.int64(formation.direction),
+            "enemy_speed": np.float64(self.enemy_controller.current_enemy_speed),
+            "enemy_blocked": np.bool_(self.enemy_controller.is_blocked),
+            "last_enemy_block_time": np.int64(self.last_enemy_block_time),
+            "last_enemy_unblock_time": np.int64(self.last_enemy_unblock_time),
+            "blockade_alive": np.stack(
+                [s.mask for s in self.blockade_controller.blockade_group.sprites()]
+            ),
+        }
+        for name, laser_controller in (
+            ("player_laser", self.player.laser_controller),
+            ("enemy_laser", self.enemy_controller.laser_controller),
         ):
-            self.enemy_controller.is_blocked = False
-            self.last_enemy_unblock_time = self.game_time
-        elif (
-            not self.enemy_controller.is_blocked
-            and self.game_time - self.last_enemy_unblock_time > 12
+            laser = laser_controller.sprite
+            state[f"{name}_active"] = np.bool_(laser is not None)
+            state[f"{name}_x"] = np.int64(laser.rect.x if laser else 0)
+            state[f"{name}_y"] = np.int64(laser.rect.y if laser else 0)
+        return state
+
+    def _set_sprite_state(self, state: dict[str, Any]) -> None:
+        """Rebuild the sprites from a state in the format of ArrayEngine.get_state."""
+
+        self.game_time = int(state["game_time"])
+        self.last_enemy_block_time = int(state["last_enemy_block_time"])
+        self.last_enemy_unblock_time = int(state["last_enemy_unblock_time"])
+        self.level_generator.level_number = int(state["level_number"])
+        self.player.rect.x = int(state["player_x"])
+        self.player.lives = int(state["lives"])
+        self.enemy_controller.empty()
+        self.enemy_controller.current_enemy_speed = float(state["enemy_speed"])
+        self.enemy_controller.is_blocked = bool(state["enemy_blocked"])
+        for formation_index in np.flatnonzero(state["enemy_alive"]):
+            enemy = self.level_generator.enemy_creator.create_enemy(
+                self.level_generator.enemy_im,
+                (
+                    int(state["enemy_x"][formation_index]),
+                    int(state["enemy_y"][formation_index]),
+                ),
+                self.enemy_controller.current_enemy_speed,
+            )
+            enemy.formation_index = int(formation_index)
+            enemy.movement_direction = int(state["enemy_direction"])
+            self.enemy_controller.add(enemy)
+        for name, laser_controller in (
+            ("player_laser", self.player.laser_controller),
+            ("enemy_laser", self.enemy_controller.laser_controller),
         ):
-            self.enemy_controller.is_blocked = True
-            self.last_enemy_block_time = self.game_time
-        last_player_shot_time = 0
-        if action == 0:
-            pass
-        elif action == 1:
-            self.player.update(left=True, dt=dt)
-        elif action == 2:
-            self.player.update(right=True, dt=dt)
-        elif action == 3:
-            if (
-                not self.player.laser_controller
-                and self.game_time - last_player_shot_time > 10
-            ):
-                self.player.laser_controller.add(
-                    Laser(laser_im, self.player.rect.midtop, LASER_BASE_SPEED)
+            laser_controller.empty()
+            if state[f"{name}_active"]:
+                position = (int(state[f"{name}_x"]), int(state[f"{name}_y"]))
+                laser_controller.add(
+                    Laser(self.assets.laser_im, position, LASER_BASE_SPEED)
                 )
-                last_player_shot_time = self.game_time
-        # Update laser positions
-        if self.player.laser_controller:
-            self.player.laser_controller.move_laser(dt)
-        self.enemy_controller.laser_controller.move_laser(dt)
-        # Check if something was hit by laser
-        if self.enemy_controller.laser_controller:
-            self.game_object_controller._check_blockade_hit_by_enemy_laser()
-        if self.player.laser_controller:
-            self.game_object_controller._check_blockade_hit_by_player_laser()
-        if self.game_object_controller._check_player_hit():
-            self.player.lives -= 1
+        self.blockade_controller.set_masks(state["blockade_alive"])
+
+    def get_profile(self) -> dict[str, dict[str, float]]:
+        """
+        Return the number of calls and the total, mean, last and maximal time in
+        milliseconds of every phase of step and reset since the profiler was
+        last reset. Empty unless the environment was created with profile=True.
+        """
+        return self.profiler.get_profile()
+
+    def _step_array_engine(self, action) -> tuple[int, bool]:
+        """Compute one step of the game with the array engine."""
+
+        enemy_hit, player_hit, terminated = self.array_engine.step(
+            [action], [self.np_random], self.dt
+        )
+        self.profiler.lap("simulation")
+        reward = 0
+        if player_hit[0]:
             reward += self.player_damage_reward
-        if self.game_object_controller._check_enemy_hit():
+        if enemy_hit[0]:
             reward += self.enemy_kill_reward
-            # Increase enemy speed based on number of remaining enemies
-            if self.number_of_remaining_enemies % 9 == 0:
-                new_enemy_speed = 1.1 * self.enemy_controller.current_enemy_speed
-                self.enemy_controller.set_enemy_speed(new_enemy_speed)
-        # Check if level is finished
-        if not self.enemy_controller:
-            self.canvas = self.load_new_level(self.canvas)
-            self.enemy_controller.set_enemy_speed(
-                ENEMY_BASE_SPEED * 1.05 * self.level_generator.level_number
+            self.killed_enemies += 1
+        self.game_time += 1
+        return reward, bool(terminated[0])
+
+    def _step_sprites(self, action) -> tuple[int, bool]:
+        """Compute one step of the game with the pygame sprites."""
+
+        enemy_hit, player_hit, terminated = self.tick(
+            self.dt, left=action == 1, right=action == 2, shoot=action == 3
+        )
+        reward = 0
+        if player_hit:
+            reward += self.player_damage_reward
+        if enemy_hit:
+            reward += self.enemy_kill_reward
+        return reward, terminated
+
+    def set_obs_buffer(self, buffer: np.ndarray) -> None:
+        """
+        Set the array that observations are written into, e.g. a slice of a
+        shared memory array of a vectorized environment. With frame stacking,
+        this is the array the newest frame is rendered into.
+        """
+        if buffer.shape != self.frame_shape or buffer.dtype != np.uint8:
+            raise ValueError(
+                f"Observation buffer should be a uint8 array of shape {self.frame_shape}."
             )
-        # Update enemy positions
-        if not self.enemy_controller.is_blocked:
-            self.enemy_controller.move_enemies(dt)
-            if self.enemy_controller.enemy_is_out_of_screen():
-                self.enemy_controller.move_enemies_row_down()
-                self.enemy_controller.switch_movement_direction()
-        # Exit game if enemy makes it to the bottom
-        if self.enemy_controller.enemy_height >= HEIGHT:
-            terminated = True
-        # Shoot new laser once old one is removed from screen
-        if not (self.enemy_controller.laser_controller):
-            chosen_enemy = self.np_random.choice(self.enemy_controller.sprites())
-            self.enemy_controller.laser_controller.add(
-                Laser(
-                    laser_im,
-                    chosen_enemy.rect.midbottom,
-                    LASER_BASE_SPEED,
+        self.obs_buffer = buffer
+        self._obs_view = buffer.view()
+        self._obs_view.flags.writeable = False
+
+    def _push_frame(self, fill: bool = False) -> None:
+        """
+        Add the frame in the observation buffer to the stacked frames. If fill
+        is True, the frame replaces all stacked frames, like after a reset.
+        """
+        if self._frame_ring is None:
+            return
+        k = self.frame_stack
+        if fill:
+            self._frame_ring[...] = self.obs_buffer
+            self._ring_position = k - 1
+        else:
+            self._ring_position = (self._ring_position + 1) % k
+            self._frame_ring[self._ring_position] = self.obs_buffer
+            self._frame_ring[self._ring_position + k] = self.obs_buffer
+        self._update_stack_view()
+
+    def _update_stack_view(self) -> None:
+        """Point the observation view at the last frame_stack frames of the ring."""
+
+        start = self._ring_position + 1
+        self._obs_view = self._frame_ring[start : start + self.frame_stack]
+        self._obs_view.flags.writeable = False
+
+    def _get_obs(self) -> np.ndarray:
+        """
+        Return the observation in the observation buffer, or the stacked
+        frames, as a copy or, if copy_obs is False, as a read-only view that is
+        overwritten by the next step. Symbolic observations are built from the
+        game state and always new arrays.
+        """
+        if self.symbolic_observation is not None:
+            obs = self.symbolic_obs()
+            if self.render_mode == "symbolic_array":
+                obs = self.symbolic_observation.flatten(obs)
+        else:
+            obs = self._obs_view.copy() if self.copy_obs else self._obs_view
+        self.profiler.lap("observation")
+        return obs
+
+    def _render_obs(self) -> None:
+        """
+        Render the observation of the current state of the game into the
+        observation buffer. Does nothing for symbolic observations.
+        """
+        if self.symbolic_observation is not None:
+            return
+        if self.observation_renderer is None:
+            raw_obs = self.render_frame()
+            self.profiler.lap("render")
+            convert_frame(
+                raw_obs,
+                self.width,
+                self.height,
+                self.render_mode,
+                self.obs_buffer,
+                self._gray_scale_scratch,
+            )
+        else:
+            if self.render_mode == "human":
+                self.render_frame()
+            if self.render_mode == "gray_scale_array":
+                frame = self.observation_renderer.render(self.object_positions())
+                self.profiler.lap("render")
+                to_gray_scale(frame, self.obs_buffer, self._gray_scale_scratch)
+            else:
+                self.observation_renderer.render(
+                    self.object_positions(), out=self.obs_buffer
                 )
+                self.profiler.lap("render")
+
+    def symbolic_obs(self) -> dict[str, np.ndarray]:
+        """
+        Return the symbolic observation of the current state of the game as
+        described in SymbolicObservation. Only available in the render modes
+        "symbolic" and "symbolic_array".
+        """
+        if self.array_engine is not None:
+            engine = self.array_engine
+            return self.symbolic_observation.build(
+                player_x=engine.player_x[0],
+                lives=engine.lives[0],
+                level=engine.level_number[0],
+                enemy_alive=engine.enemy_alive[0],
+                enemy_x=engine.enemy_x[0],
+                enemy_y=engine.enemy_y[0],
+                enemy_direction=engine.enemy_direction[0],
+                player_laser=(
+                    engine.player_laser_active[0],
+                    engine.player_laser_x[0],
+                    engine.player_laser_y[0],
+                ),
+                enemy_laser=(
+                    engine.enemy_laser_active[0],
+                    engine.enemy_laser_x[0],
+                    engine.enemy_laser_y[0],
+                ),
+                blockade_alive=engine.blockade_alive[0],
             )
-        # Check if player has no lives left
-        if self.player.lives <= 0:
-            terminated = True
-        raw_obs = self.render_frame()
-        obs = np.array(Image.fromarray(raw_obs).resize((self.height, self.width)))
-        if self.render_mode == "gray_scale_array":
-            obs = obs[..., :3] @ [0.299, 0.587, 0.114]
-            obs = obs.round().astype(np.uint8)
-        self.game_time += 1
-        info = self.info
-        return obs, reward, terminated, False, info
+        formation = self.enemy_controller.formation
+        offsets = self.symbolic_observation.enemy_offsets
+        lasers = []
+        for laser_controller in (
+            self.player.laser_controller,
+            self.enemy_controller.laser_controller,
+        ):
+            laser = laser_controller.sprite
+            if laser is None:
+                lasers.append((False, 0, 0))
+            else:
+                lasers.append((True, laser.rect.x, laser.rect.y))
+        return self.symbolic_observation.build(
+            player_x=self.player.rect.x,
+            lives=self.player.lives,
+            level=self.level_generator.level_number,
+            enemy_alive=formation.alive.ravel(),
+            enemy_x=formation.x + offsets[:, 0],
+            enemy_y=formation.y + offsets[:, 1],
+            enemy_direction=formation.direction,
+            player_laser=lasers[0],
+            enemy_laser=lasers[1],
+            blockade_alive=np.stack(
+                [s.mask for s in self.blockade_controller.blockade_group.sprites()]
+            ),
+        )
+
+    def object_positions(self) -> list[tuple[str, np.ndarray, np.ndarray]]:
+        """Return the kind and the positions of all visible objects in drawing order."""
+
+        if self.array_engine is not None:
+            return self.array_engine.object_positions()
+        return self.game_object_controller.object_positions()
 
     def render_frame(self) -> np.ndarray:
         """
@@ -215,7 +629,16 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
         """
         self.canvas.fill(BACKGROUND)
         # Draw all objects on canvas
-        self.game_object_controller._draw_all_objects(self.canvas)
+        if self.array_engine is not None:
+            self.array_engine.draw(self.canvas)
+        else:
+            self.game_object_controller._draw_all_objects(self.canvas)
+        if self.scoreboard is not None:
+            # Every killed enemy is worth 5 points like in the interactive game
+            self.scoreboard.score = 5 * self.killed_enemies
+            self.scoreboard.set_lives(max(self.player_lives, 0))
+            self.scoreboard.draw_score(self.canvas)
+            self.scoreboard.draw(self.canvas)
         if self.render_mode == "human":
             if self.screen is None:
                 pygame.init()
@@ -232,14 +655,24 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
 
     @property
     def number_of_remaining_enemies(self) -> int:
+        if self.array_engine is not None:
+            return int(self.array_engine.num_remaining_enemies[0])
         return len(self.enemy_controller)
 
+    @property
+    def player_lives(self) -> int:
+        if self.array_engine is not None:
+            return int(self.array_engine.lives[0])
+        return self.player.lives
+
     @property
     def enemy_advance(self) -> float:
         """
         Return the y-position of the most advanced enemy in the game relative to
         the distance between top and bottom of the screen.
         """
+        if self.array_engine is not None:
+            return int(self.array_engine.enemy_height[0]) / HEIGHT
         return self.enemy_controller.enemy_height / HEIGHT
 
     @property
@@ -253,7 +686,7 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
         return {
             "enemy_advance": self.enemy_advance,
             "num_remaining_enemies": self.number_of_remaining_enemies,
-            "player_lives": self.player.lives,
+            "player_lives": self.player_lives,
             "game_time": self.game_time,
         }
 
@@ -265,31 +698,51 @@ class SpaceInvadersEnv(Env, GameHandlerBase):
         super().reset(seed=seed)
         if options is not None:
             raise NotImplemented
+        self.profiler.start()
         # Create empty canvas
         self.canvas = pygame.Surface((WIDTH, HEIGHT))
         self.canvas.fill(BACKGROUND)
+        # Reset the state of the previous game
+        self.game_time = 0
+        self.killed_enemies = 0
+        self.last_enemy_block_time = 0
+        self.last_enemy_unblock_time = 0
+        if self.array_engine is not None:
+            self.array_engine.reset()
+            self.max_num_enemies = self.number_of_remaining_enemies
+        else:
+            self._reset_sprites()
+        self.profiler.lap("reset")
+        self._render_obs()
+        self._push_frame(fill=True)
+        obs = self._get_obs()
+        return obs, self.info
+
+    def _reset_sprites(self) -> None:
+        """Reset all sprites to the initial state of a new game."""
+
+        # Both engines draw all random numbers from the seeded generator
+        self.enemy_controller.np_random = self.np_random
+        self.level_generator.level_number = 0
+        self.player.lives = 3
+        self.player.rect.topleft = (
+            int(WIDTH / 2 - self.player.rect.width / 2),
+            HEIGHT - self.player.rect.height,
+        )
+        self.player.laser_controller.empty()
+        self.enemy_controller.laser_controller.empty()
+        self.enemy_controller.is_blocked = True
+        self.enemy_controller.current_enemy_speed = ENEMY_BASE_SPEED
         # Create blockades and enemies
         self.blockade_controller.blockade_group.empty()
         self.blockade_controller.create_all_blockade_structures()
         initial_enemies = next(self.level_generator)
         self.enemy_controller.empty()
         self.enemy_controller.add(initial_enemies)
-        self.player.rect.move(
-            (
-                WIDTH / 2 - self.player.rect.width / 2,
-                HEIGHT - self.player.rect.height,
-            )
-        )
         self.game_object_controller._clear_all_objects(self.canvas)
         self.game_object_controller._draw_all_objects(self.canvas)
         self.max_num_enemies = len(self.enemy_controller)
         self.canvas.blit(self.player.image, self.player.rect)
-        raw_obs = self.render_frame()
-        obs = np.array(Image.fromarray(raw_obs).resize((self.height, self.width)))
-        if self.render_mode == "gray_scale_array":
-            obs = obs[...,:3] @ [0.299, 0.587, 0.114]
-            obs = obs.round().astype(np.uint8)
-        return obs, self.info
 
     def close(self) -> None:
         if self.screen is not None:
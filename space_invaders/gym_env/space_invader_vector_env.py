@@ -0,0 +1,206 @@
+import numpy as np
+import pygame
+from typing import Any, Literal, Optional
+from gymnasium import spaces
+from gymnasium.utils import seeding
+from gymnasium.vector import VectorEnv
+from space_invaders.components import ArrayEngine
+from space_invaders.components.world import load_assets
+from space_invaders.gym_env.space_invader_env import (
+    WIDTH,
+    HEIGHT,
+    BACKGROUND,
+    convert_frame,
+    to_gray_scale,
+)
+from space_invaders.gym_env.observation_renderer import ObservationRenderer
+
+
+class SpaceInvadersVectorEnv(VectorEnv):
+    """
+    Vectorized environment that steps N independent games as one batched state
+    of an ArrayEngine. The game rules are the same as in SpaceInvadersEnv.step.
+
+    Sub-environments are reset automatically once they terminate or are
+    truncated. In that case the returned observation is the first observation
+    of the new game and the last observation and info of the finished game are
+    stored in the info under "final_observation" and "final_info".
+    """
+
+    metadata = {"render_modes": ["rgb_array", "gray_scale_array"], "autoreset": True}
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        width: int = 200,
+        heigth: int = 150,
+        render_mode: Literal["rgb_array", "gray_scale_array"] = "rgb_array",
+        reward: Optional[dict[Literal["enemy_kill", "player_damage"], int]] = None,
+        max_episode_steps: Optional[int] = None,
+        observation_renderer: Literal["pygame", "direct"] = "pygame",
+        supersample: int = 1,
+        copy: bool = True,
+        swept_collisions: bool = False,
+    ) -> None:
+        self.width = width
+        self.height = heigth
+        self.render_mode = render_mode
+        self.max_episode_steps = max_episode_steps
+        self.enemy_kill_reward: int = 1
+        self.player_damage_reward: int = -1
+        if reward is not None:
+            self.enemy_kill_reward = reward.get("enemy_kill")  # type: ignore
+            self.player_damage_reward = reward.get("player_damage")  # type: ignore
+        if self.render_mode == "gray_scale_array":
+            observation_space = spaces.Box(
+                low=0, high=255, shape=(width, heigth), dtype=np.uint8
+            )
+        elif self.render_mode == "rgb_array":
+            observation_space = spaces.Box(
+                low=0, high=255, shape=(width, heigth, 3), dtype=np.uint8
+            )
+        else:
+            raise ValueError(
+                f"Render mode should be one of {self.metadata["render_modes"]}."
+            )
+        # Actions are: (0) Do nothing, (1) move left, (2) move right and (3) shoot laser
+        super().__init__(num_envs, observation_space, spaces.Discrete(4))
+        assets = load_assets()
+        self.engine = ArrayEngine(
+            assets.player_im,
+            assets.enemy_im,
+            assets.laser_im,
+            assets.blockade_im,
+            num_games=num_envs,
+            swept=swept_collisions,
+        )
+        self.np_randoms = [seeding.np_random()[0] for _ in range(num_envs)]
+        if observation_renderer not in ["pygame", "direct"]:
+            raise ValueError('Observation renderer should be one of ["pygame", "direct"].')
+        # All games are drawn one after another on the same canvas or renderer
+        self.observation_renderer = None
+        if observation_renderer == "direct":
+            self.observation_renderer = ObservationRenderer(
+                assets, width, heigth, supersample
+            )
+        self.canvas = pygame.Surface((WIDTH, HEIGHT))
+        # Observations are written into preallocated buffers
+        self.copy = copy
+        self.observations = np.zeros(
+            self.observation_space.shape, dtype=np.uint8  # type: ignore
+        )
+        self._observations_view = self.observations.view()
+        self._observations_view.flags.writeable = False
+        self._gray_scale_scratch = np.zeros((2, width, heigth), dtype=np.uint32)
+        self._actions = np.zeros(num_envs, dtype=np.int64)
+
+    def reset_wait(
+        self,
+        seed: Optional[int | list[int]] = None,
+        options: Optional[dict] = None,
+    ) -> tuple[np.ndarray, dict]:
+        """
+        Reset all games. An integer seed seeds the game i with seed + i, a list
+        of seeds specifies the seed of every game.
+        """
+        # The games have no reset options, so options are rejected instead of
+        # silently ignored
+        if options is not None:
+            raise ValueError("SpaceInvadersVectorEnv does not support reset options.")
+        if seed is None:
+            seed = [None for _ in range(self.num_envs)]  # type: ignore
+        if isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        self.np_randoms = [seeding.np_random(s)[0] for s in seed]
+        self.engine.reset()
+        self._render_observations(np.arange(self.num_envs))
+        return self._get_observations(), self.info
+
+    def step_async(self, actions: Any) -> None:
+        self._actions[:] = actions
+
+    def step_wait(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Compute one step in every game and reset the finished games."""
+
+        enemy_hit, player_hit, terminated = self.engine.step(
+            self._actions, self.np_randoms
+        )
+        rewards = (
+            enemy_hit * self.enemy_kill_reward
+            + player_hit * self.player_damage_reward
+        )
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_episode_steps is not None:
+            truncated = self.engine.game_time >= self.max_episode_steps
+        self._render_observations(np.arange(self.num_envs))
+        infos = self.info
+        done = np.flatnonzero(terminated | truncated)
+        if len(done):
+            final_observations = np.full(self.num_envs, None, dtype=object)
+            final_infos = np.full(self.num_envs, None, dtype=object)
+            for game in done:
+                final_observations[game] = self.observations[game].copy()
+                final_infos[game] = {key: infos[key][game] for key in self._info_keys}
+            self.engine.reset(done)
+            self._render_observations(done)
+            infos = self.info
+            infos["final_observation"] = final_observations
+            infos["_final_observation"] = terminated | truncated
+            infos["final_info"] = final_infos
+            infos["_final_info"] = terminated | truncated
+        return self._get_observations(), rewards, terminated, truncated, infos
+
+    def _get_observations(self) -> np.ndarray:
+        """
+        Return a copy of the observations or, if copy is False, a read-only view
+        that is overwritten by the next step.
+        """
+        if self.copy:
+            return self.observations.copy()
+        return self._observations_view
+
+    def _render_observations(self, games: np.ndarray) -> None:
+        """Render the observations of the specified games."""
+
+        for game in games:
+            if self.observation_renderer is None:
+                self.canvas.fill(BACKGROUND)
+                self.engine.draw(self.canvas, game)
+                convert_frame(
+                    pygame.surfarray.pixels3d(self.canvas),
+                    self.width,
+                    self.height,
+                    self.render_mode,
+                    self.observations[game],
+                    self._gray_scale_scratch,
+                )
+            elif self.render_mode == "gray_scale_array":
+                frame = self.observation_renderer.render(
+                    self.engine.object_positions(game)
+                )
+                to_gray_scale(frame, self.observations[game], self._gray_scale_scratch)
+            else:
+                self.observation_renderer.render(
+                    self.engine.object_positions(game), out=self.observations[game]
+                )
+
+    _info_keys = ["enemy_advance", "num_remaining_enemies", "player_lives", "game_time"]
+
+    @property
+    def info(self) -> dict:
+        """
+        Provide the same information as SpaceInvadersEnv.info for every game,
+        batched in the format of gymnasium vector environments.
+        """
+        infos: dict[str, Any] = {
+            "enemy_advance": self.engine.enemy_height / HEIGHT,
+            "num_remaining_enemies": self.engine.num_remaining_enemies,
+            "player_lives": self.engine.lives.copy(),
+            "game_time": self.engine.game_time.copy(),
+        }
+        for key in self._info_keys:
+            infos[f"_{key}"] = np.ones(self.num_envs, dtype=bool)
+        return infos
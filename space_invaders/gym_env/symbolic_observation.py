@@ -0,0 +1,173 @@
+import numpy as np
+from gymnasium import spaces
+from space_invaders.components import LevelGenerator, config
+
+WIDTH = config["WIDTH"]
+HEIGHT = config["HEIGHT"]
+
+# Enemies are created column by column, so enemy i sits in column i // 5 and
+# row i % 5 of the formation
+FORMATION_SHAPE = LevelGenerator.formation_shape
+
+
+class SymbolicObservation:
+    """
+    Builder of fixed-size observations made straight from the game state,
+    without rasterizing anything. An observation is a dictionary of
+
+    - "player_x": the left edge of the player,
+    - "lives": the number of lives the player has left,
+    - "level": the current level,
+    - "enemy_alive": the (11, 5) grid of the enemies that are still alive,
+      indexed by (column, row) of the formation,
+    - "formation": the top left edge of the formation (the position of the
+      enemy in column 0 and row 0, even if it was killed) and its horizontal
+      movement direction,
+    - "player_laser", "enemy_laser": wether the laser is on screen and the
+      top left edge of the laser,
+    - "blockades": the fraction of the remaining blocks in every cell of
+      cell_size x cell_size blocks of every blockade structure.
+
+    Parameters
+    ----------
+    enemy_height : int
+        The height of the enemy image, which is the distance between the rows
+        of the formation.
+    blockade_shape : tuple[int, int, int]
+        The number of structures and the number of blocks of one structure in
+        x- and y-direction.
+    cell_size : int, default=5
+        The number of blocks in x- and y-direction that are pooled into one
+        cell of the blockade occupancy map.
+    """
+
+    def __init__(
+        self,
+        enemy_height: int,
+        blockade_shape: tuple[int, int, int],
+        cell_size: int = 5,
+    ) -> None:
+        num_structures, num_cols, num_rows = blockade_shape
+        if num_cols % cell_size or num_rows % cell_size:
+            raise ValueError(
+                f"Cell size should divide the blockade shape {blockade_shape[1:]}."
+            )
+        self.cell_size = cell_size
+        self.blockade_shape = (
+            num_structures,
+            num_cols // cell_size,
+            num_rows // cell_size,
+        )
+        # Offsets of the enemies to the top left enemy of the formation
+        self.enemy_offsets = LevelGenerator.formation_offsets(enemy_height)
+        position_low, position_high = [0, -WIDTH, -HEIGHT], [1, WIDTH, HEIGHT]
+        self.space = spaces.Dict(
+            {
+                "player_x": spaces.Box(0, WIDTH, shape=(1,), dtype=np.int64),
+                "lives": spaces.Box(0, 3, shape=(1,), dtype=np.int64),
+                "level": spaces.Box(
+                    0, np.iinfo(np.int32).max, shape=(1,), dtype=np.int64
+                ),
+                "enemy_alive": spaces.MultiBinary(FORMATION_SHAPE),
+                "formation": spaces.Box(
+                    np.array([-WIDTH, -HEIGHT, -1]),
+                    np.array([WIDTH, HEIGHT, 1]),
+                    dtype=np.int64,
+                ),
+                "player_laser": spaces.Box(
+                    np.array(position_low), np.array(position_high), dtype=np.int64
+                ),
+                "enemy_laser": spaces.Box(
+                    np.array(position_low), np.array(position_high), dtype=np.int64
+                ),
+                "blockades": spaces.Box(
+                    0, 1, shape=self.blockade_shape, dtype=np.float32
+                ),
+            }
+        )
+        # The flat observation concatenates all entries in the order of the space
+        self.flat_space = spaces.Box(
+            np.concatenate(
+                [self._bound(space, "low") for space in self.space.values()]
+            ),
+            np.concatenate(
+                [self._bound(space, "high") for space in self.space.values()]
+            ),
+            dtype=np.float32,
+        )
+
+    @staticmethod
+    def _bound(space: spaces.Space, bound: str) -> np.ndarray:
+        """Return the flattened lower or upper bound of a Box or MultiBinary space."""
+
+        if isinstance(space, spaces.MultiBinary):
+            value = 0 if bound == "low" else 1
+            return np.full(int(np.prod(space.shape)), value, dtype=np.float32)
+        return getattr(space, bound).astype(np.float32).ravel()
+
+    def build(
+        self,
+        player_x: int,
+        lives: int,
+        level: int,
+        enemy_alive: np.ndarray,
+        enemy_x: np.ndarray,
+        enemy_y: np.ndarray,
+        enemy_direction: int,
+        player_laser: tuple[bool, int, int],
+        enemy_laser: tuple[bool, int, int],
+        blockade_alive: np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        """
+        Build one observation.
+
+        Parameters
+        ----------
+        enemy_alive : np.ndarray
+            Mask of the living enemies in the order of
+            LevelGenerator.enemy_positions.
+        enemy_x, enemy_y : np.ndarray
+            The top left edge of every enemy, only read for living enemies.
+        player_laser, enemy_laser : tuple[bool, int, int]
+            Wether the laser is on screen and its top left edge.
+        blockade_alive : np.ndarray
+            Mask of the remaining blocks of all structures, shaped
+            (num_structures, num_columns, num_rows).
+        """
+        formation = np.array([0, 0, enemy_direction], dtype=np.int64)
+        living = np.flatnonzero(enemy_alive)
+        if len(living):
+            # All enemies move together, so any living enemy locates the formation
+            enemy = living[0]
+            formation[0] = enemy_x[enemy] - self.enemy_offsets[enemy, 0]
+            formation[1] = enemy_y[enemy] - self.enemy_offsets[enemy, 1]
+        num_structures, num_cols, num_rows = self.blockade_shape
+        k = self.cell_size
+        blockades = np.asarray(blockade_alive).reshape(
+            num_structures, num_cols, k, num_rows, k
+        )
+        return {
+            "player_x": np.array([player_x], dtype=np.int64),
+            "lives": np.array([lives], dtype=np.int64),
+            "level": np.array([level], dtype=np.int64),
+            "enemy_alive": np.asarray(enemy_alive, dtype=np.int8).reshape(
+                FORMATION_SHAPE
+            ),
+            "formation": formation,
+            "player_laser": self._laser(*player_laser),
+            "enemy_laser": self._laser(*enemy_laser),
+            "blockades": blockades.mean(axis=(2, 4), dtype=np.float32),
+        }
+
+    @staticmethod
+    def _laser(active: bool, x: int, y: int) -> np.ndarray:
+        if not active:
+            return np.zeros(3, dtype=np.int64)
+        return np.array([1, x, y], dtype=np.int64)
+
+    def flatten(self, obs: dict[str, np.ndarray]) -> np.ndarray:
+        """Concatenate all entries of an observation into one float32 array."""
+
+        return np.concatenate(
+            [obs[key].ravel() for key in self.space.keys()], dtype=np.float32
+        )
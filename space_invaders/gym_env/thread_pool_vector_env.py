@@ -0,0 +1,68 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Any, Callable, Iterable, Optional
+from gymnasium import Env, Space
+from gymnasium.vector import SyncVectorEnv
+from gymnasium.vector.utils import concatenate
+
+
+class ThreadPoolVectorEnv(SyncVectorEnv):
+    """
+    Vectorized environment that hosts many independent environments in one
+    process and steps them concurrently in a thread pool. Sub-environments are
+    reset automatically like in gymnasium.vector.SyncVectorEnv.
+
+    Every sub-environment has to own its game objects, which is the case for
+    all SpaceInvadersEnv instances created without explicitly shared objects.
+    """
+
+    def __init__(
+        self,
+        env_fns: Iterable[Callable[[], Env]],
+        observation_space: Optional[Space] = None,
+        action_space: Optional[Space] = None,
+        copy: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        super().__init__(env_fns, observation_space, action_space, copy)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _step_env(self, env: Env, action: Any) -> tuple:
+        """Step one sub-environment and reset it if its game has finished."""
+
+        observation, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            old_observation, old_info = observation, info
+            observation, info = env.reset()
+            info["final_observation"] = old_observation
+            info["final_info"] = old_info
+        return observation, reward, terminated, truncated, info
+
+    def step_wait(self) -> tuple[Any, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Step all sub-environments concurrently and return the batched results."""
+
+        observations, infos = [], {}
+        results = self.executor.map(self._step_env, self.envs, self._actions)
+        for i, (observation, reward, terminated, truncated, info) in enumerate(
+            results
+        ):
+            self._rewards[i] = reward
+            self._terminateds[i] = terminated
+            self._truncateds[i] = truncated
+            observations.append(observation)
+            infos = self._add_info(infos, info, i)
+        self.observations = concatenate(
+            self.single_observation_space, observations, self.observations
+        )
+        return (
+            deepcopy(self.observations) if self.copy else self.observations,
+            np.copy(self._rewards),
+            np.copy(self._terminateds),
+            np.copy(self._truncateds),
+            infos,
+        )
+
+    def close_extras(self, **kwargs) -> None:
+        self.executor.shutdown()
+        super().close_extras(**kwargs)
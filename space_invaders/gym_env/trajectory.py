@@ -0,0 +1,354 @@
+import json
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from gymnasium import Env, Wrapper, spaces
+
+INDEX_FILE = "index.json"
+
+
+class ChunkWriter:
+    """
+    Collects rows of one array in a preallocated buffer and writes every full
+    buffer as one chunk file in a background thread.
+
+    Parameters
+    ----------
+    directory : Path
+        The directory the chunk files are written to.
+    prefix : str
+        The prefix of the chunk file names.
+    shape : tuple[int, ...]
+        The shape of one row.
+    dtype : np.dtype
+        The data type of the rows, which may be a structured data type.
+    executor : ThreadPoolExecutor
+        The executor that writes the chunk files.
+    chunk_size : int
+        The number of rows of a full chunk.
+    compress : bool
+        Wether chunks are written as compressed .npz files or as .npy files,
+        which can be memory-mapped by the reader.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str,
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+        executor: ThreadPoolExecutor,
+        chunk_size: int,
+        compress: bool,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.shape = shape
+        self.dtype = dtype
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.buffer = np.empty((chunk_size, *shape), dtype=dtype)
+        self.num_buffered = 0
+        # File name and number of rows of every submitted chunk
+        self.chunks: list[tuple[str, int]] = []
+        self.pending: list[Future] = []
+
+    def append(self, row: Any) -> None:
+        """Add one row and write the buffer once it is full."""
+
+        self.buffer[self.num_buffered] = row
+        self.num_buffered += 1
+        if self.num_buffered == self.chunk_size:
+            self.write_buffer()
+
+    def write_buffer(self) -> None:
+        """Write the buffered rows as one chunk in the background."""
+
+        if self.num_buffered == 0:
+            return
+        suffix = ".npz" if self.compress else ".npy"
+        name = f"{self.prefix}_{len(self.chunks):06d}{suffix}"
+        self.chunks.append((name, self.num_buffered))
+        # At most two chunks are in flight, which bounds the memory usage
+        while len(self.pending) >= 2:
+            self.pending.pop(0).result()
+        self.pending.append(
+            self.executor.submit(
+                self._write, self.directory / name, self.buffer[: self.num_buffered]
+            )
+        )
+        self.buffer = np.empty_like(self.buffer)
+        self.num_buffered = 0
+
+    def _write(self, path: Path, rows: np.ndarray) -> None:
+        if self.compress:
+            np.savez_compressed(path, data=rows)
+        else:
+            np.save(path, rows)
+
+    def wait(self) -> None:
+        """Wait until all submitted chunks are written."""
+
+        while self.pending:
+            self.pending.pop(0).result()
+
+
+class TrajectoryRecorder(Wrapper):
+    """
+    Wrapper that records every transition of an environment to disk. Steps
+    are collected in chunks of chunk_size rows, which are compressed and
+    written in a background thread, so the memory usage does not grow with
+    the length of the recording.
+
+    The recording consists of two streams of chunk files and an index file:
+    the observations returned by reset and step, and the steps, which are
+    rows of a structured array of the action, reward, terminated, truncated
+    and all numeric entries of the info. The index is written by flush and
+    close. Recordings are read with TrajectoryReader.
+
+    Parameters
+    ----------
+    env : Env
+        The environment to record. Its observation space has to be a Box,
+        e.g. use the "symbolic_array" render mode for symbolic observations.
+    directory : str or Path
+        The directory of the recording, which is created if necessary.
+    chunk_size : int, default=1000
+        The number of observations or steps of one chunk file.
+    compress : bool, default=True
+        Wether chunks are written as compressed .npz files. Uncompressed
+        chunks are written as .npy files, which the reader memory-maps.
+    """
+
+    def __init__(
+        self,
+        env: Env,
+        directory: str | Path,
+        chunk_size: int = 1000,
+        compress: bool = True,
+    ) -> None:
+        super().__init__(env)
+        if not isinstance(env.observation_space, spaces.Box):
+            raise ValueError("Only Box observation spaces can be recorded.")
+        if chunk_size < 1:
+            raise ValueError("Chunk size should be at least 1.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.observation_writer = ChunkWriter(
+            self.directory,
+            "observations",
+            env.observation_space.shape,
+            env.observation_space.dtype,
+            self.executor,
+            chunk_size,
+            compress,
+        )
+        # The step data type is known once the first info is seen
+        self.step_writer: Optional[ChunkWriter] = None
+        self.num_steps = 0
+        # Index of the first step of every episode
+        self.episode_starts: list[int] = []
+
+    def reset(self, **kwargs) -> tuple[Any, dict]:
+        obs, info = self.env.reset(**kwargs)
+        self.episode_starts.append(self.num_steps)
+        self.observation_writer.append(obs)
+        return obs, info
+
+    def step(self, action: Any) -> tuple[Any, Any, bool, bool, dict]:
+        if not self.episode_starts:
+            raise RuntimeError("The environment has to be reset before stepping.")
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        if self.step_writer is None:
+            self.step_writer = ChunkWriter(
+                self.directory,
+                "steps",
+                (),
+                self._step_dtype(info),
+                self.executor,
+                self.chunk_size,
+                self.compress,
+            )
+        row = (action, reward, terminated, truncated) + tuple(
+            info[name] for name in self.step_writer.dtype.names[4:]
+        )
+        self.step_writer.append(row)
+        self.observation_writer.append(obs)
+        self.num_steps += 1
+        return obs, reward, terminated, truncated, info
+
+    def _step_dtype(self, info: dict) -> np.dtype:
+        """Return the structured data type of a step with the numeric infos."""
+
+        action_space = self.env.action_space
+        fields = [
+            ("action", action_space.dtype, action_space.shape),
+            ("reward", np.float64),
+            ("terminated", np.bool_),
+            ("truncated", np.bool_),
+        ]
+        for name, value in info.items():
+            if isinstance(value, (bool, int, float, np.number, np.bool_)):
+                fields.append((name, np.asarray(value).dtype))
+        return np.dtype(fields)
+
+    def flush(self) -> None:
+        """
+        Write all buffered observations and steps and the index, so that the
+        recording so far can be read.
+        """
+        writers = [self.observation_writer]
+        if self.step_writer is not None:
+            writers.append(self.step_writer)
+        for writer in writers:
+            writer.write_buffer()
+        for writer in writers:
+            writer.wait()
+        index = {
+            "observation_chunks": self.observation_writer.chunks,
+            "step_chunks": self.step_writer.chunks if self.step_writer else [],
+            "episode_starts": self.episode_starts,
+        }
+        (self.directory / INDEX_FILE).write_text(json.dumps(index))
+
+    def close(self) -> None:
+        self.flush()
+        self.executor.shutdown()
+        super().close()
+
+
+class ChunkedArray:
+    """
+    Read-only view of an array that is split into chunk files along its first
+    axis. Chunks are loaded on access, and the last cache_size loaded chunks
+    are kept in memory. Uncompressed chunks are memory-mapped.
+    """
+
+    def __init__(
+        self, directory: Path, chunks: list[tuple[str, int]], cache_size: int
+    ) -> None:
+        self.directory = directory
+        self.files = [name for name, _ in chunks]
+        self.offsets = np.cumsum([0] + [num_rows for _, num_rows in chunks])
+        self.cache_size = cache_size
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def chunk(self, index: int) -> np.ndarray:
+        """Return the rows of one chunk."""
+
+        rows = self._cache.get(index)
+        if rows is not None:
+            self._cache.move_to_end(index)
+            return rows
+        path = self.directory / self.files[index]
+        if path.suffix == ".npz":
+            with np.load(path) as archive:
+                rows = archive["data"]
+        else:
+            rows = np.load(path, mmap_mode="r")
+        self._cache[index] = rows
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rows
+
+    def take(self, indices: np.ndarray) -> np.ndarray:
+        """Return the rows at the indices, loading every chunk only once."""
+
+        indices = np.asarray(indices)
+        chunks = np.searchsorted(self.offsets, indices, side="right") - 1
+        rows = None
+        for chunk in np.unique(chunks):
+            chunk_rows = self.chunk(int(chunk))
+            if rows is None:
+                rows = np.empty(
+                    (*indices.shape, *chunk_rows.shape[1:]), dtype=chunk_rows.dtype
+                )
+            selected = chunks == chunk
+            rows[selected] = chunk_rows[indices[selected] - self.offsets[chunk]]
+        return rows
+
+
+class TrajectoryReader:
+    """
+    Lazy reader of a recording of TrajectoryRecorder. Transitions can be read
+    by index, iterated in order or sampled at random, and only the chunks that
+    contain the requested transitions are loaded.
+
+    A transition is a dictionary of the observation the action was taken in
+    ("obs"), the "action", "reward", "terminated", "truncated", the
+    observation after the step ("next_obs") and the recorded numeric entries
+    of the info ("info").
+
+    Parameters
+    ----------
+    directory : str or Path
+        The directory of the recording.
+    cache_size : int, default=4
+        The number of chunks of every stream that are kept in memory.
+    """
+
+    def __init__(self, directory: str | Path, cache_size: int = 4) -> None:
+        self.directory = Path(directory)
+        index = json.loads((self.directory / INDEX_FILE).read_text())
+        self.observations = ChunkedArray(
+            self.directory, index["observation_chunks"], cache_size
+        )
+        self.steps = ChunkedArray(self.directory, index["step_chunks"], cache_size)
+        self.episode_starts = np.array(index["episode_starts"], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def num_episodes(self) -> int:
+        return len(self.episode_starts)
+
+    def episode_range(self, episode: int) -> range:
+        """Return the indices of the transitions of one episode."""
+
+        starts = [*self.episode_starts, len(self)]
+        return range(starts[episode], starts[episode + 1])
+
+    def transitions(self, indices: Any) -> dict[str, Any]:
+        """Return the transitions at the indices with every entry stacked."""
+
+        indices = np.asarray(indices, dtype=np.int64)
+        # Every episode starts with the observation returned by reset
+        episodes = np.searchsorted(self.episode_starts, indices, side="right") - 1
+        steps = self.steps.take(indices)
+        return {
+            "obs": self.observations.take(indices + episodes),
+            "action": steps["action"],
+            "reward": steps["reward"],
+            "terminated": steps["terminated"],
+            "truncated": steps["truncated"],
+            "next_obs": self.observations.take(indices + episodes + 1),
+            "info": {name: steps[name] for name in steps.dtype.names[4:]},
+        }
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        if not -len(self) <= index < len(self):
+            raise IndexError("Transition index out of range.")
+        return self.transitions(index % len(self))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for index in range(len(self)):
+            yield self.transitions(index)
+
+    def sample(
+        self, batch_size: int, np_random: Optional[np.random.Generator] = None
+    ) -> dict[str, Any]:
+        """Return a batch of transitions drawn uniformly at random."""
+
+        if np_random is None:
+            np_random = np.random.default_rng()
+        return self.transitions(np_random.integers(len(self), size=batch_size))
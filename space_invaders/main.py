@@ -1,64 +1,59 @@
+import argparse
 import pygame
-from typing import Any
 from space_invaders.components import (
-    Player,
-    BlockadeGroup,
-    BlockadeController,
-    EnemyCreator,
-    EnemyController,
-    LaserController,
-    GameObjectController,
     GameHandler,
-    LevelGenerator,
     ScoreBoard,
     config,
+    create_world,
+    load_assets,
 )
 
 
-def load_assets() -> list[Any]:
-    player_im = pygame.image.load("space_invaders/assets/player.png")
-    enemy_im = pygame.image.load("space_invaders/assets/alien.gif")
-    blockade_im = pygame.image.load("space_invaders/assets/blockade.png")
-    return [player_im, enemy_im, blockade_im]
-
-
-def rescale_image(image: pygame.Surface, scale: tuple[int, int]) -> pygame.Surface:
-    image = pygame.transform.scale(image, scale)
-    return image
-
-
 def main():
+    parser = argparse.ArgumentParser(description="Play space invaders.")
+    parser.add_argument(
+        "--profile", action="store_true", help="show a frame time breakdown"
+    )
+    parser.add_argument(
+        "--full-update",
+        action="store_true",
+        help="update the whole screen every frame instead of the changed areas",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="seed of the random shots of the enemies"
+    )
+    parser.add_argument(
+        "--swept-collisions",
+        action="store_true",
+        help="test laser collisions along the whole path covered in a frame",
+    )
+    parser.add_argument(
+        "--uncapped",
+        action="store_true",
+        help="compute one tick per frame as fast as possible, e.g. for soak tests",
+    )
+    parser.add_argument(
+        "--max-ticks", type=int, help="stop the game after this many ticks"
+    )
+    args = parser.parse_args()
     WIDTH = config["WIDTH"]
     HEIGHT = config["HEIGHT"]
-    PLAYER_BASE_SPEED = config["PLAYER_BASE_SPEED"]
 
-    player_im, enemy_im, blockade_im = load_assets()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    player_im = rescale_image(player_im, (0.05 * WIDTH, 0.08 * HEIGHT))
-    enemy_im = rescale_image(enemy_im, (0.05 * WIDTH, 0.08 * HEIGHT))
-    blockade_im = rescale_image(blockade_im, (0.007 * WIDTH, 0.007 * WIDTH))
-    enemy_laser_controller = LaserController(laser_direction="down")
-    player_laser_controller = LaserController(laser_direction="up")
-    player = Player(
-        player_im,
-        (
-            screen.get_rect().centerx - player_im.get_rect().width / 2,
-            screen.get_rect().bottom - player_im.get_rect().height,
-        ),
-        PLAYER_BASE_SPEED,
-        player_laser_controller,
-    )
-    weak_enemy_creator = EnemyCreator(type="weak")
-    level_generator = LevelGenerator(weak_enemy_creator)
-    enemy_controller = EnemyController(enemy_laser_controller)
-    blockade_group = BlockadeGroup()
-    blockade_controller = BlockadeController(blockade_im, blockade_group)
-    scoreboard = ScoreBoard(player_im)
-    game_obj_controller = GameObjectController(
-        player, enemy_controller, blockade_controller
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    assets = load_assets()
+    game_obj_controller, level_generator = create_world(assets)
+    scoreboard = ScoreBoard(assets.player_im)
+    game = GameHandler(
+        game_obj_controller,
+        level_generator,
+        scoreboard,
+        seed=args.seed,
+        profile=args.profile,
+        dirty_rects=not args.full_update,
+        swept_collisions=args.swept_collisions,
+        fps=None if args.uncapped else 50,
     )
-    game = GameHandler(game_obj_controller, level_generator, scoreboard)
-    game.game_loop()
+    game.game_loop(max_ticks=args.max_ticks)
 
 
 if __name__ == "__main__":
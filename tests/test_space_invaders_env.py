@@ -1,6 +1,22 @@
+import os
+import pickle
 import pytest
+import signal
+import subprocess
+import sys
 import space_invaders
 import gymnasium
+import numpy as np
+import pygame
+from space_invaders.components import Blockade, Laser, get_assets, get_config
+from space_invaders.components.resources import ASSET_FILES, load_image
+from space_invaders.gym_env import (
+    SharedMemoryVectorEnv,
+    ThreadPoolVectorEnv,
+    TrajectoryReader,
+    TrajectoryRecorder,
+)
+from space_invaders.gym_env.space_invader_env import to_gray_scale
 
 
 def test_observation_space_shape():
@@ -28,3 +44,632 @@ def test_reward():
         obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
         total_reward += reward  # type: ignore
         assert any((reward == 0, reward == -5, reward == 10))
+
+
+def test_array_engine_matches_sprite_engine():
+    sprite_env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    array_env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode="rgb_array", engine="array"
+    )
+    sprite_obs, sprite_info = sprite_env.reset(seed=0)
+    array_obs, array_info = array_env.reset(seed=0)
+    assert (sprite_obs == array_obs).all()
+    assert sprite_info == array_info
+    for action in [3, 1, 1, 3, 2, 0, 3, 2, 2, 3] * 20:
+        sprite_obs, *sprite_result = sprite_env.step(action)
+        array_obs, *array_result = array_env.step(action)
+        assert (sprite_obs == array_obs).all()
+        assert sprite_result == array_result
+
+
+def test_vector_env_matches_single_envs():
+    vector_env = gymnasium.make_vec(
+        "CustomSpaceInvaders-v0", num_envs=3, vectorization_mode="custom"
+    )
+    envs = [
+        gymnasium.make(
+            "CustomSpaceInvaders-v0", render_mode="rgb_array", engine="array"
+        )
+        for _ in range(3)
+    ]
+    vector_obs, _ = vector_env.reset(seed=1)
+    assert vector_obs.shape == vector_env.observation_space.shape
+    for i, env in enumerate(envs):
+        obs, _ = env.reset(seed=1 + i)
+        assert (obs == vector_obs[i]).all()
+    for actions in [[3, 1, 2], [0, 3, 3], [2, 2, 1], [1, 0, 3]] * 10:
+        vector_obs, rewards, terminated, _, infos = vector_env.step(actions)
+        for i, env in enumerate(envs):
+            obs, reward, env_terminated, _, info = env.step(actions[i])
+            assert (obs == vector_obs[i]).all()
+            assert reward == rewards[i]
+            assert env_terminated == terminated[i]
+            assert info == {key: infos[key][i] for key in info}
+    with pytest.raises(ValueError):
+        vector_env.reset(options={})
+
+
+def test_envs_in_same_process_are_independent():
+    first_env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    second_env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    first_obs, _ = first_env.reset(seed=0)
+    second_env.reset(seed=0)
+    for _ in range(20):
+        second_env.step(1)
+    assert first_env.unwrapped.player is not second_env.unwrapped.player
+    assert (
+        first_env.unwrapped.render_frame() != second_env.unwrapped.render_frame()
+    ).any()
+    assert first_env.unwrapped.info["game_time"] == 0
+    sync_env = gymnasium.vector.SyncVectorEnv(
+        [lambda: gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")] * 2
+    )
+    thread_env = ThreadPoolVectorEnv(
+        [lambda: gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")] * 2
+    )
+    sync_obs, _ = sync_env.reset(seed=3)
+    thread_obs, _ = thread_env.reset(seed=3)
+    for actions in [[3, 1], [1, 3], [2, 2], [3, 0]] * 5:
+        sync_obs, sync_rewards, *_ = sync_env.step(actions)
+        thread_obs, thread_rewards, *_ = thread_env.step(actions)
+        assert (sync_obs == thread_obs).all()
+        assert (sync_rewards == thread_rewards).all()
+    thread_env.close()
+
+
+@pytest.mark.parametrize("render_mode", ["rgb_array", "gray_scale_array"])
+@pytest.mark.parametrize("supersample", [1, 3])
+def test_direct_observation_renderer_is_pixel_close(render_mode, supersample):
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode=render_mode, engine="array"
+    )
+    direct_env = gymnasium.make(
+        "CustomSpaceInvaders-v0",
+        render_mode=render_mode,
+        engine="array",
+        observation_renderer="direct",
+        supersample=supersample,
+    )
+    obs, _ = env.reset(seed=0)
+    direct_obs, _ = direct_env.reset(seed=0)
+    assert direct_obs.shape == direct_env.observation_space.shape
+    for action in [3, 1, 1, 3, 2, 0] * 5:
+        obs, *_ = env.step(action)
+        direct_obs, *_ = direct_env.step(action)
+        assert direct_obs.dtype == obs.dtype
+        assert abs(obs.astype(int) - direct_obs).mean() < 5
+
+
+def test_observation_buffers():
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0",
+        render_mode="gray_scale_array",
+        observation_renderer="direct",
+        copy_obs=False,
+    )
+    obs, _ = env.reset(seed=0)
+    assert not obs.flags.writeable
+    next_obs, *_ = env.step(3)
+    assert np.shares_memory(obs, next_obs)
+    buffer = np.zeros(env.observation_space.shape, dtype=np.uint8)
+    env.unwrapped.set_obs_buffer(buffer)
+    obs, *_ = env.step(1)
+    assert np.shares_memory(obs, buffer)
+    assert (obs == buffer).all() and buffer.any()
+    rgb = np.random.default_rng(0).integers(0, 256, (50, 40, 3), dtype=np.uint8)
+    expected = (rgb @ [0.299, 0.587, 0.114]).round()
+    assert abs(to_gray_scale(rgb) - expected).max() <= 1
+
+
+def test_blockade_structures_match_block_sprites():
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    env.reset(seed=0)
+    blockade_controller = env.unwrapped.game_object_controller.blockade_controller
+    blockade_group = blockade_controller.blockade_group
+    blocks = pygame.sprite.Group(
+        Blockade(blockade_controller.blockade_im, position)
+        for position in blockade_controller.blockade_positions()
+    )
+    assert len(blockade_group) == 4
+    rng = np.random.default_rng(0)
+    for x, y, w, h in zip(
+        rng.integers(80, 1200, 300),
+        rng.integers(560, 760, 300),
+        rng.integers(1, 20, 300),
+        rng.integers(1, 40, 300),
+    ):
+        laser = pygame.sprite.Sprite()
+        laser.rect = pygame.Rect(int(x), int(y), int(w), int(h))
+        is_hit = bool(pygame.sprite.spritecollide(laser, blocks, dokill=True))
+        assert blockade_group.hit(laser.rect) == is_hit
+        xs, ys = blockade_group.block_positions()
+        assert sorted(zip(xs.tolist(), ys.tolist())) == sorted(
+            block.rect.topleft for block in blocks
+        )
+
+
+def test_assets_are_cached_and_independent_of_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    get_config.cache_clear()
+    assert get_config()["WIDTH"] == 1200
+    assert get_assets() is get_assets(1200, 900)
+    assert get_assets(600, 450).player_im.get_size() == (30, 36)
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    env.reset(seed=0)
+    assert env.unwrapped.assets is get_assets()
+
+
+def test_prepared_assets_blit_like_loaded_images():
+    canvas = pygame.Surface((100, 100))
+    assets = get_assets()
+    for name, image in zip(
+        ASSET_FILES,
+        [assets.player_im, assets.enemy_im, assets.laser_im, assets.blockade_im],
+    ):
+        # Without a display, images are converted to the format of the canvas
+        assert image.get_masks()[:3] == canvas.get_masks()[:3]
+        loaded_image = pygame.transform.scale(load_image(name), image.get_size())
+        frames = []
+        for source in [loaded_image, image]:
+            canvas.fill((10, 20, 30))
+            canvas.blit(source, (5, 5))
+            frames.append(pygame.surfarray.array3d(canvas))
+        assert (frames[0] == frames[1]).all()
+
+
+def test_package_import_is_lazy():
+    code = (
+        "import sys, space_invaders, space_invaders.components, space_invaders.gym_env;"
+        "print(sorted({'pygame', 'PIL', 'yaml'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("engine", ["sprite", "array"])
+def test_profile(engine):
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode="rgb_array", engine=engine
+    )
+    env.reset(seed=0)
+    _, _, _, _, info = env.step(0)
+    assert "profile" not in info and env.unwrapped.get_profile() == {}
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode="rgb_array", engine=engine, profile=True
+    )
+    env.reset(seed=0)
+    for _ in range(5):
+        _, _, _, _, info = env.step(3)
+    assert info["profile"]["reset"]["calls"] == 1
+    assert info["profile"]["render"]["calls"] == 6
+    assert info["profile"]["observation"]["total_ms"] > 0
+    step_phase = "simulation" if engine == "array" else "enemy_motion"
+    assert info["profile"][step_phase]["calls"] == 5
+
+
+def test_symbolic_observation(monkeypatch):
+    envs = [
+        gymnasium.make("CustomSpaceInvaders-v0", render_mode="symbolic", engine=engine)
+        for engine in ["sprite", "array"]
+    ]
+    flat_env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="symbolic_array")
+    for env in [*envs, flat_env]:
+        # Symbolic observations never rasterize the screen
+        monkeypatch.setattr(env.unwrapped, "render_frame", None)
+        env.reset(seed=0)
+    for action in [3, 1, 1, 3, 2, 0, 3, 2, 2, 3] * 20:
+        sprite_obs, array_obs = [env.step(action)[0] for env in envs]
+        flat_obs, *_ = flat_env.step(action)
+        assert envs[0].observation_space.contains(sprite_obs)
+        assert flat_env.observation_space.contains(flat_obs)
+        for key, value in sprite_obs.items():
+            assert np.array_equal(value, array_obs[key])
+        flat_sprite_obs = gymnasium.spaces.flatten(
+            envs[0].observation_space, sprite_obs
+        )
+        assert np.array_equal(flat_obs, flat_sprite_obs)
+    assert sprite_obs["enemy_alive"].shape == (11, 5)
+    assert not sprite_obs["enemy_alive"].all()
+
+
+@pytest.mark.parametrize("max_pool", [False, True])
+def test_frameskip(max_pool):
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array")
+    skip_env = gymnasium.make(
+        "CustomSpaceInvaders-v0",
+        render_mode="rgb_array",
+        frameskip=4,
+        max_pool=max_pool,
+    )
+    env.reset(seed=0)
+    skip_env.reset(seed=0)
+    for action in [3, 1, 2, 3, 0] * 4:
+        skip_obs, skip_reward, skip_terminated, _, skip_info = skip_env.step(action)
+        frames, total_reward = [], 0
+        for _ in range(4):
+            obs, reward, terminated, _, info = env.step(action)
+            frames.append(obs)
+            total_reward += reward
+        expected_obs = np.maximum(*frames[-2:]) if max_pool else frames[-1]
+        assert (skip_obs == expected_obs).all()
+        assert (skip_reward, skip_terminated) == (total_reward, terminated)
+        assert skip_info == info
+
+
+def test_frame_stack():
+    env = gymnasium.wrappers.FrameStack(
+        gymnasium.make("CustomSpaceInvaders-v0", render_mode="gray_scale_array"), 4
+    )
+    stack_env = gymnasium.make(
+        "CustomSpaceInvaders-v0",
+        render_mode="gray_scale_array",
+        frame_stack=4,
+        copy_obs=False,
+    )
+    assert stack_env.observation_space.shape == (4, 200, 150)
+    for seed in [0, 1]:
+        obs, _ = env.reset(seed=seed)
+        stack_obs, _ = stack_env.reset(seed=seed)
+        assert stack_obs.shape == stack_env.observation_space.shape
+        assert (stack_obs == np.asarray(obs)).all()
+        for action in [3, 1, 2, 3, 0] * 2:
+            obs, *_ = env.step(action)
+            stack_obs, *_ = stack_env.step(action)
+            assert (stack_obs == np.asarray(obs)).all()
+
+
+def test_dirty_rects_cover_all_changes():
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array").unwrapped
+    env.reset(seed=0)
+    controller = env.game_object_controller
+    surf = pygame.Surface(env.canvas.get_size())
+    surf.fill(get_config()["BACKGROUND"])
+    controller._draw_all_objects(surf)
+    for action in [3, 1, 1, 3, 2, 0, 3, 2, 2, 3] * 20:
+        previous = pygame.surfarray.array3d(surf)
+        dirty_rects = controller._clear_all_objects(surf)
+        env._step_sprites(action)
+        dirty_rects += controller._draw_all_objects(surf)
+        covered = np.zeros(surf.get_size(), dtype=bool)
+        for rect in dirty_rects:
+            rect = rect.clip(surf.get_rect())
+            covered[rect.left : rect.right, rect.top : rect.bottom] = True
+        changed = (pygame.surfarray.array3d(surf) != previous).any(axis=-1)
+        assert not (changed & ~covered).any()
+
+
+@pytest.mark.parametrize("engine", ["sprite", "array"])
+def test_scoreboard_overlay(engine):
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode="rgb_array", engine=engine
+    )
+    overlay_env = gymnasium.make(
+        "CustomSpaceInvaders-v0",
+        render_mode="rgb_array",
+        engine=engine,
+        scoreboard=True,
+    )
+    env.reset(seed=0)
+    overlay_env.reset(seed=0)
+    scoreboard = overlay_env.unwrapped.scoreboard
+    kills = 0
+    for action in [3, 1, 1, 3, 2, 0, 3, 2, 2, 3] * 8:
+        obs, reward, *_, info = env.step(action)
+        overlay_obs, *_ = overlay_env.step(action)
+        kills += reward == 1
+        # The scoreboard only covers the top left corner of the frame
+        assert (obs[40:] == overlay_obs[40:]).all()
+        assert (obs[:, 30:] == overlay_obs[:, 30:]).all()
+        assert scoreboard.score == 5 * kills
+        assert scoreboard.lives == info["player_lives"]
+    assert kills > 0 and (obs != overlay_obs).any()
+    text = scoreboard.render_score()
+    assert scoreboard.render_score() is text
+    scoreboard.score += 5
+    assert scoreboard.render_score() is not text
+
+
+def test_state_snapshot():
+    actions = np.random.default_rng(1).integers(4, size=300)
+    envs = {
+        engine: gymnasium.make(
+            "CustomSpaceInvaders-v0",
+            render_mode="rgb_array",
+            engine=engine,
+            observation_renderer="direct",
+        ).unwrapped
+        for engine in ["sprite", "array"]
+    }
+    for engine, env in envs.items():
+        env.reset(seed=5)
+        for action in actions[:200]:
+            env.step(action)
+        state = pickle.loads(pickle.dumps(env.get_state()))
+        expected = [env.step(action) for action in actions[200:]]
+        # Restore into the same engine and into the other engine
+        for other in envs.values():
+            other.reset(seed=99)
+            other.set_state(state)
+            for action, (obs, *rest) in zip(actions[200:], expected):
+                other_obs, *other_rest = other.step(action)
+                assert (obs == other_obs).all()
+                assert rest == other_rest
+
+
+@pytest.mark.parametrize("engine", ["sprite", "array"])
+def test_clone(engine):
+    env = gymnasium.make(
+        "CustomSpaceInvaders-v0", render_mode="symbolic", engine=engine
+    ).unwrapped
+    env.reset(seed=3)
+    actions = np.random.default_rng(1).integers(4, size=300)
+    for action in actions[:100]:
+        env.step(action)
+    clone = env.clone()
+    # The blockade masks are shared until a block is destroyed
+    blockades = clone.array_engine.blockade_alive
+    assert clone.clone().array_engine.blockade_alive is blockades
+    initial_blockades = blockades.copy()
+    for action in actions[100:]:
+        obs, *rest = env.step(action)
+        clone_obs, *clone_rest = clone.step(action)
+        for key in obs:
+            assert (obs[key] == clone_obs[key]).all()
+        assert rest == clone_rest
+    assert (blockades == initial_blockades).all()
+    assert (clone.array_engine.blockade_alive != initial_blockades).any()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_trajectory_recorder(tmp_path, compress):
+    env = TrajectoryRecorder(
+        gymnasium.make(
+            "CustomSpaceInvaders-v0",
+            render_mode="rgb_array",
+            observation_renderer="direct",
+            max_episode_steps=30,
+        ),
+        tmp_path,
+        chunk_size=16,
+        compress=compress,
+    )
+    transitions = []
+    for episode in range(2):
+        obs, _ = env.reset(seed=episode)
+        done = False
+        while not done:
+            action = env.action_space.sample()
+            next_obs, reward, terminated, truncated, info = env.step(action)
+            transitions.append((obs, action, reward, terminated, truncated, next_obs))
+            obs, done = next_obs, terminated or truncated
+    env.close()
+    reader = TrajectoryReader(tmp_path)
+    assert len(reader) == len(transitions) == 60
+    assert reader.num_episodes == 2 and reader.episode_range(1) == range(30, 60)
+    for transition, expected in zip(reader, transitions):
+        obs, action, reward, terminated, truncated, next_obs = expected
+        assert (transition["obs"] == obs).all()
+        assert (transition["next_obs"] == next_obs).all()
+        assert transition["action"] == action and transition["reward"] == reward
+        assert transition["terminated"] == terminated
+        assert transition["truncated"] == truncated
+    assert reader[-1]["info"]["game_time"] == 30
+    batch = reader.sample(8, np.random.default_rng(0))
+    assert batch["obs"].shape == (8, *env.observation_space.shape)
+
+
+def test_trajectory_recorder_requires_reset(tmp_path):
+    env = TrajectoryRecorder(
+        gymnasium.make("CustomSpaceInvaders-v0", render_mode="rgb_array"), tmp_path
+    )
+    # Reset only the wrapped environment, the recorder has not started an episode
+    env.env.reset(seed=0)
+    game_time = env.unwrapped.game_time
+    with pytest.raises(RuntimeError):
+        env.step(0)
+    assert env.unwrapped.game_time == game_time
+    assert env.num_steps == 0
+    env.close()
+
+
+def test_shared_memory_vector_env_matches_single_envs():
+    env_kwargs = {
+        "render_mode": "rgb_array",
+        "engine": "array",
+        "observation_renderer": "direct",
+    }
+    vector_env = SharedMemoryVectorEnv(
+        num_envs=3, num_workers=2, max_episode_steps=20, **env_kwargs
+    )
+    envs = [
+        gymnasium.make("CustomSpaceInvaders-v0", max_episode_steps=20, **env_kwargs)
+        for _ in range(3)
+    ]
+    vector_obs, _ = vector_env.reset(seed=1)
+    for i, env in enumerate(envs):
+        obs, _ = env.reset(seed=1 + i)
+        assert (obs == vector_obs[i]).all()
+    num_finished = 0
+    for actions in np.random.default_rng(0).integers(4, size=(30, 3)):
+        vector_obs, rewards, terminated, truncated, infos = vector_env.step(actions)
+        for i, env in enumerate(envs):
+            obs, reward, env_terminated, env_truncated, _ = env.step(actions[i])
+            assert reward == rewards[i] and env_terminated == terminated[i]
+            assert env_truncated == truncated[i]
+            if env_terminated or env_truncated:
+                assert (infos["final_observation"][i] == obs).all()
+                obs, _ = env.reset()
+                num_finished += 1
+            assert (obs == vector_obs[i]).all()
+    assert num_finished >= 3
+    with pytest.raises(ValueError):
+        vector_env.reset(options={})
+    vector_env.close()
+
+
+def test_shared_memory_vector_env_detects_killed_worker():
+    vector_env = SharedMemoryVectorEnv(
+        num_envs=2, num_workers=2, timeout=2, render_mode="rgb_array"
+    )
+    vector_env.reset(seed=0)
+    process = vector_env.processes[0]
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    with pytest.raises(RuntimeError, match="worker process failed"):
+        vector_env.step(np.zeros(2, dtype=np.int64))
+    vector_env.close()
+
+
+def test_shared_memory_vector_env_closes_with_killed_worker():
+    vector_env = SharedMemoryVectorEnv(
+        num_envs=2, num_workers=2, timeout=2, render_mode="rgb_array"
+    )
+    vector_env.reset(seed=0)
+    process = vector_env.processes[0]
+    os.kill(process.pid, signal.SIGKILL)
+    process.join()
+    vector_env.close()
+    assert not any(process.is_alive() for process in vector_env.processes)
+
+
+def test_enemy_formation():
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="symbolic").unwrapped
+    env.reset(seed=0)
+    controller = env.enemy_controller
+    enemies = {enemy.formation_index: enemy for enemy in controller}
+
+    def check_queries():
+        rects = [enemy.rect for enemy in controller]
+        assert controller.enemy_height == max(rect.bottom for rect in rects)
+        assert controller.formation.left == min(rect.left for rect in rects)
+        assert controller.formation.right == max(rect.right for rect in rects)
+
+    check_queries()
+    # Kill the leftmost column and the lowest row
+    for formation_index in [0, 1, 2, 3, 4, 9, 14, 54]:
+        enemies[formation_index].kill()
+    check_queries()
+    position = enemies[5].rect.topleft
+    killed_position = enemies[0].rect.topleft
+    controller.move_enemies(40)
+    controller.move_enemies_row_down()
+    controller.switch_movement_direction()
+    check_queries()
+    assert enemies[5].rect.topleft == (position[0] - 6, position[1] + 18)
+    assert enemies[5].movement_direction == 1
+    # Killed enemies keep their last position
+    assert enemies[0].rect.topleft == killed_position
+
+
+def test_enemy_hit_reports_formation_cells():
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="symbolic").unwrapped
+    env.reset(seed=0)
+    controller = env.game_object_controller
+    enemies = {enemy.formation_index: enemy for enemy in env.enemy_controller}
+    assert controller._check_enemy_hit() == []
+    # A laser across the border of rows 1 and 2 of column 3 kills both enemies
+    laser = Laser(get_assets().laser_im, (0, 0), 0)
+    laser.rect.center = (enemies[16].rect.centerx, enemies[16].rect.bottom)
+    expected = {
+        enemy.formation_index
+        for enemy in env.enemy_controller
+        if enemy.rect.colliderect(laser.rect)
+    }
+    assert expected == {16, 17}
+    env.player.laser_controller.add(laser)
+    assert sorted(controller._check_enemy_hit()) == [(3, 1), (3, 2)]
+    assert not laser.alive()
+    assert not enemies[16].alive() and not enemies[17].alive()
+    assert len(env.enemy_controller) == 53
+    assert env.enemy_controller.formation.alive.sum() == 53
+
+
+def test_swept_collisions():
+    def shoot_through(swept, dt, target):
+        """Shoot a player laser from 10 pixels below a target and return the hits."""
+
+        env = gymnasium.make(
+            "CustomSpaceInvaders-v0", render_mode="symbolic", swept_collisions=swept
+        ).unwrapped
+        env.reset(seed=0)
+        if target == "blockade":
+            rect = env.blockade_controller.blockade_group.sprites()[0].rect
+        else:
+            rect = next(e for e in env.enemy_controller if e.formation_index == 4).rect
+        laser = Laser(get_assets().laser_im, (0, 0), 0.8)
+        laser.rect.midtop = (rect.centerx, rect.bottom + 10)
+        env.player.laser_controller.add(laser)
+        hits = []
+        while laser.alive():
+            env.player.laser_controller.move_laser(dt)
+            env.game_object_controller._sweep_lasers()
+            env.game_object_controller._check_blockade_hit_by_player_laser()
+            hits += env.game_object_controller._check_enemy_hit()
+        blocks = [s.mask.sum() for s in env.blockade_controller.blockade_group]
+        return hits, blocks
+
+    for target in ["blockade", "enemy"]:
+        # Steps of one pixel cannot skip anything
+        expected = shoot_through(False, 1, target)
+        assert expected != shoot_through(False, 200, target)
+        assert shoot_through(True, 200, target) == expected
+    # Both engines sweep lasers the same way
+    envs = [
+        gymnasium.make(
+            "CustomSpaceInvaders-v0",
+            render_mode="symbolic_array",
+            engine=engine,
+            dt=200,
+            swept_collisions=True,
+        )
+        for engine in ["sprite", "array"]
+    ]
+    for env in envs:
+        env.reset(seed=0)
+    for action in np.random.default_rng(0).choice(4, size=200):
+        results = [env.step(action) for env in envs]
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        assert results[0][1:] == results[1][1:]
+        if results[0][2]:
+            break
+
+
+def test_game_loop_replays_env(monkeypatch):
+    from space_invaders.components import GameHandler, ScoreBoard, create_world
+
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    actions = np.random.default_rng(0).choice(4, size=500, p=[0.1, 0.2, 0.2, 0.5])
+    world, level_generator = create_world()
+    scoreboard = ScoreBoard(get_assets().player_im)
+    # Without a frame limit every frame computes one tick
+    game = GameHandler(world, level_generator, scoreboard, seed=3, fps=None)
+
+    class Keys:
+        def __getitem__(self, key):
+            action = actions[game.game_time]
+            keys = {pygame.K_LEFT: 1, pygame.K_RIGHT: 2, pygame.K_SPACE: 3}
+            return keys.get(key) == action
+
+    monkeypatch.setattr(pygame.key, "get_pressed", Keys)
+    try:
+        game.game_loop(max_ticks=len(actions))
+    finally:
+        pygame.display.quit()
+    # The game loop and the environment share the tick of the game
+    env = gymnasium.make("CustomSpaceInvaders-v0", render_mode="symbolic").unwrapped
+    env.reset(seed=3)
+    for action in actions[: game.game_time]:
+        env.step(action)
+    assert game.game_time == env.game_time == len(actions)
+    assert game.player.rect == env.player.rect
+    assert game.scoreboard.lives == game.player.lives == env.player.lives
+    assert game.scoreboard.score == 5 * env.killed_enemies > 0
+    for key in ["x", "y", "direction"]:
+        assert getattr(game.enemy_controller.formation, key) == getattr(
+            env.enemy_controller.formation, key
+        )
+    np.testing.assert_array_equal(
+        game.enemy_controller.formation.alive, env.enemy_controller.formation.alive
+    )